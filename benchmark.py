@@ -0,0 +1,358 @@
+#!/usr/bin/python3
+"""
+Micro benchmarks for the hot paths of pyhomematic. No CCU is required.
+
+Usage:
+    python3 benchmark.py events [--burst burst.json] [--rounds 20]
+    python3 benchmark.py routing [--events 100000]
+    python3 benchmark.py values [--events 100000]
+    python3 benchmark.py keepalive [--events 2000]
+    python3 benchmark.py binrpc [--rounds 5]
+    python3 benchmark.py memory [--channels 8000]
+    python3 benchmark.py startup [--devices 2000]
+
+events: Dispatch a burst of event() / system.multicall() requests into
+        RPCFunctions, once through the generic XML-RPC dispatcher and once
+        through the event fast path, and print events per second.
+        A recorded burst can be supplied as a JSON list of request bodies.
+        Without it, a burst in the format of the CCU is generated for the
+        devices in device_descriptions.json.
+routing: Call RPCFunctions.event for a channel directly, once with the
+        former implementation splitting the interface_id and upper-casing the
+        key per event and once with the current one, and print the time per event.
+values: Store event values in the cache of a channel, once in a plain dict
+        and once in the ValueStore recording their arrival time, and print
+        the overhead per event next to the cost of routing an event.
+keepalive: Let the VCCU send events to HMConnection one by one, once with
+        a new connection per request and once with persistent connections,
+        and print events per second.
+binrpc: Fetch the VALUES paramset of every channel in device_descriptions.json
+        from the VCCU, once via XML-RPC and once via BIN-RPC, and print
+        calls per second.
+memory: Create HMChannel objects for the channels in device_descriptions.json
+        (repeated up to the given number) and print the memory allocated per
+        channel, compared to the former layout copying every description field
+        into the __dict__ of the object.
+startup: Create device objects for the devices in device_descriptions.json
+        (repeated up to the given number), once with every device building
+        its datapoint metadata and once sharing the metadata compiled per
+        device class and TYPE, and print devices per second and memory.
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import random
+import socket
+import logging
+import argparse
+import tracemalloc
+import xmlrpc.client
+
+from pyhomematic import _hm
+from pyhomematic import vccu
+from pyhomematic import HMConnection
+from pyhomematic import devicetypes
+from pyhomematic.devicetypes import generic
+from pyhomematic.devicetypes.generic import HMChannel
+
+logging.basicConfig(level=logging.ERROR)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEVICE_DESCRIPTIONS = os.path.join(SCRIPT_DIR, "pyhomematic/devicetypes/json/device_descriptions.json")
+INTERFACE_ID = "benchmark-default"
+REMOTE = "default"
+
+
+def load_descriptions():
+    with open(DEVICE_DESCRIPTIONS) as fptr:
+        return json.load(fptr)
+
+
+def create_rpcfunctions():
+    """RPCFunctions with device objects for all known device descriptions."""
+    rpcfunctions = _hm.RPCFunctions(proxies={INTERFACE_ID: None},
+                                    remotes={REMOTE: {}})
+    rpcfunctions.newDevices(INTERFACE_ID, load_descriptions())
+    return rpcfunctions
+
+
+def generate_burst(requests=200, batchsize=20):
+    """Generate multicall event bursts the way the CCU sends them."""
+    rnd = random.Random(42)
+    channels = [d['ADDRESS'] for d in load_descriptions() if d.get('PARENT')]
+    samples = [("LEVEL", lambda: rnd.random()),
+               ("STATE", lambda: rnd.random() > 0.5),
+               ("POWER", lambda: round(rnd.random() * 100, 2)),
+               ("RSSI_PEER", lambda: rnd.randint(-100, -30)),
+               ("WORKING", lambda: False)]
+    burst = []
+    for _ in range(requests):
+        calls = []
+        for _ in range(batchsize):
+            key, value = rnd.choice(samples)
+            calls.append({'methodName': 'event',
+                          'params': [INTERFACE_ID, rnd.choice(channels), key, value()]})
+        burst.append(xmlrpc.client.dumps((calls,), 'system.multicall',
+                                         encoding='iso-8859-1').encode('iso-8859-1'))
+    return burst
+
+
+def count_events(burst):
+    count = 0
+    for body in burst:
+        params, method = xmlrpc.client.loads(body)
+        count += len(params[0]) if method == 'system.multicall' else 1
+    return count
+
+
+def run_dispatcher(dispatcher, burst, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for body in burst:
+            dispatcher._marshaled_dispatch(body)
+    return time.perf_counter() - start
+
+
+def bench_events(args):
+    if args.burst:
+        with open(args.burst) as fptr:
+            burst = [body.encode('iso-8859-1') for body in json.load(fptr)]
+    else:
+        burst = generate_burst()
+    events = count_events(burst) * args.rounds
+    rpcfunctions = create_rpcfunctions()
+    results = {}
+    for name, fastevents in (("generic", False), ("fastpath", True)):
+        dispatcher = _hm.XMLRPCDispatcher()
+        dispatcher.fastevents = fastevents
+        dispatcher.register_multicall_functions()
+        dispatcher.register_instance(rpcfunctions, allow_dotted_names=True)
+        duration = run_dispatcher(dispatcher, burst, args.rounds)
+        results[name] = events / duration
+        print("%-10s %8i events in %.3fs: %10.0f events/s" % (name, events, duration, results[name]))
+    print("speedup    %.2fx" % (results["fastpath"] / results["generic"]))
+
+
+def legacy_event(rpc, interface_id, address, value_key, value):
+    """RPCFunctions.event before the routes and keys were cached."""
+    logging.getLogger(_hm.__name__).debug(
+        "RPCFunctions.event: interface_id = %s, address = %s, value_key = %s, value = %s" % (
+            interface_id, address, value_key.upper(), str(value)))
+    rpc.devices_all[interface_id.split('-')[-1]][address].event(interface_id, value_key.upper(), value)
+    if rpc.eventcallback:
+        rpc.eventcallback(interface_id=interface_id, address=address,
+                          value_key=value_key.upper(), value=value)
+    return True
+
+
+def bench_routing(args):
+    rpcfunctions = create_rpcfunctions()
+    rpcfunctions.eventcallback = lambda interface_id, address, value_key, value: None
+    address = [d['ADDRESS'] for d in load_descriptions() if d.get('PARENT')][0]
+    params = (INTERFACE_ID, address, "level", 0.5)
+    results = {}
+    for name, event in (("former", lambda: legacy_event(rpcfunctions, *params)),
+                        ("current", lambda: rpcfunctions.event(*params))):
+        duration = min(timeit.repeat(event, number=args.events, repeat=5))
+        results[name] = duration
+        print("%-10s %8.2fus per event" % (name, duration / args.events * 1e6))
+    print("speedup    %.2fx" % (results["former"] / results["current"]))
+
+
+def dict_event(channel, interface_id, key, value):
+    """HMGeneric.event with a plain dict as value cache."""
+    generic.LOG.debug("HMGeneric.event: address=%s, interface_id=%s, key=%s, value=%s",
+                      channel._ADDRESS, interface_id, key, value)
+    channel._VALUES[key] = value
+    for callback in channel._eventcallbacks:
+        callback(channel._ADDRESS, interface_id, key, value)
+
+
+def bench_values(args):
+    rpcfunctions = create_rpcfunctions()
+    description = [d for d in load_descriptions() if d.get('PARENT')][0]
+    address = description['ADDRESS']
+    channel = rpcfunctions.devices_all[REMOTE][address]
+    plain = HMChannel(description, None)
+    plain._VALUES = {}
+    results = {}
+    for name, event in (("dict", lambda: dict_event(plain, INTERFACE_ID, "LEVEL", 0.5)),
+                        ("valuestore", lambda: channel.event(INTERFACE_ID, "LEVEL", 0.5))):
+        results[name] = min(timeit.repeat(event, number=args.events, repeat=7)) / args.events
+        print("%-10s %8.0fns per event" % (name, results[name] * 1e9))
+    # Cost of an event received in a system.multicall, for comparison
+    burst = generate_burst()
+    dispatcher = _hm.XMLRPCDispatcher()
+    dispatcher.register_multicall_functions()
+    dispatcher.register_instance(rpcfunctions, allow_dotted_names=True)
+    results["received"] = min(run_dispatcher(dispatcher, burst, 1) for _ in range(7)) / count_events(burst)
+    print("%-10s %8.0fns per event" % ("received", results["received"] * 1e9))
+    overhead = results["valuestore"] - results["dict"]
+    print("overhead   %.0fns per event, %.1f%% of receiving an event" %
+          (overhead * 1e9, 100 * overhead / results["received"]))
+
+
+def free_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def bench_keepalive(args):
+    port = free_port()
+    server = vccu.ServerThread(local="127.0.0.1", localport=port)
+    server.start()
+    time.sleep(0.5)
+    try:
+        results = {}
+        for name, keepalive in (("close", False), ("keepalive", True)):
+            client = HMConnection(interface_id="benchmark",
+                                  keepalive=keepalive,
+                                  remotes={REMOTE: {"ip": "127.0.0.1",
+                                                    "port": port,
+                                                    "connect": True}})
+            client.start()
+            # wait for the VCCU to push its devices
+            for _ in range(50):
+                if client.devices_all.get(REMOTE):
+                    break
+                time.sleep(0.1)
+            address = next(iter(client.devices_all[REMOTE]))
+            events = [(address, "LEVEL", i / args.events) for i in range(args.events)]
+            start = time.perf_counter()
+            server.sendEvents("benchmark-%s" % REMOTE, events)
+            duration = time.perf_counter() - start
+            client.stop()
+            results[name] = args.events / duration
+            print("%-10s %8i events in %.3fs: %10.0f events/s" % (name, args.events, duration, results[name]))
+        print("speedup    %.2fx" % (results["keepalive"] / results["close"]))
+    finally:
+        server.stop()
+
+
+def bench_binrpc(args):
+    port = free_port()
+    server = vccu.ServerThread(local="127.0.0.1", localport=port)
+    server.start()
+    time.sleep(0.5)
+    channels = [d['ADDRESS'] for d in load_descriptions() if d.get('PARENT')]
+    calls = len(channels) * args.rounds
+    try:
+        results = {}
+        for protocol in (_hm.PROTOCOL_XMLRPC, _hm.PROTOCOL_BINRPC):
+            client = HMConnection(interface_id="benchmark",
+                                  remotes={REMOTE: {"ip": "127.0.0.1",
+                                                    "port": port,
+                                                    "connect": False,
+                                                    "protocol": protocol}})
+            proxy = client._server.proxies["benchmark-%s" % REMOTE]
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                for address in channels:
+                    proxy.getParamset(address, "VALUES")
+            duration = time.perf_counter() - start
+            results[protocol] = calls / duration
+            print("%-10s %8i calls in %.3fs: %10.0f calls/s" % (protocol, calls, duration, results[protocol]))
+        print("speedup    %.2fx" % (results[_hm.PROTOCOL_BINRPC] / results[_hm.PROTOCOL_XMLRPC]))
+    finally:
+        server.stop()
+
+
+class DictChannel():
+    """Former layout of HMChannel: description fields copied, containers created up front."""
+    FIELDS = ('ADDRESS', 'FAMILY', 'FLAGS', 'ID', 'PARAMSETS', 'TYPE', 'VERSION', 'PARENT',
+              'AES_ACTIVE', 'DIRECTION', 'INDEX', 'LINK_SOURCE_ROLES', 'LINK_TARGET_ROLES',
+              'PARENT_TYPE', 'GROUP', 'TEAM', 'TEAM_TAG', 'TEAM_CHANNELS', 'CHANNEL')
+
+    def __init__(self, device_description, proxy):
+        for field in self.FIELDS:
+            setattr(self, '_' + field, device_description.get(field))
+        self._PARAMSET_DESCRIPTIONS = {}
+        self._proxy = proxy
+        self._paramsets = {}
+        self._eventcallbacks = []
+        self._name = device_description.get('ADDRESS')
+        self._VALUES = {'UNREACH': None}
+
+
+def measure(factory, descriptions):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(description, None) for description in descriptions]
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return allocated / len(descriptions)
+
+
+def bench_memory(args):
+    channels = [d for d in load_descriptions() if d.get('PARENT')]
+    descriptions = [channels[i % len(channels)] for i in range(args.channels)]
+    former = measure(DictChannel, descriptions)
+    current = measure(HMChannel, descriptions)
+    print("former   %8.0f bytes/channel %10.1f MiB for %i channels" % (former, former * len(descriptions) / 2**20, len(descriptions)))
+    print("slotted  %8.0f bytes/channel %10.1f MiB for %i channels" % (current, current * len(descriptions) / 2**20, len(descriptions)))
+    print("saving   %.0f%%" % (100 * (1 - current / former)))
+
+
+def bench_startup(args):
+    parents = [d for d in load_descriptions() if not d.get('PARENT')]
+    descriptions = [parents[i % len(parents)] for i in range(args.devices)]
+    classes = [devicetypes.SUPPORTED.get(d['TYPE'], devicetypes.UNSUPPORTED) for d in descriptions]
+    results = {}
+    for name, create in (("per device", lambda cls, d: cls(d, None)),
+                         ("shared", lambda cls, d: cls.fromDescription(d, None))):
+        generic._NODE_METADATA.clear()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        devices = [create(cls, d) for cls, d in zip(classes, descriptions)]
+        duration = time.perf_counter() - start
+        allocated = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del devices
+        results[name] = duration
+        print("%-10s %6i devices in %.3fs: %8.0f devices/s %6.0f bytes/device" %
+              (name, len(descriptions), duration, len(descriptions) / duration, allocated / len(descriptions)))
+    shared = sum(1 for nodes in generic._NODE_METADATA.values() if nodes)
+    print("speedup    %.2fx, %i of %i device classes share their metadata" %
+          (results["per device"] / results["shared"], shared, len(generic._NODE_METADATA)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pyhomematic micro benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark")
+    events = subparsers.add_parser("events", help="inbound event dispatching")
+    events.add_argument("--burst", help="JSON file with a list of recorded request bodies")
+    events.add_argument("--rounds", type=int, default=20)
+    events.set_defaults(func=bench_events)
+    routing = subparsers.add_parser("routing", help="event() of a single channel")
+    routing.add_argument("--events", type=int, default=100000)
+    routing.set_defaults(func=bench_routing)
+    values = subparsers.add_parser("values", help="value cache of event()")
+    values.add_argument("--events", type=int, default=100000)
+    values.set_defaults(func=bench_values)
+    keepalive = subparsers.add_parser("keepalive", help="persistent callback connections")
+    keepalive.add_argument("--events", type=int, default=2000)
+    keepalive.set_defaults(func=bench_keepalive)
+    binrpc = subparsers.add_parser("binrpc", help="outbound calls via BIN-RPC")
+    binrpc.add_argument("--rounds", type=int, default=5)
+    binrpc.set_defaults(func=bench_binrpc)
+    memory = subparsers.add_parser("memory", help="memory per channel object")
+    memory.add_argument("--channels", type=int, default=8000)
+    memory.set_defaults(func=bench_memory)
+    startup = subparsers.add_parser("startup", help="creation of device objects")
+    startup.add_argument("--devices", type=int, default=2000)
+    startup.set_defaults(func=bench_startup)
+    args = parser.parse_args()
+    if not args.benchmark:
+        parser.print_help()
+        sys.exit(1)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,2 +1 @@
-
-from pyhomematic.connection import HMConnection
+from pyhomematic.connection import HMConnection, AsyncHMConnection
@@ -0,0 +1,320 @@
+"""
+asyncio clients for outbound calls to the CCU / Homegear. Requests are sent
+over a pool of kept-alive connections, so a single event loop can drive many
+concurrent calls without a thread per call:
+    AsyncServerProxy: XML-RPC over HTTP(S) or BIN-RPC (xmlrpc_bin:// URLs)
+    AsyncJsonRpc: JSON-RPC of the CCU (system variables etc.)
+"""
+import asyncio
+import base64
+import collections
+import json
+import socket
+import urllib.parse
+import xmlrpc.client
+import logging
+
+from pyhomematic import _binrpc
+
+LOG = logging.getLogger(__name__)
+
+# Constants
+CONNECTIONS = 4  # Kept-alive connections per remote
+CONNECT_TIMEOUT = 10  # Seconds to establish a connection
+READ_TIMEOUT = None  # Seconds to wait for a response, None = no limit
+ENCODING = 'ISO-8859-1'
+MAX_HEADER_SIZE = 65536
+USER_AGENT = 'pyhomematic'
+
+
+class AsyncConnectionPool():
+    """
+    Up to connections concurrent (reader, writer) pairs to a host. Idle connections
+    are kept open and reused. The pool is bound to the event loop it is first used on,
+    connections of another loop are dropped when it is used on a new one.
+    """
+
+    def __init__(self, host, port, ssl=None, connections=CONNECTIONS, connecttimeout=CONNECT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.size = max(1, int(connections or 1))
+        self.connecttimeout = connecttimeout
+        self._loop = None
+        self._semaphore = None
+        self._idle = collections.deque()
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._idle.clear()
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.size)
+
+    async def run(self, exchange):
+        """
+        Await exchange(reader, writer) on a pooled connection. exchange returns
+        (result, keepalive). A reused connection may have been closed by the remote
+        in the meantime, the request is retried once on a new connection if the
+        exchange raised StaleConnection: sending failed or the connection was closed
+        before any response byte. Other failures are not retried, the request may
+        have been processed.
+        """
+        self._bind()
+        async with self._semaphore:
+            for attempt in (0, 1):
+                reused = bool(self._idle)
+                if reused:
+                    reader, writer = self._idle.pop()
+                else:
+                    reader, writer = await self._connect()
+                try:
+                    result, keepalive = await exchange(reader, writer)
+                except StaleConnection:
+                    writer.close()
+                    if not reused or attempt:
+                        raise
+                    continue
+                except BaseException:
+                    writer.close()
+                    raise
+                if keepalive:
+                    self._idle.append((reader, writer))
+                else:
+                    writer.close()
+                return result
+
+    async def _connect(self):
+        try:
+            return await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=self.ssl, limit=MAX_HEADER_SIZE),
+                self.connecttimeout)
+        except asyncio.TimeoutError as err:
+            raise socket.timeout("timed out connecting to %s:%s" % (self.host, self.port)) from err
+
+    def close(self):
+        """Close the idle connections."""
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+class StaleConnection(ConnectionResetError):
+    """The request has certainly not been processed by the remote."""
+
+
+async def _send(writer, data):
+    try:
+        writer.write(data)
+        await writer.drain()
+    except socket.timeout:
+        raise
+    except OSError as err:
+        raise StaleConnection(str(err)) from err
+
+
+async def _readFirst(awaitable):
+    """Await the first read of a response, a clean EOF means a stale connection."""
+    try:
+        return await awaitable
+    except asyncio.IncompleteReadError as err:
+        if err.partial:
+            raise
+        raise StaleConnection("connection closed by server") from err
+
+
+async def _wait(awaitable, timeout):
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError as err:
+        raise socket.timeout("timed out") from err
+
+
+class AsyncHTTPConnection():
+    """HTTP/1.1 POST requests over an AsyncConnectionPool."""
+
+    def __init__(self, url, connections=CONNECTIONS, connecttimeout=CONNECT_TIMEOUT,
+                 readtimeout=READ_TIMEOUT, context=None):
+        components = urllib.parse.urlsplit(url)
+        self.path = components.path or '/'
+        self.readtimeout = readtimeout
+        self._headers = {'Host': components.netloc.rpartition('@')[2],
+                         'User-Agent': USER_AGENT}
+        if components.username is not None:
+            auth = urllib.parse.unquote_to_bytes(components.netloc.rpartition('@')[0])
+            self._headers['Authorization'] = "Basic %s" % base64.b64encode(auth).decode('ascii')
+        secure = components.scheme == 'https'
+        if secure and context is None:
+            context = True
+        self.pool = AsyncConnectionPool(components.hostname,
+                                        components.port or (443 if secure else 80),
+                                        ssl=context if secure else None,
+                                        connections=connections,
+                                        connecttimeout=connecttimeout)
+
+    async def post(self, body, contenttype, path=None):
+        """Send a POST request. Returns (status, response body)."""
+        headers = dict(self._headers)
+        headers['Content-Type'] = contenttype
+        headers['Content-Length'] = str(len(body))
+        request = ("POST %s HTTP/1.1\r\n" % (path or self.path) +
+                   "".join("%s: %s\r\n" % header for header in headers.items()) +
+                   "\r\n").encode('iso-8859-1') + body
+
+        async def exchange(reader, writer):
+            await _send(writer, request)
+            return await _wait(self._readResponse(reader), self.readtimeout)
+
+        return await self.pool.run(exchange)
+
+    @staticmethod
+    async def _readResponse(reader):
+        header = await _readFirst(reader.readuntil(b'\r\n\r\n'))
+        lines = header.decode('iso-8859-1').split('\r\n')
+        statusline = lines[0].split(None, 2)
+        if len(statusline) < 2 or not statusline[0].startswith('HTTP/'):
+            raise ConnectionResetError("malformed status line %r" % lines[0])
+        status = int(statusline[1])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        keepalive = statusline[0] != 'HTTP/1.0' and headers.get('connection', '').lower() != 'close'
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                if not size:
+                    # Skip the trailer
+                    while await reader.readuntil(b'\r\n') != b'\r\n':
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            keepalive = False
+        return (status, body), keepalive
+
+
+class _AsyncMethod():
+    """Awaitable method of an AsyncServerProxy, supports nested names like system.multicall."""
+
+    def __init__(self, request, name):
+        self.__request = request
+        self.__name = name
+
+    def __getattr__(self, name):
+        return _AsyncMethod(self.__request, "%s.%s" % (self.__name, name))
+
+    def __call__(self, *args):
+        return self.__request(self.__name, args)
+
+
+class AsyncProxy():
+    """Dispatches awaitable method calls to request(methodname, params)."""
+
+    def __init__(self, request):
+        self._request = request
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _AsyncMethod(self._request, name)
+
+
+class AsyncServerProxy(AsyncProxy):
+    """
+    asyncio counterpart of xmlrpc.client.ServerProxy, methods are awaited:
+
+        proxy = AsyncServerProxy("http://ccu:2001")
+        await proxy.setValue('ABC0000001:1', 'STATE', True)
+
+    Uses BIN-RPC for xmlrpc_bin:// URLs.
+    """
+
+    def __init__(self, uri, connections=CONNECTIONS, connecttimeout=CONNECT_TIMEOUT,
+                 readtimeout=READ_TIMEOUT, context=None, encoding=ENCODING):
+        super().__init__(self.request)
+        self._encoding = encoding
+        self._readtimeout = readtimeout
+        if uri.startswith("%s://" % _binrpc.SCHEME):
+            self._http = None
+            host, port = _binrpc.parseUrl(uri)
+            self._pool = AsyncConnectionPool(host, port, connections=connections,
+                                             connecttimeout=connecttimeout)
+        else:
+            self._http = AsyncHTTPConnection(uri, connections, connecttimeout, readtimeout, context)
+            self._pool = self._http.pool
+
+    async def request(self, methodname, params):
+        """Send a request and return the result."""
+        if self._http is None:
+            return await self._binRpcRequest(methodname, params)
+        body = xmlrpc.client.dumps(params, methodname, encoding=self._encoding,
+                                   allow_none=False).encode(self._encoding, 'xmlcharrefreplace')
+        status, response = await self._http.post(body, 'text/xml')
+        if status != 200:
+            raise xmlrpc.client.ProtocolError(self._http.pool.host + self._http.path,
+                                              status, "HTTP status %i" % status, {})
+        return xmlrpc.client.loads(response)[0][0]
+
+    async def _binRpcRequest(self, methodname, params):
+        data = _binrpc.dumps(params, methodname, encoding=self._encoding)
+
+        async def exchange(reader, writer):
+            await _send(writer, data)
+            return await _wait(self._readFrame(reader), self._readtimeout), True
+
+        msgtype, payload = await self._pool.run(exchange)
+        return _binrpc.loads(msgtype, payload, self._encoding)[0][0]
+
+    @staticmethod
+    async def _readFrame(reader):
+        msgtype, length = _binrpc.parseHeader(await _readFirst(reader.readexactly(8)))
+        if msgtype in (_binrpc.MSG_REQUEST_HEADERS, _binrpc.MSG_RESPONSE_HEADERS):
+            # Skip the headers, the actual payload length follows them
+            msgtype &= 0x01
+            await reader.readexactly(length)
+            length = int.from_bytes(await reader.readexactly(4), 'big')
+        return msgtype, await reader.readexactly(length)
+
+    def close(self):
+        """Close the idle connections."""
+        self._pool.close()
+
+
+class AsyncJsonRpc():
+    """JSON-RPC client for the API of the CCU (e.g. http://ccu/api/homematic.cgi)."""
+
+    def __init__(self, url, connections=CONNECTIONS, connecttimeout=CONNECT_TIMEOUT,
+                 readtimeout=READ_TIMEOUT, context=None):
+        self._http = AsyncHTTPConnection(url, connections, connecttimeout, readtimeout, context)
+
+    async def post(self, method, params={}):
+        """
+        Call a method. Returns the response as dictionary with 'result' and 'error',
+        like RPCFunctions.jsonRpcPost, failures are returned as 'error' as well.
+        """
+        LOG.debug("AsyncJsonRpc.post: Method: %s" % method)
+        try:
+            payload = json.dumps(
+                {"method": method, "params": params, "jsonrpc": "1.1", "id": 0}).encode('utf-8')
+            status, response = await self._http.post(payload, 'application/json')
+            if status != 200:
+                LOG.error("AsyncJsonRpc.post: Status: %i" % status)
+                return {'error': status, 'result': {}}
+            try:
+                return json.loads(response.decode('utf-8'))
+            except ValueError:
+                # Workaround for bug in CCU
+                return json.loads(response.decode('utf-8').replace("\\", ""))
+        except Exception as err:
+            LOG.error("AsyncJsonRpc.post: Exception: %s" % str(err))
+            return {'error': str(err), 'result': {}}
+
+    def close(self):
+        """Close the idle connections."""
+        self._http.pool.close()
@@ -0,0 +1,294 @@
+import asyncio
+import re
+import socket
+import ssl
+import logging
+
+from pyhomematic import _hm
+from pyhomematic import _binrpc
+from pyhomematic import _aioclient
+
+LOG = logging.getLogger(__name__)
+
+# Constants
+MAX_HEADER_SIZE = 65536
+RPC_PATHS = ('/', '/RPC2',)
+# Methods that may block for a long time (device creation, file I/O, name
+# resolution). They are executed in the default executor to keep the event
+# loop responsive. Everything else is dispatched directly on the loop.
+BLOCKING_METHODS = (b'newDevices',
+                    b'deleteDevices',
+                    b'updateDevice',
+                    b'replaceDevice',
+                    b'readdedDevice')
+METHODNAME = re.compile(rb'<methodName>\s*([^<\s]+)\s*</methodName>')
+
+
+class AsyncServerThread(_hm.ServerBase):
+    """
+    asyncio based server to handle messages from CCU / Homegear.
+    Proxies, device objects and the dispatching of requests into RPCFunctions
+    are the same as with the threaded ServerThread. Only the listener runs
+    on an event loop instead of a dedicated thread, it is started and stopped
+    by awaiting start() and stop().
+    The async* methods send their requests with the asyncio clients of the proxies.
+    """
+
+    def createServer(self):
+        """Bind the listening socket and set up the dispatcher."""
+        self.server = None
+        self._loop = None
+        self._connections = {}
+        self._jsonrpc = {}
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self._local, self._localport))
+        self._socket.listen(socket.SOMAXCONN)
+        self._socket.setblocking(False)
+        self._localport = self._socket.getsockname()[1]
+        self._dispatcher = _hm.XMLRPCDispatcher()
+        self._dispatcher.register_introspection_functions()
+        self._dispatcher.register_multicall_functions()
+        LOG.debug("AsyncServerThread.createServer: Registering RPC functions")
+        self._dispatcher.register_instance(
+            self._rpcfunctions, allow_dotted_names=True)
+
+    async def start(self):
+        """Start listening on the running event loop."""
+        LOG.info("Starting asyncio server at http://%s:%i" %
+                 (self._local, self._localport))
+        self._loop = asyncio.get_running_loop()
+        if self.eventqueue is not None:
+            self.eventqueue.start(self._rpcfunctions._event)
+        self.server = await asyncio.start_server(self._handleConnection,
+                                                 sock=self._socket,
+                                                 limit=MAX_HEADER_SIZE)
+
+    async def stop(self):
+        """To stop the server we de-init from the CCU / Homegear, then close the listener."""
+        await self._loop.run_in_executor(None, self.proxyDeInit)
+        self.clearProxies()
+        LOG.info("Shutting down asyncio server")
+        if self.server is not None:
+            self.server.close()
+            # Persistent BIN-RPC connections are not closed by the server
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*self._connections.values(), return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+        for client in self._jsonrpc.values():
+            client.close()
+        self._jsonrpc.clear()
+        if self.eventqueue is not None:
+            await self._loop.run_in_executor(None, self.eventqueue.stop)
+        LOG.info("HomeMatic asyncio XML-RPC Server stopped")
+
+    async def dispatch(self, data):
+        """Dispatch a marshalled XML-RPC request and return the marshalled response."""
+        match = METHODNAME.search(data)
+        if match and match.group(1) in BLOCKING_METHODS:
+            return await self._loop.run_in_executor(
+                None, self._dispatcher._marshaled_dispatch, data)
+        return self._dispatcher._marshaled_dispatch(data)
+
+    async def dispatchBinRpc(self, methodname, params):
+        """Dispatch a BIN-RPC request and return the marshalled response."""
+        if methodname.encode('ascii', 'replace') in BLOCKING_METHODS:
+            return await self._loop.run_in_executor(
+                None, _binrpc.dispatchFrame, self._dispatcher._dispatch, methodname, params)
+        return _binrpc.dispatchFrame(self._dispatcher._dispatch, methodname, params)
+
+    async def _serveBinRpc(self, reader, writer, magic):
+        """Handle BIN-RPC requests until the CCU / Homegear closes the connection."""
+        try:
+            count = 0
+            while True:
+                msgtype, length = _binrpc.parseHeader(magic + await reader.readexactly(5))
+                if msgtype == _binrpc.MSG_REQUEST_HEADERS:
+                    await reader.readexactly(length)
+                    msgtype = _binrpc.MSG_REQUEST
+                    length = int.from_bytes(await reader.readexactly(4), 'big')
+                params, methodname = _binrpc.loads(msgtype, await reader.readexactly(length))
+                if methodname is None:
+                    raise _binrpc.BinRpcError("expected a request")
+                writer.write(await self.dispatchBinRpc(methodname, params))
+                await writer.drain()
+                count += 1
+                if self.keepalivemax and count >= self.keepalivemax:
+                    return
+                try:
+                    magic = await asyncio.wait_for(reader.readexactly(len(_binrpc.MAGIC)),
+                                                   self.keepalivetimeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError, _binrpc.BinRpcError) as err:
+            LOG.debug("AsyncServerThread._serveBinRpc: Connection closed: %s", err)
+
+    async def _handleConnection(self, reader, writer):
+        """Handle a single HTTP request or a BIN-RPC connection from the CCU / Homegear."""
+        try:
+            try:
+                magic = await reader.readexactly(len(_binrpc.MAGIC))
+                if magic == _binrpc.MAGIC:
+                    self._connections[writer] = asyncio.current_task()
+                    try:
+                        await self._serveBinRpc(reader, writer, magic)
+                    finally:
+                        self._connections.pop(writer, None)
+                    return
+                header = magic + await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            lines = header.decode('iso-8859-1').split('\r\n')
+            requestline = lines[0].split()
+            if len(requestline) < 2 or requestline[0] != 'POST':
+                await self._respond(writer, 501, b'')
+                return
+            if requestline[1] not in RPC_PATHS:
+                await self._respond(writer, 404, b'')
+                return
+            length = 0
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value.strip())
+            data = await reader.readexactly(length)
+            response = await self.dispatch(data)
+            await self._respond(writer, 200, response)
+        except Exception as err:
+            LOG.error("AsyncServerThread._handleConnection: Exception: %s" % str(err))
+            try:
+                await self._respond(writer, 500, b'')
+            except Exception:
+                pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, body):
+        reason = {200: 'OK', 404: 'Not Found', 500: 'Internal Server Error',
+                  501: 'Not Implemented'}.get(status, '')
+        writer.write(("HTTP/1.0 %i %s\r\n"
+                      "Content-Type: text/xml\r\n"
+                      "Content-Length: %i\r\n\r\n" % (status, reason, len(body))).encode('ascii'))
+        writer.write(body)
+        await writer.drain()
+
+    def _proxy(self, remote):
+        return self.proxies["%s-%s" % (self._interface_id, remote)]
+
+    def _jsonRpc(self, remote):
+        """The JSON-RPC client for a remote"""
+        client = self._jsonrpc.get(remote)
+        if client is None:
+            jsonport = self.remotes[remote].get('jsonport', _hm.DEFAULT_JSONPORT)
+            if jsonport == 443:
+                context = ssl.create_default_context()
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+                url = "https://%s:%s%s" % (self.remotes[remote]['ip'], jsonport, _hm.JSONRPC_URL)
+            else:
+                context = None
+                url = "http://%s:%s%s" % (self.remotes[remote]['ip'], jsonport, _hm.JSONRPC_URL)
+            client = self._jsonrpc[remote] = _aioclient.AsyncJsonRpc(url, context=context)
+        return client
+
+    async def asyncJsonRpcCall(self, remote, method, params=None):
+        """
+        Call a JSON-RPC method of the CCU within a session of its own.
+        Returns the response, None if the login failed.
+        """
+        session = None
+        try:
+            client = self._jsonRpc(remote)
+            response = await client.post("Session.login", {"username": self.remotes[remote]['username'],
+                                                            "password": self.remotes[remote]['password']})
+            if response['error'] is None and response['result']:
+                session = response['result']
+        except Exception as err:
+            LOG.debug("AsyncServerThread.asyncJsonRpcCall: Exception while logging in via JSON-RPC: %s" % str(err))
+        if not session:
+            LOG.warning("AsyncServerThread.asyncJsonRpcCall: Unable to open session.")
+            return None
+        try:
+            params = dict(params or {})
+            params["_session_id_"] = session
+            return await client.post(method, params)
+        except Exception as err:
+            LOG.error("AsyncServerThread.asyncJsonRpcCall: Exception: %s" % str(err))
+            return {'error': str(err), 'result': {}}
+        finally:
+            try:
+                await client.post("Session.logout", {"_session_id_": session})
+            except Exception as err:
+                LOG.debug("AsyncServerThread.asyncJsonRpcCall: Exception while logging out via JSON-RPC: %s" %
+                          str(err))
+
+    def _useJsonRpc(self, remote):
+        return self.remotes[remote]['username'] and self.remotes[remote]['password']
+
+    async def asyncGetAllSystemVariables(self, remote):
+        """Get all system variables from CCU / Homegear"""
+        variables = {}
+        if self._useJsonRpc(remote):
+            response = await self.asyncJsonRpcCall(remote, "SysVar.getAll")
+            if response is None:
+                return
+            if response['error'] is None and response['result']:
+                for var in response['result']:
+                    key, value = self.parseCCUSysVar(var)
+                    variables[key] = value
+        else:
+            try:
+                variables = await self._proxy(remote)._aio.getAllSystemVariables()
+            except Exception as err:
+                LOG.debug("AsyncServerThread.asyncGetAllSystemVariables: Exception: %s" % str(err))
+        return variables
+
+    async def asyncGetSystemVariable(self, remote, name):
+        """Get single system variable from CCU / Homegear"""
+        var = None
+        if self._useJsonRpc(remote):
+            response = await self.asyncJsonRpcCall(remote, "SysVar.getValueByName", {"name": name})
+            if response is None:
+                return
+            if response['error'] is None and response['result']:
+                try:
+                    var = float(response['result'])
+                except Exception:
+                    var = response['result'] == 'true'
+        else:
+            try:
+                var = await self._proxy(remote)._aio.getSystemVariable(name)
+            except Exception as err:
+                LOG.debug("AsyncServerThread.asyncGetSystemVariable: Exception: %s" % str(err))
+        return var
+
+    async def asyncDeleteSystemVariable(self, remote, name):
+        """Delete a system variable from CCU / Homegear"""
+        if self._useJsonRpc(remote):
+            response = await self.asyncJsonRpcCall(remote, "SysVar.deleteSysVarByName", {"name": name})
+            if response is not None and response['error'] is None and response['result']:
+                LOG.warning("AsyncServerThread.asyncDeleteSystemVariable: Deleted: %s" % str(response['result']))
+        else:
+            try:
+                return await self._proxy(remote)._aio.deleteSystemVariable(name)
+            except Exception as err:
+                LOG.debug("AsyncServerThread.asyncDeleteSystemVariable: Exception: %s" % str(err))
+
+    async def asyncSetSystemVariable(self, remote, name, value):
+        """Set a system variable on CCU / Homegear"""
+        if self._useJsonRpc(remote):
+            if value is True or value is False:
+                response = await self.asyncJsonRpcCall(remote, "SysVar.setBool", {"name": name, "value": int(value)})
+            else:
+                response = await self.asyncJsonRpcCall(remote, "SysVar.setFloat", {"name": name, "value": value})
+            if response is not None and response['error']:
+                LOG.debug("AsyncServerThread.asyncSetSystemVariable: Error while setting variable: %s" %
+                          str(response['error']))
+        else:
+            try:
+                return await self._proxy(remote)._aio.setSystemVariable(name, value)
+            except Exception as err:
+                LOG.debug("AsyncServerThread.asyncSetSystemVariable: Exception: %s" % str(err))
@@ -0,0 +1,103 @@
+import xmlrpc.client
+import logging
+
+LOG = logging.getLogger(__name__)
+
+# Constants
+BATCH_SIZE = 100  # Calls per system.multicall request
+
+
+class BatchError(xmlrpc.client.Error):
+    """The response to a system.multicall does not match its calls."""
+
+
+class Batch():
+    """
+    Collects calls to a remote and sends them with system.multicall.
+    Batches larger than maxsize are split into several requests.
+    Use as context manager to execute the calls when leaving the block:
+
+        with connection.batch('default') as batch:
+            batch.setValue('ABC0000001:1', 'STATE', True)
+            batch.setValue('ABC0000002:1', 'STATE', True)
+        batch.results
+
+    results holds the return value of each call in the order they have been added.
+    Calls that failed have an exception (usually xmlrpc.client.Fault) instead.
+    With multicall = False (remotes without system.multicall) the calls are sent one by one.
+    """
+
+    def __init__(self, proxy, maxsize=BATCH_SIZE, multicall=True):
+        self._proxy = proxy
+        self.maxsize = max(1, int(maxsize))
+        self.multicall = multicall
+        self.calls = []
+        self.results = []
+        self.requests = 0
+
+    def call(self, methodname, *params):
+        """Add a call. Returns its index in results."""
+        self.calls.append({'methodName': methodname, 'params': list(params)})
+        return len(self.results) + len(self.calls) - 1
+
+    def getValue(self, address, key):
+        return self.call('getValue', address, key)
+
+    def setValue(self, address, key, value):
+        return self.call('setValue', address, key, value)
+
+    def putParamset(self, address, paramset, value, rx_mode=None):
+        if rx_mode is None:
+            return self.call('putParamset', address, paramset, value)
+        return self.call('putParamset', address, paramset, value, rx_mode)
+
+    @property
+    def errors(self):
+        """(index, exception) of the calls that failed."""
+        return [(index, result) for index, result in enumerate(self.results)
+                if isinstance(result, Exception)]
+
+    def execute(self):
+        """Send the collected calls. Returns the results."""
+        calls, self.calls = self.calls, []
+        if not self.multicall:
+            for call in calls:
+                self.requests += 1
+                try:
+                    self.results.append(getattr(self._proxy, call['methodName'])(*call['params']))
+                except Exception as err:
+                    self.results.append(err)
+            return self.results
+        for start in range(0, len(calls), self.maxsize):
+            chunk = calls[start:start + self.maxsize]
+            LOG.debug("Batch.execute: Sending %i calls" % len(chunk))
+            self.requests += 1
+            try:
+                responses = self._proxy.system.multicall(chunk)
+            except Exception as err:
+                LOG.warning("Batch.execute: system.multicall failed: %s" % str(err))
+                self.results.extend([err] * len(chunk))
+                continue
+            if not isinstance(responses, list) or len(responses) != len(chunk):
+                LOG.warning("Batch.execute: Got %s responses for %i calls" % (
+                    len(responses) if isinstance(responses, list) else repr(responses), len(chunk)))
+                err = BatchError("system.multicall returned %r for %i calls" % (responses, len(chunk)))
+                self.results.extend([err] * len(chunk))
+                continue
+            for response in responses:
+                if isinstance(response, dict):
+                    self.results.append(xmlrpc.client.Fault(response.get('faultCode'),
+                                                            response.get('faultString')))
+                else:
+                    self.results.append(response[0] if response else None)
+        return self.results
+
+    def __len__(self):
+        return len(self.calls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
@@ -0,0 +1,329 @@
+"""
+Encoder, decoder and a minimal client for the BIN-RPC protocol spoken by the
+HomeMatic daemons (rfd, hs485d) and Homegear (URLs starting with xmlrpc_bin://).
+
+A frame consists of b'Bin', a type byte, the length of the payload and the payload:
+    request:  method name, number of parameters, parameters
+    response: a single value
+    fault:    a struct with faultCode and faultString
+Frames of type 0x40 / 0x41 are requests / responses carrying additional
+headers (e.g. for authentication) in front of the payload.
+"""
+import math
+import socket
+import struct
+import threading
+import urllib.parse
+import xmlrpc.client
+import logging
+
+LOG = logging.getLogger(__name__)
+
+# Constants
+ENCODING = 'ISO-8859-1'
+SCHEME = 'xmlrpc_bin'
+MAGIC = b'Bin'
+MSG_REQUEST = 0x00
+MSG_RESPONSE = 0x01
+MSG_FAULT = 0xFF
+MSG_REQUEST_HEADERS = 0x40
+MSG_RESPONSE_HEADERS = 0x41
+
+TYPE_VOID = 0x00
+TYPE_INTEGER = 0x01
+TYPE_BOOLEAN = 0x02
+TYPE_STRING = 0x03
+TYPE_FLOAT = 0x04
+TYPE_BASE64 = 0x11
+TYPE_INTEGER64 = 0xD1
+TYPE_ARRAY = 0x100
+TYPE_STRUCT = 0x101
+
+_INT = struct.Struct('>i')
+_UINT = struct.Struct('>I')
+_LONG = struct.Struct('>q')
+_FLOAT = struct.Struct('>ii')
+_TYPED_INT = struct.Struct('>ii')
+_HEADER = struct.Struct('>3sBI')
+
+
+class BinRpcError(xmlrpc.client.Error):
+    """Malformed BIN-RPC data."""
+
+
+def _encodeString(value, encoding):
+    data = value.encode(encoding, 'replace')
+    return _INT.pack(len(data)) + data
+
+
+def _encodeValue(value, encoding, out):
+    if value is None:
+        out.append(_INT.pack(TYPE_STRING) + _INT.pack(0))
+    elif value is True or value is False:
+        out.append(_INT.pack(TYPE_BOOLEAN) + (b'\x01' if value else b'\x00'))
+    elif isinstance(value, int):
+        if -2147483648 <= value <= 2147483647:
+            out.append(_TYPED_INT.pack(TYPE_INTEGER, value))
+        else:
+            out.append(_INT.pack(TYPE_INTEGER64) + _LONG.pack(value))
+    elif isinstance(value, float):
+        mantissa, exponent = math.frexp(value)
+        out.append(_INT.pack(TYPE_FLOAT) + _FLOAT.pack(int(round(mantissa * 0x40000000)), exponent))
+    elif isinstance(value, str):
+        out.append(_INT.pack(TYPE_STRING) + _encodeString(value, encoding))
+    elif isinstance(value, (bytes, bytearray, xmlrpc.client.Binary)):
+        if isinstance(value, xmlrpc.client.Binary):
+            value = value.data
+        data = xmlrpc.client.base64.b64encode(value)
+        out.append(_INT.pack(TYPE_BASE64) + _INT.pack(len(data)) + data)
+    elif isinstance(value, (list, tuple)):
+        out.append(_TYPED_INT.pack(TYPE_ARRAY, len(value)))
+        for item in value:
+            _encodeValue(item, encoding, out)
+    elif isinstance(value, dict):
+        out.append(_TYPED_INT.pack(TYPE_STRUCT, len(value)))
+        for key, item in value.items():
+            out.append(_encodeString(str(key), encoding))
+            _encodeValue(item, encoding, out)
+    else:
+        raise TypeError("cannot marshal %s objects" % type(value))
+
+
+def _frame(msgtype, payload):
+    return _HEADER.pack(MAGIC, msgtype, len(payload)) + payload
+
+
+def dumps(params, methodname=None, methodresponse=False, encoding=ENCODING):
+    """
+    Marshal a request (methodname and tuple of params), a response
+    (methodresponse=True and a tuple with a single value) or an
+    xmlrpc.client.Fault into a BIN-RPC frame.
+    """
+    out = []
+    if isinstance(params, xmlrpc.client.Fault):
+        _encodeValue({'faultCode': params.faultCode,
+                      'faultString': params.faultString}, encoding, out)
+        return _frame(MSG_FAULT, b''.join(out))
+    if methodresponse:
+        _encodeValue(params[0] if params else None, encoding, out)
+        return _frame(MSG_RESPONSE, b''.join(out))
+    out.append(_encodeString(methodname, encoding))
+    out.append(_INT.pack(len(params)))
+    for param in params:
+        _encodeValue(param, encoding, out)
+    return _frame(MSG_REQUEST, b''.join(out))
+
+
+class _Decoder():
+    def __init__(self, data, encoding):
+        self.data = data
+        self.pos = 0
+        self.encoding = encoding
+
+    def int(self):
+        value = _INT.unpack_from(self.data, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def string(self):
+        length = self.int()
+        value = self.data[self.pos:self.pos + length]
+        if len(value) != length:
+            raise BinRpcError("truncated string")
+        self.pos += length
+        return value.decode(self.encoding)
+
+    def value(self):
+        valuetype = self.int()
+        if valuetype == TYPE_STRING:
+            return self.string()
+        if valuetype == TYPE_INTEGER:
+            return self.int()
+        if valuetype == TYPE_BOOLEAN:
+            value = self.data[self.pos] != 0
+            self.pos += 1
+            return value
+        if valuetype == TYPE_FLOAT:
+            mantissa, exponent = _FLOAT.unpack_from(self.data, self.pos)
+            self.pos += 8
+            return math.ldexp(mantissa / 0x40000000, exponent)
+        if valuetype == TYPE_ARRAY:
+            return [self.value() for _ in range(self.int())]
+        if valuetype == TYPE_STRUCT:
+            result = {}
+            for _ in range(self.int()):
+                key = self.string()
+                result[key] = self.value()
+            return result
+        if valuetype == TYPE_INTEGER64:
+            value = _LONG.unpack_from(self.data, self.pos)[0]
+            self.pos += 8
+            return value
+        if valuetype == TYPE_BASE64:
+            length = self.int()
+            value = self.data[self.pos:self.pos + length]
+            self.pos += length
+            return xmlrpc.client.base64.b64decode(value)
+        if valuetype == TYPE_VOID:
+            return None
+        raise BinRpcError("unknown type 0x%x" % valuetype)
+
+
+def loads(msgtype, payload, encoding=ENCODING):
+    """
+    Unmarshal the payload of a frame. Returns (params, methodname) like
+    xmlrpc.client.loads, with methodname being None for responses.
+    Raises xmlrpc.client.Fault for fault frames.
+    """
+    try:
+        decoder = _Decoder(payload, encoding)
+        if msgtype == MSG_REQUEST:
+            methodname = decoder.string()
+            params = tuple(decoder.value() for _ in range(decoder.int()))
+            return params, methodname
+        if not payload:
+            return (None, ), None
+        value = decoder.value()
+    except (struct.error, IndexError, UnicodeDecodeError) as err:
+        raise BinRpcError("malformed payload: %s" % err) from err
+    if msgtype == MSG_FAULT:
+        raise xmlrpc.client.Fault(value.get('faultCode'), value.get('faultString'))
+    return (value, ), None
+
+
+def parseHeader(header):
+    """Parse the 8 leading bytes of a frame. Returns (msgtype, length)."""
+    magic, msgtype, length = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise BinRpcError("not a BIN-RPC frame")
+    return msgtype, length
+
+
+def readFrame(rfile):
+    """
+    Read a frame from a file-like object. Returns (msgtype, payload) or None at EOF.
+    Headers are skipped, msgtype is MSG_REQUEST / MSG_RESPONSE for frames with headers as well.
+    """
+    header = rfile.read(8)
+    if not header:
+        return None
+    if len(header) < 8:
+        raise BinRpcError("truncated frame header")
+    msgtype, length = parseHeader(header)
+    if msgtype in (MSG_REQUEST_HEADERS, MSG_RESPONSE_HEADERS):
+        # Skip the headers, the actual payload length follows them
+        msgtype &= 0x01
+        rfile.read(length)
+        length = _UINT.unpack(rfile.read(4))[0]
+    payload = rfile.read(length)
+    if len(payload) < length:
+        raise BinRpcError("truncated frame")
+    return msgtype, payload
+
+
+def serve(rfile, wfile, dispatch, maxrequests=0, encoding=ENCODING, idle=None):
+    """
+    Handle BIN-RPC requests on a connection until it is closed, using
+    dispatch(methodname, params) to run them. Before each further request
+    idle() is called, the connection is given up if it returns False.
+    """
+    count = 0
+    while True:
+        if count and idle is not None and not idle():
+            return
+        frame = readFrame(rfile)
+        if frame is None:
+            return
+        params, methodname = loads(frame[0], frame[1], encoding)
+        if methodname is None:
+            raise BinRpcError("expected a request")
+        wfile.write(dispatchFrame(dispatch, methodname, params, encoding))
+        wfile.flush()
+        count += 1
+        if maxrequests and count >= maxrequests:
+            return
+
+
+def dispatchFrame(dispatch, methodname, params, encoding=ENCODING):
+    """Run a request and return the marshalled response or fault."""
+    try:
+        return dumps((dispatch(methodname, params), ), methodresponse=True, encoding=encoding)
+    except xmlrpc.client.Fault as fault:
+        return dumps(fault, encoding=encoding)
+    except BaseException as exc:
+        return dumps(xmlrpc.client.Fault(1, "%s:%s" % (type(exc), exc)), encoding=encoding)
+
+
+def parseUrl(url):
+    """Return (host, port) of a xmlrpc_bin:// URL."""
+    # urlparse does not accept '_' in the scheme
+    components = urllib.parse.urlsplit("//" + url.split("://", 1)[-1])
+    return components.hostname, components.port
+
+
+class ServerProxy():
+    """
+    Minimal BIN-RPC client with the call interface of xmlrpc.client.ServerProxy.
+    The connection is kept open between calls and reopened when necessary.
+    """
+
+    def __init__(self, uri, encoding=ENCODING, connecttimeout=None, readtimeout=None):
+        self._host, self._port = parseUrl(uri)
+        self._encoding = encoding
+        self._connecttimeout = connecttimeout
+        self._readtimeout = readtimeout
+        self._lock = threading.Lock()
+        self._socket = None
+        self._rfile = None
+
+    def _connect(self):
+        self._socket = socket.create_connection((self._host, self._port), self._connecttimeout)
+        self._socket.settimeout(self._readtimeout)
+        self._rfile = self._socket.makefile('rb')
+
+    def close(self):
+        if self._socket is not None:
+            try:
+                self._rfile.close()
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = None
+        self._rfile = None
+
+    def request(self, methodname, params):
+        """Send a request and return the result."""
+        data = dumps(params, methodname, encoding=self._encoding)
+        with self._lock:
+            for attempt in (0, 1):
+                reused = self._socket is not None
+                if not reused:
+                    self._connect()
+                # A kept-alive connection may have been closed by the server. This is only
+                # retried if it is certain that the request has not been processed: sending
+                # failed, or the connection was closed without any response byte.
+                try:
+                    self._socket.sendall(data)
+                except OSError as err:
+                    self.close()
+                    if not reused or attempt or isinstance(err, socket.timeout):
+                        raise
+                    continue
+                try:
+                    frame = readFrame(self._rfile)
+                except BaseException:
+                    # The request may have been processed, don't send it again
+                    self.close()
+                    raise
+                if frame is None:
+                    self.close()
+                    if not reused or attempt:
+                        raise ConnectionResetError("connection closed by server")
+                    continue
+                break
+        return loads(frame[0], frame[1], self._encoding)[0][0]
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return xmlrpc.client._Method(self.request, name)
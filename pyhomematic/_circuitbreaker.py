@@ -0,0 +1,136 @@
+import time
+import threading
+import http.client
+import xmlrpc.client
+import logging
+
+LOG = logging.getLogger(__name__)
+
+# Constants
+BREAKER_THRESHOLD = 5  # Consecutive failures opening the circuit, 0 = disabled
+BREAKER_RESET = 30  # Seconds until an open circuit is probed
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half-open'
+
+
+# Failures of the connection to the remote, other exceptions are raised by the client
+# (e.g. values which can't be marshalled) and don't count
+TRANSPORT_ERRORS = (OSError, EOFError, xmlrpc.client.ProtocolError, http.client.HTTPException)
+
+
+class CircuitOpenError(xmlrpc.client.Error):
+    """A call has been rejected because the remote is considered to be unavailable."""
+
+
+class CircuitBreaker():
+    """
+    Fails calls to a remote fast after threshold consecutive failures (connection
+    errors, timeouts, HTTP errors). After reset seconds the next call first probes
+    the remote. If the probe succeeds, the circuit is closed again, otherwise it
+    stays open for another reset seconds. A probe which has not returned after
+    reset seconds is given up and the next call probes again. Faults do not count
+    as failures, the remote has answered after all, and neither do errors raised
+    by the client itself.
+    """
+
+    def __init__(self, probe, threshold=BREAKER_THRESHOLD, reset=BREAKER_RESET):
+        self._probe = probe
+        self.threshold = threshold
+        self.reset = reset
+        self._lock = threading.Lock()
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened = None
+        self.rejected = 0
+
+    def call(self, func, *args):
+        if not self.threshold:
+            return func(*args)
+        if self._admit():
+            LOG.info("CircuitBreaker.call: Probing remote")
+            if not self._run(self._probe):
+                raise CircuitOpenError("Circuit open, probe failed")
+            LOG.info("CircuitBreaker.call: Remote is available again")
+        return self._run(func, *args, raiseerror=True)
+
+    async def callAsync(self, func, *args, probe=None):
+        """call() for coroutine functions, probe is a coroutine function as well."""
+        if not self.threshold:
+            return await func(*args)
+        if self._admit():
+            LOG.info("CircuitBreaker.callAsync: Probing remote")
+            if not await self._runAsync(probe or self._probe):
+                raise CircuitOpenError("Circuit open, probe failed")
+            LOG.info("CircuitBreaker.callAsync: Remote is available again")
+        return await self._runAsync(func, *args, raiseerror=True)
+
+    def _admit(self):
+        """Raise CircuitOpenError if the circuit is open. Returns True if the remote has to be probed."""
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return False
+            now = time.monotonic()
+            if now - self.opened >= self.reset:
+                # Open for reset seconds or the last probe is hanging
+                self.state = STATE_HALF_OPEN
+                self.opened = now
+                return True
+            self.rejected += 1
+            raise CircuitOpenError("Circuit open after %i failures" % self.failures)
+
+    def _run(self, func, *args, raiseerror=False):
+        try:
+            result = func(*args)
+        except xmlrpc.client.Fault:
+            self._success()
+            if raiseerror:
+                raise
+            return True
+        except TRANSPORT_ERRORS as err:
+            self._failure(err)
+            if raiseerror:
+                raise
+            return False
+        self._success()
+        return result if raiseerror else True
+
+    async def _runAsync(self, func, *args, raiseerror=False):
+        try:
+            result = await func(*args)
+        except xmlrpc.client.Fault:
+            self._success()
+            if raiseerror:
+                raise
+            return True
+        except TRANSPORT_ERRORS as err:
+            self._failure(err)
+            if raiseerror:
+                raise
+            return False
+        self._success()
+        return result if raiseerror else True
+
+    def _success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = STATE_CLOSED
+            self.opened = None
+
+    def _failure(self, err):
+        with self._lock:
+            self.failures += 1
+            if self.state == STATE_HALF_OPEN or self.failures >= self.threshold:
+                if self.state == STATE_CLOSED:
+                    LOG.warning("CircuitBreaker: Opening circuit after %i failures: %s" % (self.failures, str(err)))
+                self.state = STATE_OPEN
+                self.opened = time.monotonic()
+
+    def status(self):
+        with self._lock:
+            return {'state': self.state,
+                    'failures': self.failures,
+                    'rejected': self.rejected,
+                    'retry': None if self.opened is None else
+                             max(0.0, self.opened + self.reset - time.monotonic())}
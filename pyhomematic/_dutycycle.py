@@ -0,0 +1,194 @@
+import threading
+import collections
+import xmlrpc.client
+import logging
+
+LOG = logging.getLogger(__name__)
+
+# Constants
+DUTY_CYCLE_INTERVAL = 30  # Seconds between polls of listBidcosInterfaces
+DUTY_CYCLE_DEFER = 80  # Percent from which bulk writes are deferred
+DUTY_CYCLE_REJECT = 95  # Percent from which bulk writes are rejected and interactive writes deferred
+DUTY_CYCLE_QUEUE = 200  # Deferred writes per priority
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+# Calls using radio airtime, system.multicall is scheduled if it contains any of them
+WRITE_METHODS = ('setValue', 'putParamset')
+FAULT_DUTY_CYCLE = -1  # faultCode of writes in a multicall rejected by the scheduler
+
+
+class DutyCycleError(xmlrpc.client.Error):
+    """A write has been rejected because the duty cycle of the remote is exhausted."""
+
+
+def _multicallCalls(params):
+    return params[0] if params and isinstance(params[0], (list, tuple)) else []
+
+
+def isWrite(methodname, params):
+    """True for calls using radio airtime. Multicalls only containing reads (e.g. getParamset batches) are not."""
+    if methodname in WRITE_METHODS:
+        return True
+    if methodname == 'system.multicall':
+        return any(isinstance(call, dict) and isWrite(call.get('methodName'), call.get('params') or ())
+                   for call in _multicallCalls(params))
+    return False
+
+
+def priority(methodname, params):
+    """setValue and putParamset of VALUES are interactive, everything else (configuration, batches) is bulk."""
+    if methodname == 'setValue':
+        return PRIORITY_INTERACTIVE
+    if methodname == 'putParamset' and len(params) > 1 and params[1] == 'VALUES':
+        return PRIORITY_INTERACTIVE
+    return PRIORITY_BULK
+
+
+class DutyCycleScheduler():
+    """
+    Schedules writes to a BidCos remote by the DUTY_CYCLE reported by listBidcosInterfaces:
+    - below defer percent all writes are sent,
+    - below reject percent interactive writes are sent, bulk writes are deferred,
+    - above that interactive writes are deferred and bulk writes are rejected with DutyCycleError.
+    Deferred writes return "" right away and are sent in order, interactive ones first,
+    as soon as the duty cycle allows it: by the next write or the next poll of the duty
+    cycle. Writes of a priority are deferred as well while older ones of the same
+    priority are waiting.
+    Reads in a system.multicall are never deferred: they are sent right away, while the
+    writes of the multicall are deferred ("" as their result) or rejected (a fault).
+    """
+
+    def __init__(self, send, poll, interval=DUTY_CYCLE_INTERVAL,
+                 defer=DUTY_CYCLE_DEFER, reject=DUTY_CYCLE_REJECT, maxsize=DUTY_CYCLE_QUEUE):
+        self._send = send
+        self._poll = poll
+        self.interval = interval
+        self.defer = defer
+        self.reject = reject
+        self.maxsize = maxsize
+        self.dutycycle = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._deferred = {prio: collections.deque() for prio in PRIORITIES}
+        self.counters = {'sent': 0, 'deferred': 0, 'rejected': 0}
+        self._running = True
+        self._thread = threading.Thread(name="DutyCycleScheduler",
+                                        target=self._run,
+                                        daemon=True)
+        self._thread.start()
+
+    def _allowed(self, prio):
+        """'send', 'defer' or 'reject' for a write of prio at the current duty cycle."""
+        if self.dutycycle is None or self.dutycycle < self.defer:
+            return 'send'
+        if self.dutycycle < self.reject:
+            return 'send' if prio == PRIORITY_INTERACTIVE else 'defer'
+        return 'defer' if prio == PRIORITY_INTERACTIVE else 'reject'
+
+    def call(self, methodname, params):
+        if not isWrite(methodname, params):
+            return self._send(methodname, params)
+        prio = priority(methodname, params)
+        if any(self._deferred.values()):
+            # Send the deferred writes first if the duty cycle has recovered since
+            self._drain()
+        calls = writes = None
+        with self._lock:
+            action = self._allowed(prio)
+            if action == 'send' and self._deferred[prio]:
+                action = 'defer'
+            if action == 'defer' and len(self._deferred[prio]) >= self.maxsize:
+                action = 'reject'
+            if action != 'send' and methodname == 'system.multicall':
+                calls = _multicallCalls(params)
+                writes = set(index for index, call in enumerate(calls)
+                             if isWrite(call.get('methodName'), call.get('params') or ()))
+                if len(writes) < len(calls):
+                    # Send the reads right away, defer or reject the writes
+                    methodname = 'system.multicall'
+                    params = ([call for index, call in enumerate(calls) if index not in writes], )
+                    writecalls = [calls[index] for index in sorted(writes)]
+                    if action == 'defer':
+                        LOG.debug("DutyCycleScheduler.call: Deferring %i writes of a multicall" % len(writecalls))
+                        self._deferred[prio].append(('system.multicall', (writecalls, )))
+                        self.counters['deferred'] += 1
+                        writeresult = [""]
+                    else:
+                        self.counters['rejected'] += 1
+                        writeresult = {'faultCode': FAULT_DUTY_CYCLE,
+                                       'faultString': "Duty cycle of %s%% exceeded, write rejected" % self.dutycycle}
+                    action = 'split'
+            if action == 'reject':
+                self.counters['rejected'] += 1
+                raise DutyCycleError("Duty cycle of %s%% exceeded, %s rejected" % (self.dutycycle, methodname))
+            if action == 'defer':
+                LOG.debug("DutyCycleScheduler.call: Deferring %s%s" % (methodname, str(params)))
+                self._deferred[prio].append((methodname, params))
+                self.counters['deferred'] += 1
+                if methodname == 'system.multicall':
+                    return [[""] for _ in _multicallCalls(params)]
+                return ""
+            if action == 'send':
+                self.counters['sent'] += 1
+        responses = self._send(methodname, params)
+        if action != 'split':
+            return responses
+        if not isinstance(responses, list) or len(responses) != len(params[0]):
+            return responses
+        responses = iter(responses)
+        return [writeresult if index in writes else next(responses) for index in range(len(calls))]
+
+    def update(self):
+        """Poll the duty cycle and send deferred writes it allows."""
+        try:
+            dutycycle = self._poll()
+        except Exception as err:
+            LOG.warning("DutyCycleScheduler.update: Failed to get duty cycle: %s" % str(err))
+            dutycycle = self.dutycycle
+        with self._lock:
+            self.dutycycle = dutycycle
+        self._drain()
+
+    def _drain(self):
+        """Send the deferred writes the last known duty cycle allows, interactive ones first."""
+        for prio in PRIORITIES:
+            while True:
+                with self._lock:
+                    if not self._deferred[prio] or self._allowed(prio) != 'send':
+                        break
+                    methodname, params = self._deferred[prio].popleft()
+                    self.counters['sent'] += 1
+                try:
+                    self._send(methodname, params)
+                except Exception as err:
+                    LOG.error("DutyCycleScheduler._drain: Deferred %s failed: %s" % (methodname, str(err)))
+
+    def _run(self):
+        while True:
+            self.update()
+            with self._lock:
+                self._wakeup.wait(self.interval)
+                if not self._running:
+                    return
+
+    def stop(self):
+        """Stop polling. Writes that are still deferred are discarded."""
+        with self._lock:
+            self._running = False
+            pending = sum(len(deferred) for deferred in self._deferred.values())
+            for deferred in self._deferred.values():
+                deferred.clear()
+            self.counters['rejected'] += pending
+            self._wakeup.notify_all()
+        if pending:
+            LOG.warning("DutyCycleScheduler.stop: Discarded %i deferred writes" % pending)
+
+    def statistics(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['dutycycle'] = self.dutycycle
+            stats['pending'] = sum(len(deferred) for deferred in self._deferred.values())
+        return stats
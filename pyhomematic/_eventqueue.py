@@ -0,0 +1,300 @@
+import threading
+import collections
+import logging
+
+LOG = logging.getLogger(__name__)
+
+# Constants
+EVENT_CONSUMERS = 1
+EVENT_BUFFER = 0  # 0 = unbounded
+
+# What to do with a new event when the buffer is full
+POLICY_BLOCK = 'block'              # Wait until a consumer has made room
+POLICY_DROP_OLDEST = 'drop-oldest'  # Discard the oldest pending event
+POLICY_DROP_NEWEST = 'drop-newest'  # Discard the new event
+POLICY_COALESCE = 'coalesce'        # Merge with a pending event for the same key, otherwise block
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_COALESCE)
+
+COUNTER_ENQUEUED = 'enqueued'
+COUNTER_DROPPED = 'dropped'
+COUNTER_COALESCED = 'coalesced'
+COUNTER_PENDING = 'pending'
+COUNTERS = (COUNTER_ENQUEUED, COUNTER_DROPPED, COUNTER_COALESCED, COUNTER_PENDING)
+
+
+class EventLane():
+    """
+    FIFO of events handled by a single consumer thread.
+    With coalescing enabled, only the latest value for each (address, value_key)
+    is kept while it is waiting to be handled. It keeps the position of the
+    first pending event for that key.
+    Counters are kept per interface_id.
+    """
+
+    def __init__(self, coalesce=False, maxsize=EVENT_BUFFER, policy=POLICY_BLOCK):
+        self.coalesce = coalesce
+        self.maxsize = maxsize
+        self.policy = policy
+        self.lock = threading.Lock()
+        self.notempty = threading.Condition(self.lock)
+        self.notfull = threading.Condition(self.lock)
+        self.alldone = threading.Condition(self.lock)
+        self.pending = collections.deque()
+        self.values = {}
+        self.counters = {}
+        self.unfinished = 0
+        self.running = False
+
+    def _count(self, interface_id, counter, delta=1):
+        try:
+            self.counters[interface_id][counter] += delta
+        except KeyError:
+            self.counters[interface_id] = dict.fromkeys(COUNTERS, 0)
+            self.counters[interface_id][counter] += delta
+
+    def _popleft(self):
+        if self.coalesce:
+            address, value_key = key = self.pending.popleft()
+            interface_id, value = self.values.pop(key)
+            return interface_id, address, value_key, value
+        return self.pending.popleft()
+
+    def put(self, interface_id, address, value_key, value):
+        """Add an event. Returns False if it has been merged into a pending event or dropped."""
+        key = (address, value_key)
+        with self.lock:
+            while True:
+                if self.coalesce and key in self.values:
+                    previous = self.values[key][0]
+                    self.values[key] = (interface_id, value)
+                    if previous != interface_id:
+                        self._count(previous, COUNTER_PENDING, -1)
+                        self._count(interface_id, COUNTER_PENDING)
+                    self._count(interface_id, COUNTER_COALESCED)
+                    return False
+                if not self.maxsize or len(self.pending) < self.maxsize:
+                    break
+                if self.policy == POLICY_DROP_NEWEST:
+                    self._count(interface_id, COUNTER_DROPPED)
+                    return False
+                if self.policy == POLICY_DROP_OLDEST:
+                    dropped = self._popleft()
+                    self.unfinished -= 1
+                    self._count(dropped[0], COUNTER_PENDING, -1)
+                    self._count(dropped[0], COUNTER_DROPPED)
+                    break
+                if not self.running:
+                    break
+                # POLICY_BLOCK and POLICY_COALESCE without a pending event to merge with
+                self.notfull.wait()
+            if self.coalesce:
+                self.values[key] = (interface_id, value)
+                self.pending.append(key)
+            else:
+                self.pending.append((interface_id, address, value_key, value))
+            self.unfinished += 1
+            self._count(interface_id, COUNTER_ENQUEUED)
+            self._count(interface_id, COUNTER_PENDING)
+            self.notempty.notify()
+            return True
+
+    def get(self):
+        """Wait for the next event. Returns None once the lane has been stopped and is empty."""
+        with self.lock:
+            while not self.pending:
+                if not self.running:
+                    return None
+                self.notempty.wait()
+            event = self._popleft()
+            self._count(event[0], COUNTER_PENDING, -1)
+            self.notfull.notify()
+            return event
+
+    def done(self):
+        with self.lock:
+            self.unfinished -= 1
+            if not self.unfinished:
+                self.alldone.notify_all()
+
+    def join(self, timeout=None):
+        with self.lock:
+            return self.alldone.wait_for(lambda: not self.unfinished, timeout)
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+            self.notempty.notify_all()
+            self.notfull.notify_all()
+
+    def __len__(self):
+        return len(self.pending)
+
+
+class EventQueue():
+    """
+    Decouples receiving events from handling them.
+    Events are acknowledged to the CCU / Homegear as soon as they are queued and handled
+    by consumer threads. Every address is assigned to one lane with its own consumer,
+    so events of the same address are handled in the order they have been received.
+    With maxsize > 0 at most maxsize events are buffered (split evenly across the lanes),
+    and policy decides what happens to events arriving while the buffer is full.
+    """
+
+    def __init__(self, consumers=EVENT_CONSUMERS, coalesce=False,
+                 maxsize=EVENT_BUFFER, policy=POLICY_BLOCK):
+        if policy not in POLICIES:
+            raise ValueError("Unknown event buffer policy: %s" % policy)
+        self.consumers = max(1, int(consumers))
+        self.coalesce = coalesce or policy == POLICY_COALESCE
+        self.maxsize = max(0, int(maxsize or 0))
+        self.policy = policy
+        self.handler = None
+        lanesize = -(-self.maxsize // self.consumers)
+        self._lanes = [EventLane(self.coalesce, lanesize, policy) for _ in range(self.consumers)]
+        self._threads = []
+
+    def start(self, handler):
+        """Start the consumer threads which pass the events to handler(interface_id, address, value_key, value)."""
+        if self._threads:
+            return
+        LOG.debug("EventQueue.start: Starting %i consumers" % self.consumers)
+        self.handler = handler
+        for i, lane in enumerate(self._lanes):
+            lane.running = True
+            consumer = threading.Thread(name="EventConsumer-%i" % i,
+                                        target=self._consume,
+                                        args=(lane, ),
+                                        daemon=True)
+            consumer.start()
+            self._threads.append(consumer)
+
+    def stop(self):
+        """Handle the remaining events, then stop the consumer threads."""
+        LOG.debug("EventQueue.stop: Stopping consumers")
+        for lane in self._lanes:
+            lane.stop()
+        for consumer in self._threads:
+            if consumer is not threading.current_thread():
+                consumer.join()
+        self._threads = []
+
+    def put(self, interface_id, address, value_key, value):
+        """Queue an event. Returns False if it has been coalesced with a pending one or dropped."""
+        return self._lanes[hash(address) % self.consumers].put(
+            interface_id, address, value_key, value)
+
+    def join(self, timeout=None):
+        """Wait until all queued events have been handled."""
+        return all(lane.join(timeout) for lane in self._lanes)
+
+    def qsize(self):
+        return sum(len(lane) for lane in self._lanes)
+
+    def statistics(self):
+        """Return the counters of all lanes summed up per remote."""
+        stats = {}
+        for lane in self._lanes:
+            with lane.lock:
+                counters = [(interface_id, dict(values)) for interface_id, values in lane.counters.items()]
+            for interface_id, values in counters:
+                remote = interface_id.split('-')[-1]
+                total = stats.setdefault(remote, dict.fromkeys(COUNTERS, 0))
+                for counter, value in values.items():
+                    total[counter] += value
+        return stats
+
+    def _consume(self, lane):
+        while True:
+            event = lane.get()
+            if event is None:
+                return
+            try:
+                self.handler(*event)
+            except Exception as err:
+                LOG.error("EventQueue._consume: Exception handling event %s: %s" % (str(event[1:3]), str(err)))
+            finally:
+                lane.done()
+
+
+class EventSequencer():
+    """
+    Keeps events of requests handled by concurrent workers in the order the requests
+    have been received, per address. Every request draws a ticket on arrival. Before its
+    events are dispatched, a request reserves a slot in the stripe of each event's address,
+    which waits until all requests with lower tickets have reserved their slots or have been
+    released. An event runs once the earlier slots of its stripe are done, so events of
+    different stripes still run in parallel, and events of one stripe never concurrently.
+    """
+
+    def __init__(self, stripes=64):
+        self.stripes = stripes
+        self._lock = threading.Lock()
+        self._admitted = threading.Condition(self._lock)
+        self._stripeturn = [threading.Condition(self._lock) for _ in range(stripes)]
+        self._nextticket = 0
+        self._admit = 0  # Lowest ticket that has neither reserved nor been released
+        self._finished = set()  # Done tickets above _admit
+        self._reserved = [0] * stripes  # Next slot per stripe
+        self._served = [0] * stripes  # Slot allowed to run per stripe
+
+    def ticket(self):
+        """Draw the ticket of a new request."""
+        with self._lock:
+            ticket = self._nextticket
+            self._nextticket += 1
+            return ticket
+
+    def _done(self, ticket):
+        if ticket < self._admit or ticket in self._finished:
+            return
+        self._finished.add(ticket)
+        while self._admit in self._finished:
+            self._finished.discard(self._admit)
+            self._admit += 1
+        self._admitted.notify_all()
+
+    def release(self, ticket):
+        """The request of ticket has no (further) events, don't wait for it."""
+        if ticket is None:
+            return
+        with self._lock:
+            self._done(ticket)
+
+    def reserve(self, addresses, ticket=None):
+        """
+        Reserve a slot for an event of each address, in order. Waits for the requests
+        with lower tickets, unless ticket is None. Every slot must be passed to run().
+        """
+        with self._lock:
+            if ticket is not None:
+                self._admitted.wait_for(lambda: self._admit >= ticket)
+            slots = []
+            for address in addresses:
+                stripe = hash(address) % self.stripes
+                slots.append((stripe, self._reserved[stripe]))
+                self._reserved[stripe] += 1
+            if ticket is not None:
+                self._done(ticket)
+            return slots
+
+    def run(self, slot, func, *args):
+        """Call func(*args) once the earlier slots of the stripe are done."""
+        stripe, number = slot
+        turn = self._stripeturn[stripe]
+        with self._lock:
+            turn.wait_for(lambda: self._served[stripe] == number)
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._served[stripe] += 1
+                turn.notify_all()
+
+    def skip(self, slots):
+        """Give up reserved slots which will not be run."""
+        for slot in slots:
+            self.run(slot, _nothing)
+
+
+def _nothing():
+    pass
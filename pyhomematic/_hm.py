@@ -1,4 +1,9 @@
 import os
+import re
+import time
+import sys
+import functools
+import asyncio
 import threading
 import json
 import ssl
@@ -7,13 +12,25 @@ import urllib.parse
 import xml.etree.ElementTree as ET
 from xmlrpc.server import SimpleXMLRPCServer
 from xmlrpc.server import SimpleXMLRPCRequestHandler
+from xmlrpc.server import SimpleXMLRPCDispatcher
 import xmlrpc.client
 import socket
-#from socketserver import ThreadingMixIn
+import select
+import queue
+import collections
+import concurrent.futures
 import logging
 
 from pyhomematic import devicetypes
-from pyhomematic.devicetypes.generic import HMChannel
+from pyhomematic.devicetypes.generic import HMChannel, PARAMSET_VALUES, SOURCE_PARAMSET, READ_POLICIES
+from pyhomematic._subscriptions import SubscriptionRegistry
+from pyhomematic import _binrpc
+from pyhomematic import _aioclient
+from pyhomematic._batch import Batch, BATCH_SIZE
+from pyhomematic._writecoalescer import WriteCoalescer, DEBOUNCE
+from pyhomematic._dutycycle import DutyCycleScheduler, isWrite
+from pyhomematic._circuitbreaker import CircuitBreaker, BREAKER_THRESHOLD, BREAKER_RESET
+from pyhomematic._eventqueue import EventQueue, EventSequencer, EVENT_CONSUMERS, EVENT_BUFFER, POLICY_BLOCK
 
 LOG = logging.getLogger(__name__)
 
@@ -40,6 +57,22 @@ JSONRPC_URL = '/api/homematic.cgi'
 BACKEND_UNKNOWN = 0
 BACKEND_CCU = 1
 BACKEND_HOMEGEAR = 2
+WORKERS = 0  # 0 = handle callbacks in the server thread
+WORKER_QUEUE_SIZE = 64
+EVENT_STRIPES = 64  # Addresses are hashed onto this many queues for ordering events
+KEEPALIVE_TIMEOUT = 30  # Seconds an idle persistent connection is kept open
+KEEPALIVE_MAX = 1000  # Requests per persistent connection
+IDLE_POLL_INTERVAL = 0.5  # Seconds between checks if an idle persistent connection should be closed
+CONNECTIONS = 1  # Concurrent requests per remote
+CONNECT_TIMEOUT = 10  # Seconds, None = no timeout
+READ_TIMEOUT = None  # Seconds to wait for a response, None = no timeout
+# Concurrent identical calls of these methods share one request
+SINGLEFLIGHT_METHODS = ('getValue', 'getParamset')
+PROTOCOL_XMLRPC = 'xmlrpc'
+PROTOCOL_BINRPC = 'binrpc'
+# "warmup" of a remote: True, False or WARMUP_AUTO = if the remote supports system.multicall
+WARMUP_AUTO = 'auto'
+WARMUP = WARMUP_AUTO
 WORKING = False
 
 
@@ -83,6 +116,16 @@ def build_api_url(host=REMOTES['default']['ip'],
     return "%s://%s%s:%i%s" % (scheme, credentials, host, port, path)
 
 
+def multicall_supported(proxy):
+    """False only if the remote is known not to support system.multicall"""
+    return proxy._capabilities is None or proxy._capabilities.supports('system.multicall') is not False
+
+
+def callback_protocol(host):
+    """Protocol the remote should send events with. Defaults to the protocol used to talk to it."""
+    return host.get('callbackprotocol', host.get('protocol', PROTOCOL_XMLRPC))
+
+
 # Object holding the methods the XML-RPC server should provide.
 class RPCFunctions():
 
@@ -93,7 +136,9 @@ class RPCFunctions():
                  remotes={},
                  eventcallback=False,
                  systemcallback=False,
-                 resolveparamsets=False):
+                 resolveparamsets=False,
+                 eventqueue=None,
+                 subscriptions=None):
         global devices, devices_all, devices_raw, devices_raw_dict, paramsets
         LOG.debug("RPCFunctions.__init__")
         self.devicefile = None
@@ -116,6 +161,24 @@ class RPCFunctions():
         self.remotes = remotes
         self._paramsets = paramsets
 
+        # Optional queue to acknowledge events right away and handle them
+        # on consumer threads.
+        self._eventqueue = eventqueue
+
+        # Routing table for events: interface_id -> (remote, address table of
+        # the remote), and the upper-cased (interned) spelling of every value_key.
+        self._eventroutes = {}
+        self._eventkeys = {}
+
+        # Indexed subscriptions by remote / address / channel / parameter
+        self._subscriptions = subscriptions
+
+        # Statistics of the last warm-up of the value caches per remote
+        self.warmups = {}
+        # Channels created before the capabilities of their remote were probed,
+        # warmed up by _warmUpProbed() with WARMUP_AUTO
+        self._pendingwarmups = {}
+
         # The methods need to know about the proxyies to be able to pass it on
         # to the device-objects
         self._proxies = proxies
@@ -139,6 +202,7 @@ class RPCFunctions():
             self._devices_raw[remote] = []
             self._devices_raw_dict[remote] = {}
             self._paramsets[remote] = {}
+            self._eventroutes[interface_id] = (remote, self.devices_all[remote])
 
             # If there are stored devices, we load them instead of getting them
             # from the server.
@@ -180,21 +244,24 @@ class RPCFunctions():
         remote = interface_id.split('-')[-1]
         LOG.debug(
             "RPCFunctions.createDeviceObjects: iterating interface_id = %s", remote)
+        readpolicy = self.remotes[remote].get('readpolicy')
         # First create parent object
         for dev in self._devices_raw[remote]:
             if not dev['PARENT']:
                 if dev['ADDRESS'] not in self.devices_all[remote]:
                     try:
                         if dev['TYPE'] in devicetypes.SUPPORTED:
-                            deviceObject = devicetypes.SUPPORTED[dev['TYPE']](
+                            deviceObject = devicetypes.SUPPORTED[dev['TYPE']].fromDescription(
                                 dev, self._proxies[interface_id], self.resolveparamsets)
                             LOG.debug("RPCFunctions.createDeviceObjects: created %s as SUPPORTED device for %s" % (
                                 dev['ADDRESS'], dev['TYPE']))
                         else:
-                            deviceObject = devicetypes.UNSUPPORTED(
+                            deviceObject = devicetypes.UNSUPPORTED.fromDescription(
                                 dev, self._proxies[interface_id], self.resolveparamsets)
                             LOG.warning("RPCFunctions.createDeviceObjects: Created %s as UNSUPPORTED device for %s. Please switch to https://github.com/danielperna84/custom_homematic to use this device in Home Assistant." % (
                                 dev['ADDRESS'], dev['TYPE']))
+                        if readpolicy is not None:
+                            deviceObject.setReadPolicy(readpolicy, self.remotes[remote].get('readmaxage'))
                         LOG.debug(
                             "RPCFunctions.createDeviceObjects: adding to self.devices_all")
                         self.devices_all[remote][dev['ADDRESS']] = deviceObject
@@ -205,6 +272,7 @@ class RPCFunctions():
                         LOG.critical(
                             "RPCFunctions.createDeviceObjects: Parent: %s", str(err))
         # Then create all children for parent
+        created = []
         for dev in self._devices_raw[remote]:
             if dev['PARENT']:
                 try:
@@ -214,16 +282,79 @@ class RPCFunctions():
                         self.devices_all[remote][dev['ADDRESS']] = deviceObject
                         self.devices[remote][dev['PARENT']].CHANNELS[
                             dev['INDEX']] = deviceObject
+                        created.append(deviceObject)
                 except Exception as err:
                     LOG.critical(
                         "RPCFunctions.createDeviceObjects: Child: %s", str(err))
         if self.devices_all[remote] and self.remotes[remote].get('resolvenames', False):
             self.addDeviceNames(remote)
+        warmup = self.remotes[remote].get('warmup', WARMUP)
+        if warmup == WARMUP_AUTO:
+            capabilities = getattr(self._proxies.get(interface_id), '_capabilities', None)
+            if capabilities is None and created:
+                # Devices restored from the devicefile are created before the probe
+                self._pendingwarmups.setdefault(interface_id, []).extend(created)
+            warmup = capabilities is not None and capabilities.multicall
+        if created and warmup:
+            self._startWarmUp(interface_id, created)
         WORKING = False
         if self.systemcallback:
             self.systemcallback('createDeviceObjects')
         return True
 
+    def _startWarmUp(self, interface_id, channels):
+        # Not done in the calling thread to answer newDevices() of the CCU / Homegear right away
+        threading.Thread(name="WarmUp-%s" % interface_id.split('-')[-1],
+                         target=self._warmUp,
+                         args=(interface_id, channels),
+                         daemon=True).start()
+
+    def _warmUpProbed(self, interface_id):
+        """Warm up the channels created before the capabilities of the remote were probed."""
+        channels = self._pendingwarmups.pop(interface_id, None)
+        capabilities = getattr(self._proxies.get(interface_id), '_capabilities', None)
+        if channels and capabilities is not None and capabilities.multicall:
+            self._startWarmUp(interface_id, channels)
+
+    def _warmUp(self, interface_id, channels=None, chunksize=BATCH_SIZE):
+        """
+        Fill the value caches of channels (default: all channels of the remote)
+        with their VALUES paramsets, fetched in chunks with system.multicall
+        (one by one if the remote does not support it).
+        Values already received via events are kept.
+        """
+        remote = interface_id.split('-')[-1]
+        if channels is None:
+            channels = [device for device in self.devices_all[remote].values()
+                        if isinstance(device, HMChannel)]
+        channels = [channel for channel in channels
+                    if PARAMSET_VALUES in (channel._PARAMSETS or ())]
+        start = time.monotonic()
+        proxy = self._proxies[interface_id]
+        batch = Batch(proxy, chunksize, multicall=multicall_supported(proxy))
+        for channel in channels:
+            batch.call('getParamset', channel.ADDRESS, PARAMSET_VALUES)
+        batch.execute()
+        failed = 0
+        for channel, result in zip(channels, batch.results):
+            if not isinstance(result, dict):
+                failed += 1
+                continue
+            values = channel._VALUES
+            for key, value in result.items():
+                if values.get(key) is None:
+                    values.set(key, value, SOURCE_PARAMSET)
+        stats = {'channels': len(channels),
+                 'failed': failed,
+                 'calls': batch.requests,
+                 'duration': time.monotonic() - start}
+        self.warmups[remote] = stats
+        LOG.info("RPCFunctions._warmUp: Fetched values of %i channels of %s with %i calls in %.2fs (%i failed)",
+                 len(channels), remote, stats['calls'], stats['duration'], failed)
+        if self.systemcallback:
+            self.systemcallback('warmUp', interface_id, stats)
+        return stats
+
     def error(self, interface_id, errorcode, msg):
         """When some error occurs the CCU / Homegear will send it's error message here"""
         LOG.debug("RPCFunctions.error: interface_id = %s, errorcode = %i, message = %s",
@@ -264,13 +395,29 @@ class RPCFunctions():
 
     def event(self, interface_id, address, value_key, value):
         """If a device emits some sort event, we will handle it here."""
-        LOG.debug("RPCFunctions.event: interface_id = %s, address = %s, value_key = %s, value = %s" % (
-            interface_id, address, value_key.upper(), str(value)))
-        self.devices_all[interface_id.split(
-            '-')[-1]][address].event(interface_id, value_key.upper(), value)
+        if self._eventqueue is not None:
+            self._eventqueue.put(interface_id, address, value_key, value)
+            return True
+        return self._event(interface_id, address, value_key, value)
+
+    def _event(self, interface_id, address, value_key, value):
+        """Dispatch an event to the device object and the eventcallback."""
+        key = self._eventkeys.get(value_key)
+        if key is None:
+            key = self._eventkeys[value_key] = sys.intern(value_key.upper())
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug("RPCFunctions.event: interface_id = %s, address = %s, value_key = %s, value = %s",
+                      interface_id, address, key, value)
+        route = self._eventroutes.get(interface_id)
+        if route is None:
+            remote = interface_id.split('-')[-1]
+            route = self._eventroutes[interface_id] = (remote, self.devices_all[remote])
+        route[1][address].event(interface_id, key, value)
         if self.eventcallback:
             self.eventcallback(interface_id=interface_id, address=address,
-                               value_key=value_key.upper(), value=value)
+                               value_key=key, value=value)
+        if self._subscriptions:
+            self._subscriptions.dispatch(route[0], interface_id, address, key, value)
         return True
 
     def listDevices(self, interface_id):
@@ -502,9 +649,175 @@ class RPCFunctions():
                         self.devices_all[remote][device.ADDRESS].NAME = name
 
 
+class ConnectionPool():
+    """
+    Fixed set of connections to a remote. If all of them are in use, callers
+    get the next free connection in the order they have asked for one.
+    """
+
+    def __init__(self, connections):
+        self._lock = threading.Lock()
+        self._idle = list(connections)
+        self._waiters = collections.deque()
+        self.size = len(self._idle)
+
+    def acquire(self):
+        """Wait for a free connection."""
+        with self._lock:
+            # Released connections are handed to waiters directly, so there are
+            # only idle connections if nobody is waiting.
+            if self._idle:
+                return self._idle.pop()
+            waiter = [threading.Event(), None]
+            self._waiters.append(waiter)
+        waiter[0].wait()
+        return waiter[1]
+
+    def release(self, connection):
+        """Return a connection to the pool or pass it to the longest waiting caller."""
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter[1] = connection
+                waiter[0].set()
+            else:
+                self._idle.append(connection)
+
+    def waiting(self):
+        return len(self._waiters)
+
+
+class Capabilities():
+    """
+    What a remote supports, probed once with system.listMethods and getVersion.
+    If system.listMethods fails, the methods are unknown and supports() returns None.
+    """
+
+    def __init__(self, methods=None, version=None):
+        self.methods = frozenset(methods) if methods else None
+        self.version = version
+
+    @classmethod
+    def probe(cls, proxy):
+        methods = version = None
+        try:
+            methods = proxy.system.listMethods()
+        except Exception as err:
+            LOG.debug("Capabilities.probe: system.listMethods failed: %s" % str(err))
+        try:
+            version = proxy.getVersion()
+        except Exception as err:
+            LOG.debug("Capabilities.probe: getVersion failed: %s" % str(err))
+        return cls(methods, version)
+
+    def supports(self, methodname):
+        if self.methods is None:
+            return None
+        return methodname in self.methods
+
+    @property
+    def backend(self):
+        if self.version and 'Homegear' in str(self.version):
+            return BACKEND_HOMEGEAR
+        if self.version or self.methods:
+            return BACKEND_CCU
+        return BACKEND_UNKNOWN
+
+    @property
+    def multicall(self):
+        return bool(self.supports('system.multicall'))
+
+    @property
+    def binrpc(self):
+        """Homegear answers BIN-RPC on the XML-RPC port as well"""
+        return self.backend == BACKEND_HOMEGEAR
+
+    def asDict(self):
+        return {'backend': self.backend,
+                'version': self.version,
+                'methods': sorted(self.methods) if self.methods is not None else None,
+                'multicall': self.multicall,
+                'binrpc': self.binrpc}
+
+
+class SingleFlight():
+    """
+    Runs a function only once for concurrent calls with the same key.
+    Callers arriving while it is running wait for it and get the same
+    result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def call(self, key, func, *args):
+        with self._lock:
+            flight = self._calls.get(key)
+            leader = flight is None
+            if leader:
+                # [done, result, exception]
+                flight = self._calls[key] = [threading.Event(), None, None]
+            else:
+                self.shared += 1
+        if not leader:
+            flight[0].wait()
+            if flight[2] is not None:
+                raise flight[2]
+            return flight[1]
+        try:
+            flight[1] = func(*args)
+            return flight[1]
+        except Exception as err:
+            flight[2] = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            flight[0].set()
+
+
+class TimeoutTransportMixin():
+    """Mix-in for xmlrpc.client transports to limit the time to connect and to wait for a response."""
+    connecttimeout = CONNECT_TIMEOUT
+    readtimeout = READ_TIMEOUT
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.connecttimeout
+        return connection
+
+    def send_request(self, host, handler, request_body, debug):
+        connection = super().send_request(host, handler, request_body, debug)
+        if connection.sock is not None:
+            connection.sock.settimeout(self.readtimeout)
+        return connection
+
+
+class TimeoutTransport(TimeoutTransportMixin, xmlrpc.client.Transport):
+    """HTTP transport with timeouts"""
+
+
+class SafeTimeoutTransport(TimeoutTransportMixin, xmlrpc.client.SafeTransport):
+    """HTTPS transport with timeouts"""
+
+
 class LockingServerProxy(xmlrpc.client.ServerProxy):
     """
-    ServerProxy implementation with lock when request is executing
+    ServerProxy implementation with a pool of persistent connections. Every
+    request uses a connection of its own, so up to connections requests run
+    in parallel. With protocol = PROTOCOL_BINRPC requests are sent via
+    BIN-RPC instead of XML-RPC.
+    Concurrent identical getValue / getParamset calls share one request.
+    With debounce > 0 only the latest value of rapid setValue calls for the
+    same datapoint is sent, at most one per debounce seconds.
+    With dutycycle = True writes are scheduled by the duty cycle of the remote.
+    After breakerthreshold consecutive connection errors or timeouts calls fail
+    fast with CircuitOpenError, until a ping after breakerreset seconds succeeds.
+    The same calls can be awaited on the asyncio client _aio, which keeps up to
+    asyncconnections connections open. The circuit breaker is shared, debounced
+    and scheduled writes are handed to the blocking path in the default executor.
     """
 
     def __init__(self, *args, **kwargs):
@@ -515,15 +828,57 @@ class LockingServerProxy(xmlrpc.client.ServerProxy):
         self._skipinit = kwargs.pop("skipinit", False)
         self._callbackip = kwargs.pop("callbackip", None)
         self._callbackport = kwargs.pop("callbackport", None)
+        self._callbackprotocol = kwargs.pop("callbackprotocol", PROTOCOL_XMLRPC)
         self._ssl = kwargs.pop("ssl", False)
         self._verify_ssl = kwargs.pop("verify_ssl", True)
-        self.lock = threading.Lock()
+        self._protocol = kwargs.pop("protocol", PROTOCOL_XMLRPC)
+        connections = max(1, int(kwargs.pop("connections", CONNECTIONS) or 1))
+        self._singleflight = SingleFlight()
+        debounce = kwargs.pop("debounce", DEBOUNCE)
+        dutycycle = kwargs.pop("dutycycle", False)
+        connecttimeout = kwargs.pop("connecttimeout", CONNECT_TIMEOUT)
+        readtimeout = kwargs.pop("readtimeout", READ_TIMEOUT)
+        asyncconnections = kwargs.pop("asyncconnections", _aioclient.CONNECTIONS)
+        self._breaker = CircuitBreaker(self.__probe,
+                                       kwargs.pop("breakerthreshold", BREAKER_THRESHOLD),
+                                       kwargs.pop("breakerreset", BREAKER_RESET))
+        self._coalescer = WriteCoalescer(self.__write, debounce) if debounce else None
+        self._scheduler = None
+        self._capabilities = None
         if self._ssl and not self._verify_ssl and self._verify_ssl is not None:
             kwargs['context'] = ssl._create_unverified_context()
-        xmlrpc.client.ServerProxy.__init__(self, encoding="ISO-8859-1", *args, **kwargs)
+        kwargs['encoding'] = "ISO-8859-1"
+        xmlrpc.client.ServerProxy.__init__(self, *args, **kwargs)
         urlcomponents = urllib.parse.urlparse(args[0])
         self._remoteip = urlcomponents.hostname
         self._remoteport = urlcomponents.port
+        if self._protocol == PROTOCOL_BINRPC:
+            if self._ssl or urlcomponents.password:
+                raise ValueError("BIN-RPC does not support ssl or authentication")
+            binrpc_url = "%s://%s:%i" % (_binrpc.SCHEME, self._remoteip, self._remoteport)
+            asyncurl, context = binrpc_url, None
+            self._pool = ConnectionPool(
+                _binrpc.ServerProxy(binrpc_url,
+                                    connecttimeout=connecttimeout,
+                                    readtimeout=readtimeout).request
+                for _ in range(connections))
+        else:
+            # Each ServerProxy has a transport of its own keeping the HTTP connection open
+            asyncurl, context = args[0], kwargs.pop('context', None)
+            self._pool = ConnectionPool(
+                xmlrpc.client.ServerProxy(*args, transport=self.__transport(
+                    urlcomponents.scheme, connecttimeout, readtimeout, context), **kwargs)._ServerProxy__request
+                for _ in range(connections))
+        self._asyncclient = _aioclient.AsyncServerProxy(
+            asyncurl,
+            connections=asyncconnections,
+            connecttimeout=connecttimeout,
+            readtimeout=readtimeout,
+            context=context,
+            encoding=kwargs['encoding'])
+        self._aio = _aioclient.AsyncProxy(self.__requestAsync)
+        if dutycycle:
+            self._scheduler = DutyCycleScheduler(self.__send, self.__dutyCycle)
         LOG.debug("LockingServerProxy.__init__: Getting local ip")
         tmpsocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         tmpsocket.connect((self._remoteip, self._remoteport))
@@ -532,15 +887,72 @@ class LockingServerProxy(xmlrpc.client.ServerProxy):
         LOG.debug("LockingServerProxy.__init__: Got local ip %s" %
                   self._localip)
 
-    def __request(self, *args, **kwargs):
+    def __request(self, methodname, params):
         """
         Call method on server side
         """
+        if methodname == 'setValue' and self._coalescer is not None and len(params) == 3:
+            return self._coalescer.setValue(*params)
+        if methodname in SINGLEFLIGHT_METHODS:
+            key = (methodname, params)
+            try:
+                hash(key)
+            except TypeError:
+                return self.__send(methodname, params)
+            return self._singleflight.call(key, self.__send, methodname, params)
+        if isWrite(methodname, params):
+            return self.__write(methodname, params)
+        return self.__send(methodname, params)
+
+    async def __requestAsync(self, methodname, params):
+        """
+        Await a call on the asyncio client
+        """
+        if (methodname == 'setValue' and self._coalescer is not None) or \
+                (self._scheduler is not None and isWrite(methodname, params)):
+            # Debouncing and duty cycle scheduling are shared with the blocking calls
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.__request, methodname, params)
+        return await self._breaker.callAsync(self._asyncclient.request, methodname, params,
+                                             probe=self.__probeAsync)
+
+    def __write(self, methodname, params):
+        if self._scheduler is not None:
+            return self._scheduler.call(methodname, params)
+        return self.__send(methodname, params)
+
+    def __dutyCycle(self):
+        """Highest duty cycle of the connected BidCos interfaces in percent"""
+        interfaces = self.__send('listBidcosInterfaces', ())
+        return max((interface.get('DUTY_CYCLE', 0) for interface in interfaces
+                    if interface.get('CONNECTED', True)), default=None)
+
+    def __send(self, methodname, params):
+        return self._breaker.call(self.__call, methodname, params)
+
+    def __call(self, methodname, params):
+        request = self._pool.acquire()
+        try:
+            return request(methodname, params)
+        finally:
+            self._pool.release(request)
+
+    def __probe(self):
+        """Check if the remote is available again"""
+        return self.__call('ping', (self._remote or INTERFACE_ID, ))
 
-        with self.lock:
-            parent = xmlrpc.client.ServerProxy
-            # pylint: disable=E1101
-            return parent._ServerProxy__request(self, *args, **kwargs)
+    async def __probeAsync(self):
+        return await self._asyncclient.request('ping', (self._remote or INTERFACE_ID, ))
+
+    @staticmethod
+    def __transport(scheme, connecttimeout, readtimeout, context):
+        if scheme == 'https':
+            transport = SafeTimeoutTransport(context=context)
+        else:
+            transport = TimeoutTransport()
+        transport.connecttimeout = connecttimeout
+        transport.readtimeout = readtimeout
+        return transport
 
     def __getattr__(self, *args, **kwargs):
         """
@@ -548,17 +960,395 @@ class LockingServerProxy(xmlrpc.client.ServerProxy):
         """
         return xmlrpc.client._Method(self.__request, *args, **kwargs)
 
+# Fast path for the requests making up almost all inbound traffic: event()
+# and system.multicall() bundles of event(). The patterns only accept the
+# plain form emitted by the CCU / Homegear. Whenever a request does not match
+# completely it is handed to the generic dispatcher instead.
+_XML_DECLARATION = re.compile(rb'\s*<\?xml([^>]*)\?>\s*')
+_XML_ENCODING = re.compile(rb'encoding=["\']([A-Za-z0-9._-]+)["\']')
+_STRING_VALUE = rb'<value>(?:<string>([^<&]*)</string>|([^<&]*))</value>\s*'
+_ANY_VALUE = rb'<value>(?:<(boolean|i4|int|double|string)>([^<&]*)</(?:boolean|i4|int|double|string)>|([^<&]*))</value>\s*'
+_EVENT_CALL = re.compile(
+    rb'<methodCall>\s*<methodName>event</methodName>\s*<params>\s*' +
+    3 * (rb'<param>\s*' + _STRING_VALUE + rb'</param>\s*') +
+    rb'<param>\s*' + _ANY_VALUE + rb'</param>\s*</params>\s*</methodCall>\s*$')
+_MULTICALL_HEAD = re.compile(
+    rb'<methodCall>\s*<methodName>system\.multicall</methodName>\s*<params>\s*'
+    rb'<param>\s*<value>\s*<array>\s*<data>\s*')
+_MULTICALL_EVENT = re.compile(
+    rb'<value>\s*<struct>\s*'
+    rb'<member>\s*<name>methodName</name>\s*<value>(?:<string>event</string>|event)</value>\s*</member>\s*'
+    rb'<member>\s*<name>params</name>\s*<value>\s*<array>\s*<data>\s*' +
+    3 * _STRING_VALUE + _ANY_VALUE +
+    rb'</data>\s*</array>\s*</value>\s*</member>\s*</struct>\s*</value>\s*')
+_MULTICALL_TAIL = re.compile(
+    rb'</data>\s*</array>\s*</value>\s*</param>\s*</params>\s*</methodCall>\s*$')
+
+
+def _decodeEventValue(encoding, valuetype, typed, bare):
+    if valuetype is None:
+        return bare.decode(encoding)
+    if valuetype == b'boolean':
+        if typed == b'1':
+            return True
+        if typed == b'0':
+            return False
+        raise ValueError("bad boolean value")
+    if valuetype == b'double':
+        return float(typed)
+    if valuetype == b'string':
+        return typed.decode(encoding)
+    return int(typed)
+
+
+def _decodeEventMatch(encoding, match, offset=0):
+    groups = match.groups()[offset:]
+    return ((groups[0] if groups[0] is not None else groups[1]).decode(encoding),
+            (groups[2] if groups[2] is not None else groups[3]).decode(encoding),
+            (groups[4] if groups[4] is not None else groups[5]).decode(encoding),
+            _decodeEventValue(encoding, groups[6], groups[7], groups[8]))
+
+
+def decodeEvents(data):
+    """
+    Decode an event() or system.multicall() of event() request body.
+    Returns a tuple (multicall, events) with events being a list of
+    (interface_id, address, value_key, value) tuples, or None if the
+    request has any other shape and needs the generic dispatcher.
+    """
+    if b'\r' in data:
+        return None
+    declaration = _XML_DECLARATION.match(data)
+    pos = 0
+    encoding = 'utf-8'
+    if declaration:
+        pos = declaration.end()
+        declared = _XML_ENCODING.search(declaration.group(1))
+        if declared:
+            encoding = declared.group(1).decode('ascii').lower()
+    try:
+        match = _EVENT_CALL.match(data, pos)
+        if match:
+            return False, [_decodeEventMatch(encoding, match)]
+        match = _MULTICALL_HEAD.match(data, pos)
+        if not match:
+            return None
+        pos = match.end()
+        events = []
+        while True:
+            match = _MULTICALL_EVENT.match(data, pos)
+            if not match:
+                break
+            events.append(_decodeEventMatch(encoding, match))
+            pos = match.end()
+        if not _MULTICALL_TAIL.match(data, pos):
+            return None
+        return True, events
+    except (ValueError, LookupError):
+        return None
+
+
+@functools.lru_cache(maxsize=256)
+def _multicallSuccess(count, encoding):
+    """Marshalled response to a multicall of count successful events."""
+    return xmlrpc.client.dumps(([[True]] * count,), methodresponse=1,
+                               encoding=encoding).encode(encoding, 'xmlcharrefreplace')
+
+
+class EventFastPathMixin():
+    """
+    Mix-in for SimpleXMLRPCDispatcher subclasses to dispatch event() and
+    system.multicall() of event() directly into the registered instance
+    without the generic unmarshalling and method lookup.
+    """
+    fastevents = True
+
+    def _marshaled_dispatch(self, data, dispatch_method=None, path=None):
+        decoded = None
+        if self.fastevents and dispatch_method is None and self.instance is not None:
+            decoded = decodeEvents(data)
+        if decoded is None:
+            return super()._marshaled_dispatch(data, dispatch_method, path)
+        multicall, events = decoded
+        encoding = self.encoding or 'utf-8'
+        results = self._dispatchEvents(events)
+        if not multicall:
+            if isinstance(results[0], BaseException):
+                response = xmlrpc.client.dumps(xmlrpc.client.Fault(1, "%s:%s" % (type(results[0]), results[0])),
+                                               allow_none=self.allow_none, encoding=encoding)
+            else:
+                response = xmlrpc.client.dumps((results[0],), methodresponse=1,
+                                               allow_none=self.allow_none, encoding=encoding)
+            return response.encode(encoding, 'xmlcharrefreplace')
+        if all(result is True for result in results):
+            return _multicallSuccess(len(results), encoding)
+        results = [{'faultCode': 1, 'faultString': "%s:%s" % (type(result), result)}
+                   if isinstance(result, BaseException) else [result] for result in results]
+        response = xmlrpc.client.dumps((results,), methodresponse=1,
+                                       allow_none=self.allow_none, encoding=encoding)
+        return response.encode(encoding, 'xmlcharrefreplace')
+
+    def _dispatchEvents(self, events):
+        """Call event(*args) of the instance for all events. Returns the results, the exception for failed ones."""
+        event = self.instance.event
+        results = []
+        for args in events:
+            try:
+                results.append(event(*args))
+            except BaseException as exc:
+                results.append(exc)
+        return results
+
+
+class XMLRPCServer(EventFastPathMixin, SimpleXMLRPCServer):
+    """
+    XML-RPC server with the event fast path. keepalivetimeout and keepalivemax
+    limit persistent connections, see KeepAliveRequestHandler.
+    """
+
+    def __init__(self, addr, keepalivetimeout=KEEPALIVE_TIMEOUT, keepalivemax=KEEPALIVE_MAX, **kwargs):
+        self.keepalivetimeout = keepalivetimeout
+        self.keepalivemax = keepalivemax
+        super().__init__(addr, **kwargs)
+
+
+class XMLRPCDispatcher(EventFastPathMixin, SimpleXMLRPCDispatcher):
+    """XML-RPC dispatcher with the event fast path, e.g. for non-socketserver listeners."""
+
+
 # Restrict to particular paths.
 
 
 class RequestHandler(SimpleXMLRPCRequestHandler):
-    """We handle requests to / and /RPC2"""
+    """
+    We handle requests to / and /RPC2.
+    Connections starting with a BIN-RPC frame are served as BIN-RPC on the same port.
+    """
     rpc_paths = ('/', '/RPC2',)
 
+    def handle(self):
+        try:
+            magic = self.request.recv(len(_binrpc.MAGIC), socket.MSG_PEEK | socket.MSG_WAITALL)
+        except OSError:
+            return
+        if magic != _binrpc.MAGIC:
+            super().handle()
+            return
+        # BIN-RPC connections are kept open by the CCU / Homegear
+        self.request.settimeout(self.server.keepalivetimeout)
+        try:
+            _binrpc.serve(self.rfile, self.wfile, self.server._dispatch,
+                          maxrequests=self.server.keepalivemax, idle=self.awaitRequest)
+        except (OSError, _binrpc.BinRpcError) as err:
+            LOG.debug("RequestHandler.handle: BIN-RPC connection closed: %s", err)
+
+    def awaitRequest(self):
+        """
+        Wait for the next request on a persistent connection. Returns False if the
+        connection should be closed: it has been idle for server.keepalivetimeout
+        seconds, or it is idle while further connections wait for a worker.
+        """
+        if self._received():
+            return True
+        requestsWaiting = getattr(self.server, 'requestsWaiting', None)
+        deadline = time.monotonic() + self.server.keepalivetimeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if select.select([self.connection], [], [], min(remaining, IDLE_POLL_INTERVAL))[0]:
+                return True
+            if requestsWaiting is not None and requestsWaiting():
+                LOG.debug("RequestHandler.awaitRequest: Closing idle connection of %s, requests are waiting",
+                          self.client_address[0])
+                return False
+
+    def _received(self):
+        """True if data of the next request has been read into the buffer already."""
+        timeout = self.connection.gettimeout()
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return True
+        finally:
+            self.connection.settimeout(timeout)
+
+
+class KeepAliveRequestHandler(RequestHandler):
+    """
+    HTTP/1.1 request handler keeping connections open for further requests.
+    Idle connections are closed after server.keepalivetimeout seconds or if further
+    connections wait for a worker, and every connection is closed after
+    server.keepalivemax requests.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        self.timeout = self.server.keepalivetimeout
+        self.requestcount = 0
+        super().setup()
+
+    def handle_one_request(self):
+        if self.requestcount and not self.awaitRequest():
+            self.close_connection = True
+            return
+        self.requestcount += 1
+        super().handle_one_request()
+
+    def end_headers(self):
+        if self.requestcount >= self.server.keepalivemax:
+            self.send_header("Connection", "close")
+        elif not self.close_connection:
+            self.send_header("Keep-Alive", "timeout=%i, max=%i" % (
+                self.server.keepalivetimeout, self.server.keepalivemax - self.requestcount))
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        # pylint: disable=redefined-builtin
+        LOG.debug("KeepAliveRequestHandler: %s - %s", self.address_string(), format % args)
+
+
+def _eventAddress(params):
+    """Address of the params of an event() call, None if they are malformed."""
+    if isinstance(params, (list, tuple)) and len(params) > 1 and isinstance(params[1], str):
+        return params[1]
+    return None
+
+
+class WorkerPoolMixin():
+    """
+    Mix-in for socketserver classes to handle requests in a bounded pool of worker threads.
+    If all workers are busy, up to WORKER_QUEUE_SIZE requests are queued. Beyond that
+    no further connections are accepted until a worker becomes available.
+    Events are dispatched in the order their requests have been received per address,
+    see EventSequencer. Requests on a persistent connection are handled in order anyway.
+    """
+    workers = 1
+    queuesize = WORKER_QUEUE_SIZE
+
+    def startWorkers(self):
+        """Start the worker threads."""
+        self._requestqueue = queue.Queue(maxsize=self.queuesize)
+        self._workerthreads = []
+        self._activerequests = set()
+        self._activelock = threading.Lock()
+        self.sequencer = EventSequencer(EVENT_STRIPES)
+        self._local = threading.local()
+        for i in range(self.workers):
+            worker = threading.Thread(name="RPCWorker-%i" % i,
+                                      target=self._processRequests,
+                                      daemon=True)
+            worker.start()
+            self._workerthreads.append(worker)
+
+    def _processRequests(self):
+        """Worker loop handling queued requests."""
+        while True:
+            item = self._requestqueue.get()
+            if item is None:
+                return
+            request, client_address, ticket = item
+            self._local.ticket = ticket
+            with self._activelock:
+                self._activerequests.add(request)
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.sequencer.release(self._takeTicket())
+                with self._activelock:
+                    self._activerequests.discard(request)
+                self.shutdown_request(request)
+
+    def process_request(self, request, client_address):
+        """Hand the request over to the worker pool."""
+        self._requestqueue.put((request, client_address, self.sequencer.ticket()))
+
+    def requestsWaiting(self):
+        """True if requests are queued for a worker."""
+        return not self._requestqueue.empty()
+
+    def _takeTicket(self):
+        """Ticket of the request of this worker. Only its first dispatch is ordered by it."""
+        ticket = getattr(self._local, 'ticket', None)
+        self._local.ticket = None
+        return ticket
+
+    def _dispatchEvents(self, events):
+        sequencer = self.sequencer
+        slots = sequencer.reserve([_eventAddress(args) for args in events], self._takeTicket())
+        event = self.instance.event
+        results = []
+        for slot, args in zip(slots, events):
+            try:
+                results.append(sequencer.run(slot, event, *args))
+            except BaseException as exc:
+                results.append(exc)
+        return results
+
+    def _dispatch(self, method, params):
+        sequencer = self.sequencer
+        slots = getattr(self._local, 'slots', None)
+        if method == 'event':
+            address = _eventAddress(params)
+            # Events of a system.multicall use the slots reserved for it
+            while slots:
+                slotaddress, slot = slots.popleft()
+                if slotaddress == address:
+                    break
+                sequencer.skip([slot])
+            else:
+                slot, = sequencer.reserve([address], self._takeTicket())
+            return sequencer.run(slot, super()._dispatch, method, params)
+        if method == 'system.multicall' and slots is None:
+            calls = params[0] if params and isinstance(params[0], list) else []
+            addresses = [_eventAddress(call.get('params')) for call in calls
+                         if isinstance(call, dict) and call.get('methodName') == 'event']
+            if addresses:
+                self._local.slots = collections.deque(
+                    zip(addresses, sequencer.reserve(addresses, self._takeTicket())))
+                try:
+                    return super()._dispatch(method, params)
+                finally:
+                    sequencer.skip(slot for _, slot in self._local.slots)
+                    self._local.slots = None
+        sequencer.release(self._takeTicket())
+        return super()._dispatch(method, params)
+
+    def server_close(self):
+        """Stop the workers after the listening socket has been closed."""
+        super().server_close()
+        # Wake up workers waiting on persistent connections
+        with self._activelock:
+            for request in self._activerequests:
+                try:
+                    request.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        for _ in self._workerthreads:
+            self._requestqueue.put(None)
+        for worker in self._workerthreads:
+            worker.join()
+        self._workerthreads = []
+
+
+class PooledXMLRPCServer(WorkerPoolMixin, XMLRPCServer):
+    """XML-RPC server handling requests in a bounded pool of worker threads."""
+
+    def __init__(self, addr, workers=1, **kwargs):
+        self.workers = max(1, int(workers))
+        super().__init__(addr, **kwargs)
+        self.startWorkers()
+
 
 # pylint: disable=too-many-public-methods
-class ServerThread(threading.Thread):
-    """XML-RPC server thread to handle messages from CCU / Homegear"""
+class ServerBase():
+    """
+    Proxies, device objects and RPC functions of the server handling messages from
+    CCU / Homegear. The listener is added by ServerThread or AsyncServerThread.
+    """
 
     def __init__(self,
                  local=LOCAL,
@@ -569,9 +1359,17 @@ class ServerThread(threading.Thread):
                  interface_id=INTERFACE_ID,
                  eventcallback=False,
                  systemcallback=False,
-                 resolveparamsets=False):
+                 resolveparamsets=False,
+                 workers=WORKERS,
+                 eventqueue=False,
+                 eventconsumers=EVENT_CONSUMERS,
+                 coalesceevents=False,
+                 eventbuffer=EVENT_BUFFER,
+                 eventpolicy=POLICY_BLOCK,
+                 keepalive=False,
+                 keepalivetimeout=KEEPALIVE_TIMEOUT,
+                 keepalivemax=KEEPALIVE_MAX):
         LOG.debug("ServerThread.__init__")
-        threading.Thread.__init__(self)
 
         # Member
         self._interface_id = interface_id
@@ -583,8 +1381,36 @@ class ServerThread(threading.Thread):
         self.eventcallback = eventcallback
         self.systemcallback = systemcallback
         self.resolveparamsets = resolveparamsets
+        self.workers = int(workers or 0)
+        self.keepalive = keepalive
+        self.keepalivetimeout = keepalivetimeout
+        self.keepalivemax = keepalivemax
+        # A persistent connection occupies its worker while it is open, so each remote
+        # needs a worker of its own. BIN-RPC connections are persistent as well.
+        persistent = self.keepalive or any(callback_protocol(host) == PROTOCOL_BINRPC
+                                           for host in self.remotes.values())
+        if persistent and self.workers < len(self.remotes) + 1:
+            if self.workers > 0:
+                LOG.warning("ServerThread.__init__: %i workers are too few for persistent connections of %i remotes" %
+                            (self.workers, len(self.remotes)))
+            self.workers = len(self.remotes) + 1
+            LOG.info("ServerThread.__init__: Using %i workers for persistent connections" % self.workers)
+        for remote, host in self.remotes.items():
+            if host.get('readpolicy') is not None and host['readpolicy'] not in READ_POLICIES:
+                raise ValueError("Remote %s: Unknown read policy %s" % (remote, host['readpolicy']))
+            readmaxage = host.get('readmaxage')
+            if readmaxage is not None and (isinstance(readmaxage, bool) or
+                                           not isinstance(readmaxage, (int, float)) or readmaxage < 0):
+                raise ValueError("Remote %s: Invalid readmaxage %s" % (remote, readmaxage))
         self.proxies = {}
         self.failed_inits = []
+        self.subscriptions = SubscriptionRegistry()
+        self.eventqueue = None
+        if eventqueue:
+            self.eventqueue = EventQueue(consumers=eventconsumers,
+                                         coalesce=coalesceevents,
+                                         maxsize=eventbuffer,
+                                         policy=eventpolicy)
 
         self.createProxies()
         if not self.proxies:
@@ -597,114 +1423,175 @@ class ServerThread(threading.Thread):
                                           remotes=self.remotes,
                                           eventcallback=self.eventcallback,
                                           systemcallback=self.systemcallback,
-                                          resolveparamsets=self.resolveparamsets)
+                                          resolveparamsets=self.resolveparamsets,
+                                          eventqueue=self.eventqueue,
+                                          subscriptions=self.subscriptions)
 
         # Setup server to handle requests from CCU / Homegear
         LOG.debug("ServerThread.__init__: Setting up server")
-        # class SimpleThreadedXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
-        #     pass
-        # self.server = SimpleThreadedXMLRPCServer((self._local, self._localport),
-        #                                          requestHandler=RequestHandler,
-        #                                          logRequests=False)
-        self.server = SimpleXMLRPCServer((self._local, self._localport),
-                                         requestHandler=RequestHandler,
-                                         logRequests=False)
+        self.createServer()
+
+    def createServer(self):
+        """Create the XML-RPC server the CCU / Homegear will send events to."""
+        requesthandler = KeepAliveRequestHandler if self.keepalive else RequestHandler
+        if self.workers > 0:
+            LOG.debug("ServerThread.createServer: Using %i workers" % self.workers)
+            self.server = PooledXMLRPCServer((self._local, self._localport),
+                                             workers=self.workers,
+                                             keepalivetimeout=self.keepalivetimeout,
+                                             keepalivemax=self.keepalivemax,
+                                             requestHandler=requesthandler,
+                                             logRequests=False)
+        else:
+            self.server = XMLRPCServer((self._local, self._localport),
+                                       keepalivetimeout=self.keepalivetimeout,
+                                       keepalivemax=self.keepalivemax,
+                                       requestHandler=requesthandler,
+                                       logRequests=False)
         self._localport = self.server.socket.getsockname()[1]
         self.server.register_introspection_functions()
         self.server.register_multicall_functions()
-        LOG.debug("ServerThread.__init__: Registering RPC functions")
+        LOG.debug("ServerThread.createServer: Registering RPC functions")
         self.server.register_instance(
             self._rpcfunctions, allow_dotted_names=True)
 
-    def run(self):
-        LOG.info("Starting server at http://%s:%i" %
-                 (self._local, self._localport))
-        self.server.serve_forever()
+    @staticmethod
+    def _concurrently(func, items):
+        """Call func(*item) for all items in parallel. Returns the futures in the order of items."""
+        items = list(items)
+        if not items:
+            return []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(items),
+                                                   thread_name_prefix="RemoteSetup") as executor:
+            return [executor.submit(func, *item) for item in items]
 
     def createProxies(self):
-        """Create proxies to interact with CCU / Homegear"""
+        """
+        Create proxies to interact with CCU / Homegear. The remotes are set up in parallel.
+        If a remote can not be set up, the proxies of the others are cleared and the
+        first error is raised.
+        """
         LOG.debug("createProxies: Creating proxies")
-        for remote, host in self.remotes.items():
-            # Initialize XML-RPC
+        futures = self._concurrently(self._createProxy, self.remotes.items())
+        error = None
+        for host, future in zip(self.remotes.values(), futures):
             try:
-                socket.gethostbyname(host['ip'])
+                proxy = future.result()
             except Exception as err:
-                LOG.info("Skipping proxy: %s", str(err))
+                if error is None:
+                    error = err
                 continue
-            if 'path' not in host:
-                host['path'] = ''
-            LOG.info("Creating proxy %s. Connecting to %s:%i%s" %
-                     (remote, host['ip'], host['port'], host['path']))
-            host['id'] = "%s-%s" % (self._interface_id, remote)
-            try:
-                api_url = build_api_url(host=host['ip'],
-                                        port=host['port'],
-                                        path=host['path'],
-                                        username=host.get('username'),
-                                        password=host.get('password'),
-                                        ssl=host.get('ssl'))
-                self.proxies[host['id']] = LockingServerProxy(
-                    api_url,
-                    remote=remote,
-                    callbackip=host.get('callbackip', None),
-                    callbackport=host.get('callbackport', None),
-                    skipinit=not host.get('connect', True),
-                    ssl=host.get('ssl', False),
-                    verify_ssl=host.get('verify_ssl', True))
-            except Exception as err:
-                LOG.warning("Failed connecting to proxy at http://%s:%i%s" %
-                            (host['ip'], host['port'], host['path']))
-                LOG.debug("__init__: Exception: %s" % str(err))
-                # pylint: disable=raise-missing-from
-                raise Exception
-            try:
-                host['type'] = BACKEND_UNKNOWN
-                #if "Homegear" in self.proxies[host['id']].getVersion():
-                #    LOG.debug("__init__: Host is Homegear")
-                #    host['type'] = BACKEND_HOMEGEAR
-                #else:
-                #    LOG.debug("__init__: Host is CCU")
-                #    host['type'] = BACKEND_CCU
-            except Exception as err:
-                LOG.warning("__init__: Failed to detect backend type: %s" % str(err))
-                host['type'] = BACKEND_UNKNOWN
+            if proxy is not None:
+                self.proxies[host['id']] = proxy
+        if error is not None:
+            self.clearProxies()
+            raise error
+
+    def _createProxy(self, remote, host):
+        """Create the proxy for a remote. Returns None if the remote can not be resolved."""
+        # Initialize XML-RPC
+        try:
+            socket.gethostbyname(host['ip'])
+        except Exception as err:
+            LOG.info("Skipping proxy: %s", str(err))
+            return None
+        if 'path' not in host:
+            host['path'] = ''
+        LOG.info("Creating proxy %s. Connecting to %s:%i%s" %
+                 (remote, host['ip'], host['port'], host['path']))
+        host['id'] = "%s-%s" % (self._interface_id, remote)
+        if host.get('protocol', PROTOCOL_XMLRPC) == PROTOCOL_BINRPC and \
+                (host.get('ssl') or host.get('password')):
+            # BIN-RPC is plain TCP without authentication
+            raise ValueError("Remote %s: BIN-RPC does not support ssl or authentication" % remote)
+        try:
+            api_url = build_api_url(host=host['ip'],
+                                    port=host['port'],
+                                    path=host['path'],
+                                    username=host.get('username'),
+                                    password=host.get('password'),
+                                    ssl=host.get('ssl'))
+            proxy = LockingServerProxy(
+                api_url,
+                remote=remote,
+                callbackip=host.get('callbackip', None),
+                callbackport=host.get('callbackport', None),
+                callbackprotocol=callback_protocol(host),
+                protocol=host.get('protocol', PROTOCOL_XMLRPC),
+                connections=host.get('connections', CONNECTIONS),
+                asyncconnections=host.get('asyncconnections', _aioclient.CONNECTIONS),
+                debounce=host.get('debounce', DEBOUNCE),
+                dutycycle=host.get('dutycycle', False),
+                connecttimeout=host.get('connecttimeout', CONNECT_TIMEOUT),
+                readtimeout=host.get('readtimeout', READ_TIMEOUT),
+                breakerthreshold=host.get('breakerthreshold', BREAKER_THRESHOLD),
+                breakerreset=host.get('breakerreset', BREAKER_RESET),
+                skipinit=not host.get('connect', True),
+                ssl=host.get('ssl', False),
+                verify_ssl=host.get('verify_ssl', True))
+        except Exception as err:
+            LOG.warning("Failed connecting to proxy at http://%s:%i%s" %
+                        (host['ip'], host['port'], host['path']))
+            LOG.debug("__init__: Exception: %s" % str(err))
+            # pylint: disable=raise-missing-from
+            raise Exception
+        # Detected by the capability probe when the proxy is initialized
+        host['type'] = BACKEND_UNKNOWN
+        return proxy
 
     def clearProxies(self):
         """Remove existing proxy objects."""
         LOG.debug("clearProxies: Clearing proxies")
+        for proxy in self.proxies.values():
+            if proxy._coalescer is not None:
+                proxy._coalescer.flush()
+            if proxy._scheduler is not None:
+                proxy._scheduler.stop()
+            proxy._asyncclient.close()
         self.proxies.clear()
 
+    def callbackUrl(self, proxy):
+        """The URL the CCU / Homegear should send events for proxy to."""
+        if proxy._callbackip and proxy._callbackport:
+            callbackip = proxy._callbackip
+            callbackport = proxy._callbackport
+        else:
+            callbackip = proxy._localip
+            callbackport = self._localport
+        scheme = _binrpc.SCHEME if proxy._callbackprotocol == PROTOCOL_BINRPC else 'http'
+        return "%s://%s:%i" % (scheme, callbackip, int(callbackport))
+
     def proxyInit(self):
         """
         To receive events the proxy has to tell the CCU / Homegear where to send the events. For that we call the init-method.
         """
         # Call init() with local XML RPC config and interface_id (the name of
         # the receiver) to receive events. XML RPC server has to be running.
-        for interface_id, proxy in self.proxies.items():
-            if proxy._skipinit:
-                LOG.info("Skipping init for %s", interface_id)
-                continue
-            if proxy._callbackip and proxy._callbackport:
-                callbackip = proxy._callbackip
-                callbackport = proxy._callbackport
-            else:
-                callbackip = proxy._localip
-                callbackport = self._localport
-            LOG.debug("ServerThread.proxyInit: init('http://%s:%i', '%s')" %
-                      (callbackip, callbackport, interface_id))
-            try:
-                # For HomeMatic IP, init is not working correctly. We fetch the device list and create
-                # the device objects before the init is performed.
-                if proxy._remoteport in [2010, 32010, 42010]:
-                    dev_list = proxy.listDevices(interface_id)
-                    self._rpcfunctions.newDevices(interface_id=interface_id, dev_descriptions=dev_list)
-                proxy.init("http://%s:%i" %
-                           (callbackip, callbackport), interface_id)
-                LOG.info("Proxy for %s initialized", interface_id)
-            except Exception as err:
-                LOG.debug("proxyInit: Exception: %s" % str(err))
-                LOG.warning("Failed to initialize proxy for %s", interface_id)
-                self.failed_inits.append(interface_id)
+        # The remotes are initialized in parallel.
+        for future in self._concurrently(self._initProxy, list(self.proxies.items())):
+            future.result()
+
+    def _initProxy(self, interface_id, proxy):
+        if proxy._skipinit:
+            LOG.info("Skipping init for %s", interface_id)
+            return
+        self._probeCapabilities(proxy)
+        self._rpcfunctions._warmUpProbed(interface_id)
+        callbackurl = self.callbackUrl(proxy)
+        LOG.debug("ServerThread.proxyInit: init('%s', '%s')" %
+                  (callbackurl, interface_id))
+        try:
+            # For HomeMatic IP, init is not working correctly. We fetch the device list and create
+            # the device objects before the init is performed.
+            if proxy._remoteport in [2010, 32010, 42010]:
+                dev_list = proxy.listDevices(interface_id)
+                self._rpcfunctions.newDevices(interface_id=interface_id, dev_descriptions=dev_list)
+            proxy.init(callbackurl, interface_id)
+            LOG.info("Proxy for %s initialized", interface_id)
+        except Exception as err:
+            LOG.debug("proxyInit: Exception: %s" % str(err))
+            LOG.warning("Failed to initialize proxy for %s", interface_id)
+            self.failed_inits.append(interface_id)
 
     def proxyDeInit(self):
         """De-Init from the proxies."""
@@ -713,13 +1600,7 @@ class ServerThread(threading.Thread):
             if interface_id in self.failed_inits:
                 LOG.warning("ServerThread.proxyDeInit: Not performing de-init for %s", interface_id)
                 continue
-            if proxy._callbackip and proxy._callbackport:
-                callbackip = proxy._callbackip
-                callbackport = proxy._callbackport
-            else:
-                callbackip = proxy._localip
-                callbackport = self._localport
-            remote = "http://%s:%i" % (callbackip, callbackport)
+            remote = self.callbackUrl(proxy)
             LOG.debug("ServerThread.proxyDeInit: init('%s')", remote)
             if not interface_id in stopped:
                 try:
@@ -730,16 +1611,6 @@ class ServerThread(threading.Thread):
                     LOG.debug("proxyDeInit: Exception: %s", err)
                     LOG.warning("proxyDeInit: Failed to de-initialize proxy")
 
-    def stop(self):
-        """To stop the server we de-init from the CCU / Homegear, then shut down our XML-RPC server."""
-        self.proxyDeInit()
-        self.clearProxies()
-        LOG.info("Shutting down server")
-        self.server.shutdown()
-        LOG.debug("ServerThread.stop: Stopping ServerThread")
-        self.server.server_close()
-        LOG.info("HomeMatic XML-RPC Server stopped")
-
     def parseCCUSysVar(self, data):
         """Helper to parse type of system variables of CCU"""
         if data['type'] == 'LOGIC':
@@ -1011,6 +1882,44 @@ class ServerThread(threading.Thread):
                 "ServerThread.homegearCheckInit: Exception: %s" % str(err))
             return False
 
+    def subscribe(self, callback, remote=None, address=None, channel=None, parameter=None):
+        """Subscribe to events by remote / address / channel / parameter, None or '*' match everything"""
+        return self.subscriptions.subscribe(callback, remote, address, channel, parameter)
+
+    def unsubscribe(self, handle):
+        """Remove a subscription"""
+        return self.subscriptions.unsubscribe(handle)
+
+    def writeStatistics(self, remote):
+        """Return the number of sent and suppressed setValue calls of a remote with debouncing enabled"""
+        proxy = self.proxies.get("%s-%s" % (self._interface_id, remote))
+        if proxy is None or proxy._coalescer is None:
+            return None
+        return proxy._coalescer.statistics()
+
+    def circuitBreakerStatus(self, remote):
+        """Return the state of the circuit breaker of a remote"""
+        proxy = self.proxies.get("%s-%s" % (self._interface_id, remote))
+        if proxy is None:
+            return None
+        return proxy._breaker.status()
+
+    def dutyCycleStatistics(self, remote):
+        """Return the duty cycle and the number of sent, deferred, rejected and pending writes of a remote"""
+        proxy = self.proxies.get("%s-%s" % (self._interface_id, remote))
+        if proxy is None or proxy._scheduler is None:
+            return None
+        return proxy._scheduler.statistics()
+
+    def eventStatistics(self, remote=None):
+        """Return the counters of the event queue per remote, or for a single remote"""
+        if self.eventqueue is None:
+            return {} if remote is None else None
+        stats = self.eventqueue.statistics()
+        if remote is None:
+            return stats
+        return stats.get(remote)
+
     def putParamset(self, remote, address, paramset, value, rx_mode=None):
         """Set paramsets manually"""
         try:
@@ -1021,3 +1930,56 @@ class ServerThread(threading.Thread):
                 return proxy.putParamset(address, paramset, value, rx_mode)
         except Exception as err:
             LOG.debug("ServerThread.putParamset: Exception: %s" % str(err))
+
+    def batch(self, remote, maxsize=BATCH_SIZE):
+        """Collect calls to a remote and send them with system.multicall"""
+        proxy = self.proxies["%s-%s" % (self._interface_id, remote)]
+        return Batch(proxy, maxsize, multicall=multicall_supported(proxy))
+
+    def capabilities(self, remote, refresh=False):
+        """Capabilities of a remote, probed on first use or if refresh is set. None for unknown remotes."""
+        proxy = self.proxies.get("%s-%s" % (self._interface_id, remote))
+        if proxy is None:
+            return None
+        return self._probeCapabilities(proxy, refresh)
+
+    def _probeCapabilities(self, proxy, refresh=False):
+        if proxy._capabilities is None or refresh:
+            capabilities = Capabilities.probe(proxy)
+            proxy._capabilities = capabilities
+            if proxy._remote in self.remotes:
+                self.remotes[proxy._remote]['type'] = capabilities.backend
+            LOG.info("ServerThread._probeCapabilities: %s: backend %i, version %s, multicall %s",
+                     proxy._remote, capabilities.backend, capabilities.version, capabilities.multicall)
+        return proxy._capabilities
+
+    def warmUp(self, remote, chunksize=BATCH_SIZE):
+        """Fetch the VALUES paramsets of all channels of a remote into their value caches"""
+        return self._rpcfunctions._warmUp("%s-%s" % (self._interface_id, remote), chunksize=chunksize)
+
+
+class ServerThread(ServerBase, threading.Thread):
+    """XML-RPC server thread to handle messages from CCU / Homegear"""
+
+    def __init__(self, *args, **kwargs):
+        threading.Thread.__init__(self)
+        ServerBase.__init__(self, *args, **kwargs)
+
+    def run(self):
+        LOG.info("Starting server at http://%s:%i" %
+                 (self._local, self._localport))
+        if self.eventqueue is not None:
+            self.eventqueue.start(self._rpcfunctions._event)
+        self.server.serve_forever()
+
+    def stop(self):
+        """To stop the server we de-init from the CCU / Homegear, then shut down our XML-RPC server."""
+        self.proxyDeInit()
+        self.clearProxies()
+        LOG.info("Shutting down server")
+        self.server.shutdown()
+        LOG.debug("ServerThread.stop: Stopping ServerThread")
+        self.server.server_close()
+        if self.eventqueue is not None:
+            self.eventqueue.stop()
+        LOG.info("HomeMatic XML-RPC Server stopped")
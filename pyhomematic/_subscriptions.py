@@ -0,0 +1,100 @@
+import threading
+import itertools
+import logging
+
+LOG = logging.getLogger(__name__)
+
+# Constants
+WILDCARD = '*'
+
+
+class SubscriptionRegistry():
+    """
+    Event subscriptions indexed by (remote, device address, channel, parameter).
+    Every field may be a wildcard. Subscriptions are stored in one index per
+    combination of wildcarded fields ("shape"), so dispatching an event costs
+    one lookup per shape in use plus the matching callbacks, no matter how many
+    subscriptions exist in total.
+    Signature for callback-functions: foo(address, interface_id, key, value).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handles = itertools.count(1)
+        self._subscriptions = {}
+        # shape (tuple of 4 booleans, True = concrete) -> {key: (handle, callback), ...}
+        self._indexes = {}
+        self._shapes = ()
+
+    @staticmethod
+    def _field(value):
+        if value is None or value == WILDCARD:
+            return None
+        return str(value)
+
+    def subscribe(self, callback, remote=None, address=None, channel=None, parameter=None):
+        """
+        Subscribe callback to the events matching the given fields. None or '*' match everything.
+        A channel address (e.g. 'ABC0000001:1') may be given as address, the channel is then taken from it.
+        Returns a handle to be passed to unsubscribe().
+        """
+        if not hasattr(callback, '__call__'):
+            raise TypeError("callback is not callable")
+        if address is not None and ':' in address:
+            address, channel = address.split(':', 1)
+        if parameter is not None:
+            parameter = parameter.upper()
+        fields = (self._field(remote), self._field(address),
+                  self._field(channel), self._field(parameter))
+        shape = tuple(field is not None for field in fields)
+        key = tuple(field for field in fields if field is not None)
+        with self._lock:
+            handle = next(self._handles)
+            index = self._indexes.setdefault(shape, {})
+            index[key] = index.get(key, ()) + ((handle, callback), )
+            self._subscriptions[handle] = (shape, key)
+            self._shapes = tuple(self._indexes.items())
+        LOG.debug("SubscriptionRegistry.subscribe: %i for %s", handle, fields)
+        return handle
+
+    def unsubscribe(self, handle):
+        """Remove the subscription with the given handle. Returns False if it is unknown."""
+        with self._lock:
+            try:
+                shape, key = self._subscriptions.pop(handle)
+            except KeyError:
+                return False
+            index = self._indexes[shape]
+            remaining = tuple(entry for entry in index[key] if entry[0] != handle)
+            if remaining:
+                index[key] = remaining
+            else:
+                del index[key]
+                if not index:
+                    del self._indexes[shape]
+            self._shapes = tuple(self._indexes.items())
+        LOG.debug("SubscriptionRegistry.unsubscribe: %i", handle)
+        return True
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def match(self, remote, address, value_key):
+        """Return the callbacks subscribed to the event."""
+        device, _, channel = address.partition(':')
+        fields = (remote, device, channel or None, value_key)
+        callbacks = []
+        for shape, index in self._shapes:
+            entries = index.get(tuple(field for field, concrete in zip(fields, shape) if concrete))
+            if entries:
+                callbacks.extend(callback for _, callback in entries)
+        return callbacks
+
+    def dispatch(self, remote, interface_id, address, value_key, value):
+        """Pass an event to all matching subscribers."""
+        for callback in self.match(remote, address, value_key):
+            try:
+                callback(address, interface_id, value_key, value)
+            except Exception as err:
+                LOG.error("SubscriptionRegistry.dispatch: Exception in callback for %s %s: %s",
+                          address, value_key, err)
@@ -0,0 +1,85 @@
+import threading
+import logging
+
+LOG = logging.getLogger(__name__)
+
+# Constants
+DEBOUNCE = 0  # Seconds, 0 = send every write
+
+
+class WriteCoalescer():
+    """
+    Last-write-wins coalescing of setValue calls per (address, value_key).
+    The first write is sent right away and opens a window of debounce seconds.
+    Writes arriving within the window only replace the pending value, which is
+    sent when the window ends (and opens the next one). Pending values that get
+    replaced before they have been sent are counted as suppressed.
+    """
+
+    def __init__(self, send, debounce):
+        self._send = send
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        # (address, value_key) -> [pending value, value pending?, timer]
+        self._windows = {}
+        self.sent = 0
+        self.suppressed = 0
+
+    def setValue(self, address, value_key, value):
+        """Send or schedule a write. Returns the result of the call if it has been sent right away."""
+        key = (address, value_key)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None:
+                if window[1]:
+                    self.suppressed += 1
+                window[0] = value
+                window[1] = True
+                return ""
+            window = self._windows[key] = [None, False, None]
+            self.sent += 1
+        try:
+            return self._send('setValue', (address, value_key, value))
+        finally:
+            self._startWindow(key, window)
+
+    def _startWindow(self, key, window):
+        with self._lock:
+            window[2] = threading.Timer(self.debounce, self._endWindow, args=(key, window))
+            window[2].daemon = True
+            window[2].start()
+
+    def _endWindow(self, key, window):
+        with self._lock:
+            if self._windows.get(key) is not window:
+                return
+            if not window[1]:
+                del self._windows[key]
+                return
+            value = window[0]
+            window[0] = None
+            window[1] = False
+            self.sent += 1
+        try:
+            self._send('setValue', key + (value, ))
+        except Exception as err:
+            LOG.error("WriteCoalescer._endWindow: Failed to set %s of %s: %s", key[1], key[0], err)
+        self._startWindow(key, window)
+
+    def flush(self):
+        """Send all pending values right away."""
+        with self._lock:
+            windows, self._windows = self._windows, {}
+        for key, window in windows.items():
+            if window[2] is not None:
+                window[2].cancel()
+            if window[1]:
+                with self._lock:
+                    self.sent += 1
+                try:
+                    self._send('setValue', key + (window[0], ))
+                except Exception as err:
+                    LOG.error("WriteCoalescer.flush: Failed to set %s of %s: %s", key[1], key[0], err)
+
+    def statistics(self):
+        return {'sent': self.sent, 'suppressed': self.suppressed}
@@ -1,10 +1,15 @@
+import asyncio
+import functools
 import logging
 
 from pyhomematic import _hm
+from pyhomematic import _aiohm
 
 LOG = logging.getLogger(__name__)
 
 
+# Facade of the server, one method per operation on a remote
+# pylint: disable=too-many-public-methods
 class HMConnection():
     def __init__(self,
                  local=_hm.LOCAL,
@@ -21,10 +26,20 @@ class HMConnection():
                  resolvenames=None,
                  resolveparamsets=False,
                  rpcusername=None,
-                 rpcpassword=None):
+                 rpcpassword=None,
+                 workers=_hm.WORKERS,
+                 eventqueue=False,
+                 eventconsumers=_hm.EVENT_CONSUMERS,
+                 coalesceevents=False,
+                 eventbuffer=_hm.EVENT_BUFFER,
+                 eventpolicy=_hm.POLICY_BLOCK,
+                 keepalive=False,
+                 keepalivetimeout=_hm.KEEPALIVE_TIMEOUT,
+                 keepalivemax=_hm.KEEPALIVE_MAX):
         """
         Helper function to quickly create the server thread to which the CCU / Homegear will emit events.
         Without specifying the remote data we'll assume we're running Homegear on localhost on the default port.
+        The further arguments and the options of the remotes are described in README.rst.
         """
         LOG.debug("HMConnection: Creating server object")
 
@@ -55,8 +70,20 @@ class HMConnection():
                                             interface_id=interface_id,
                                             eventcallback=eventcallback,
                                             systemcallback=systemcallback,
-                                            resolveparamsets=resolveparamsets)
+                                            resolveparamsets=resolveparamsets,
+                                            workers=workers,
+                                            eventqueue=eventqueue,
+                                            eventconsumers=eventconsumers,
+                                            coalesceevents=coalesceevents,
+                                            eventbuffer=eventbuffer,
+                                            eventpolicy=eventpolicy,
+                                            keepalive=keepalive,
+                                            keepalivetimeout=keepalivetimeout,
+                                            keepalivemax=keepalivemax)
 
+        except ValueError:
+            # Invalid configuration
+            raise
         except Exception as err:
             LOG.critical("Failed to create server %s", err)
             LOG.debug(str(err))
@@ -193,3 +220,277 @@ class HMConnection():
         """Set paramsets manually"""
         if self._server is not None:
             return self._server.putParamset(remote, address, paramset, value, rx_mode)
+
+    def batch(self, remote, maxsize=_hm.BATCH_SIZE):
+        """
+        Collect getValue / setValue / putParamset calls to a remote and send them with system.multicall,
+        at most maxsize calls per request. The calls are sent when leaving the with-block:
+            with connection.batch('default') as batch:
+                batch.setValue('ABC0000001:1', 'STATE', False)
+        batch.results holds the result or exception of every call, batch.errors the failed ones.
+        """
+        if self._server is not None:
+            return self._server.batch(remote, maxsize)
+
+    def warmUp(self, remote):
+        """
+        Fetch the VALUES paramsets of all channels of a remote with system.multicall to fill their value caches.
+        Returns the number of channels, failed channels, calls and the duration in seconds.
+        This is done automatically for new devices of remotes with "warmup": True, or "auto" and system.multicall.
+        """
+        if self._server is not None:
+            return self._server.warmUp(remote)
+
+    def capabilities(self, remote, refresh=False):
+        """
+        What a remote supports, probed with system.listMethods and getVersion when it is initialized:
+        backend type, version, supported methods (None if unknown), system.multicall and BIN-RPC support.
+        Batches are sent call by call to remotes without system.multicall.
+        """
+        if self._server is not None:
+            capabilities = self._server.capabilities(remote, refresh)
+            if capabilities is not None:
+                return capabilities.asDict()
+
+    def subscribe(self, callback, remote=None, address=None, channel=None, parameter=None):
+        """
+        Subscribe to events of a remote, device, channel and / or parameter. None or '*' match everything.
+        Signature for callback-functions: foo(address, interface_id, key, value).
+        Returns a handle to remove the subscription with unsubscribe().
+        """
+        if self._server is not None:
+            return self._server.subscribe(callback, remote, address, channel, parameter)
+
+    def unsubscribe(self, handle):
+        """Remove a subscription by its handle"""
+        if self._server is not None:
+            return self._server.unsubscribe(handle)
+
+    def writeStatistics(self, remote):
+        """Get the number of sent and suppressed setValue calls of a remote with debouncing enabled"""
+        if self._server is not None:
+            return self._server.writeStatistics(remote)
+
+    def circuitBreakerStatus(self, remote):
+        """
+        Get the state of the circuit breaker of a remote: 'closed', 'open' or 'half-open' (probing),
+        the number of consecutive failures, rejected calls and seconds until the next probe.
+        """
+        if self._server is not None:
+            return self._server.circuitBreakerStatus(remote)
+
+    def dutyCycleStatistics(self, remote):
+        """Get the duty cycle and the number of sent, deferred, rejected and pending writes of a remote"""
+        if self._server is not None:
+            return self._server.dutyCycleStatistics(remote)
+
+    def eventStatistics(self, remote=None):
+        """Get the enqueued / dropped / coalesced / pending event counters per remote"""
+        if self._server is not None:
+            return self._server.eventStatistics(remote)
+
+
+class AsyncHMConnection():
+    def __init__(self,
+                 local=_hm.LOCAL,
+                 localport=_hm.LOCALPORT,
+                 remotes=_hm.REMOTES,
+                 remote=None,
+                 remoteport=None,
+                 devicefile=_hm.DEVICEFILE,
+                 paramsetfile=_hm.PARAMSETFILE,
+                 interface_id=_hm.INTERFACE_ID,
+                 eventcallback=False,
+                 systemcallback=False,
+                 resolvenames=None,
+                 resolveparamsets=False,
+                 rpcusername=None,
+                 rpcpassword=None):
+        """
+        asyncio variant of HMConnection. Events from the CCU / Homegear are received on the running event loop.
+        The callbacks may be coroutine functions, which are then scheduled as tasks on that loop,
+        or once start() is awaited if they are invoked before (e.g. while loading the devicefile).
+        Device objects are the same as with HMConnection. Their coroutine methods (asyncGetValue,
+        asyncSetValue, ...) and the methods below send requests with an asyncio client keeping
+        connections to the remotes open, other blocking calls can be awaited using call().
+        """
+        LOG.debug("AsyncHMConnection: Creating server object")
+        self._loop = None
+        # Coroutine callbacks invoked before start(), e.g. while loading the devicefile
+        self._pending = []
+
+        # Device-storage
+        self.devices = _hm.devices
+        self.devices_all = _hm.devices_all
+        self.devices_raw = _hm.devices_raw
+        self.devices_raw_dict = _hm.devices_raw_dict
+        self.paramsets = _hm.paramsets
+
+        if remote and remoteport:
+            remotes['default']['ip'] = remote
+            remotes['default']['port'] = remoteport
+            if resolvenames:
+                remotes['default']['resolvenames'] = resolvenames
+            if rpcusername:
+                remotes['default']['username'] = rpcusername
+            if rpcpassword:
+                remotes['default']['password'] = rpcpassword
+
+        self._server = _aiohm.AsyncServerThread(local=local,
+                                                localport=localport,
+                                                remotes=remotes,
+                                                devicefile=devicefile,
+                                                paramsetfile=paramsetfile,
+                                                interface_id=interface_id,
+                                                eventcallback=self._wrapCallback(eventcallback),
+                                                systemcallback=self._wrapCallback(systemcallback),
+                                                resolveparamsets=resolveparamsets)
+
+    def _wrapCallback(self, callback):
+        """Schedule coroutine callbacks on the event loop, no matter which thread invokes them."""
+        if not asyncio.iscoroutinefunction(callback):
+            return callback
+
+        @functools.wraps(callback)
+        def wrapper(*args, **kwargs):
+            if self._loop is None:
+                self._pending.append(functools.partial(callback, *args, **kwargs))
+                return
+            coro = callback(*args, **kwargs)
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is self._loop:
+                self._loop.create_task(coro)
+            else:
+                asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return wrapper
+
+    async def call(self, func, *args, **kwargs):
+        """Run a blocking function, e.g. a method of a device object, in the default executor."""
+        return await self._loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def start(self):
+        """
+        Start listening for events and initialize the proxies.
+        """
+        self._loop = asyncio.get_running_loop()
+        while self._pending:
+            self._loop.create_task(self._pending.pop(0)())
+        try:
+            await self._server.start()
+            await self.call(self._server.proxyInit)
+            return True
+        except Exception as err:
+            LOG.critical("Failed to start server: %s", err)
+            LOG.debug(str(err))
+            await self._server.stop()
+            return False
+
+    async def stop(self):
+        """
+        Stop the server.
+        """
+        try:
+            await self._server.stop()
+            self._server = None
+
+            # Device-storage clear
+            self.devices.clear()
+            self.devices_all.clear()
+            self.devices_raw.clear()
+            self.devices_raw_dict.clear()
+
+            return True
+        except Exception as err:
+            LOG.critical("Failed to stop server")
+            LOG.debug(str(err))
+            return False
+
+    async def reconnect(self):
+        """Reinit all RPC proxy."""
+        if self._server is not None:
+            await self.call(self._server.proxyInit)
+
+    def _proxy(self, remote):
+        return self._server.proxies["%s-%s" % (self._server._interface_id, remote)]
+
+    async def getValue(self, remote, address, key):
+        """Get a single value of a device channel"""
+        if self._server is not None:
+            return await self._proxy(remote)._aio.getValue(address, key)
+
+    async def setValue(self, remote, address, key, value):
+        """Set a single value of a device channel"""
+        if self._server is not None:
+            return await self._proxy(remote)._aio.setValue(address, key, value)
+
+    async def getParamset(self, remote, address, paramset):
+        """Get a paramset of a device or channel"""
+        if self._server is not None:
+            return await self._proxy(remote)._aio.getParamset(address, paramset)
+
+    async def putParamset(self, remote, address, paramset, value, rx_mode=None):
+        """Set paramsets manually"""
+        if self._server is not None:
+            try:
+                if rx_mode is None:
+                    return await self._proxy(remote)._aio.putParamset(address, paramset, value)
+                return await self._proxy(remote)._aio.putParamset(address, paramset, value, rx_mode)
+            except Exception as err:
+                LOG.debug("AsyncHMConnection.putParamset: Exception: %s" % str(err))
+
+    async def listDevices(self, remote):
+        """Get the device descriptions of a remote"""
+        if self._server is not None:
+            return await self._proxy(remote)._aio.listDevices("%s-%s" % (self._server._interface_id, remote))
+
+    async def getAllSystemVariables(self, remote):
+        """Get all system variables from CCU / Homegear"""
+        if self._server is not None:
+            return await self._server.asyncGetAllSystemVariables(remote)
+
+    async def getSystemVariable(self, remote, name):
+        """Get single system variable from CCU / Homegear"""
+        if self._server is not None:
+            return await self._server.asyncGetSystemVariable(remote, name)
+
+    async def deleteSystemVariable(self, remote, name):
+        """Delete a system variable from CCU / Homegear"""
+        if self._server is not None:
+            return await self._server.asyncDeleteSystemVariable(remote, name)
+
+    async def setSystemVariable(self, remote, name, value):
+        """Set a system variable on CCU / Homegear"""
+        if self._server is not None:
+            return await self._server.asyncSetSystemVariable(remote, name, value)
+
+    async def getServiceMessages(self, remote):
+        """Get service messages from CCU / Homegear"""
+        if self._server is not None:
+            return await self.call(self._server.getServiceMessages, remote)
+
+    async def listBidcosInterfaces(self, remote):
+        """Return all available BidCos Interfaces"""
+        if self._server is not None:
+            return await self.call(self._server.listBidcosInterfaces, remote)
+
+    def subscribe(self, callback, remote=None, address=None, channel=None, parameter=None):
+        """
+        Subscribe to events of a remote, device, channel and / or parameter. None or '*' match everything.
+        Signature for callback-functions: foo(address, interface_id, key, value), may be a coroutine function.
+        Returns a handle to remove the subscription with unsubscribe().
+        """
+        if self._server is not None:
+            return self._server.subscribe(self._wrapCallback(callback), remote, address, channel, parameter)
+
+    def unsubscribe(self, handle):
+        """Remove a subscription by its handle"""
+        if self._server is not None:
+            return self._server.unsubscribe(handle)
+
+    async def ping(self, remote):
+        """Send ping to CCU/Homegear to generate PONG-event"""
+        if self._server is not None:
+            await self.call(self._server.ping, remote)
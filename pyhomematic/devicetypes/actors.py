@@ -1,6 +1,6 @@
 
 import logging
-from pyhomematic.devicetypes.generic import HMDevice
+from pyhomematic.devicetypes.generic import HMDevice, ChannelTable
 from pyhomematic.devicetypes.sensors import HMSensor
 from pyhomematic.devicetypes.misc import HMEvent
 from pyhomematic.devicetypes.helper import (
@@ -142,11 +142,7 @@ class Dimmer(GenericDimmer, HelperInhibit, HelperWorking):
     """
     Dimmer switch that controls level of light brightness.
     """
-    @property
-    def ELEMENT(self):
-        if "Dim2L" in self._TYPE or "Dim2T" in self._TYPE  or self._TYPE == "HM-DW-WM":
-            return [1, 2]
-        return [1]
+    ELEMENT = ChannelTable(((("Dim2L", "Dim2T"), [1, 2]), ), default=[1], exact={"HM-DW-WM": [1, 2]})
 
 
 class KeyDimmer(GenericDimmer, HelperInhibit, HelperWorking, HelperActionPress):
@@ -180,25 +176,15 @@ class IPKeyDimmer(GenericDimmer, HelperActionPress):
     """
     IP Dimmer with buttons switch that controls level of light brightness.
     """
+    ELEMENT = ChannelTable(((("HMIP-DRDI3", ), [5, 9, 13]), ), default=[4], upper=True)
+    _KEY_CHANNELS = ChannelTable(((("HMIP-DRDI3", ), [1, 2, 3]), ), default=[1, 2], upper=True)
+
     def __init__(self, device_description, proxy, resolveparamsets=False):
         super().__init__(device_description, proxy, resolveparamsets)
 
-        channels = []
-        if "HMIP-DRDI3" in self.TYPE.upper():
-            channels = [1, 2, 3]
-        else:
-            channels = [1, 2]
-
         # init metadata
-        self.EVENTNODE.update({"PRESS_SHORT": channels,
-                               "PRESS_LONG": channels})
-
-    @property
-    def ELEMENT(self):
-        if "HMIP-DRDI3" in self.TYPE.upper():
-            return [5, 9, 13]
-        else:
-            return [4]
+        self.EVENTNODE.update({"PRESS_SHORT": self._KEY_CHANNELS,
+                               "PRESS_LONG": self._KEY_CHANNELS})
 
 
 class GenericSwitch(HMActor, HelperActorState):
@@ -777,6 +763,12 @@ class IPSwitchPowermeter(IPSwitch, HMSensor, HelperRssiDevice):
     """
     Switch turning plugged in device on or off and measuring energy consumption.
     """
+    _SENSOR_CHANNEL = ChannelTable((
+        (("HmIP-FSM", "HmIP-FSM16"), 5),
+        (("HMIP-PSM", "HmIP-PSM", "HmIP-PSM-2", "HmIP-USBSM", "HmIP-PSM-CH"), 6),
+        (("HmIP-BSM", ), 7),
+    ))
+
     def __init__(self, device_description, proxy, resolveparamsets=False):
         super().__init__(device_description, proxy, resolveparamsets)
 
@@ -784,14 +776,7 @@ class IPSwitchPowermeter(IPSwitch, HMSensor, HelperRssiDevice):
                                "PRESS_LONG": [1, 2]})
 
         # init metadata
-        sensorIndex = None
-        if "HmIP-FSM" in self.TYPE or "HmIP-FSM16" in self.TYPE:
-            sensorIndex = 5
-        elif "HMIP-PSM" in self.TYPE or "HmIP-PSM" in self.TYPE or "HmIP-PSM-2" in self.TYPE or "HmIP-USBSM" in self.TYPE or "HmIP-PSM-CH" in self.TYPE:
-            sensorIndex = 6
-        elif "HmIP-BSM" in self.TYPE:
-            sensorIndex = 7
-
+        sensorIndex = self._SENSOR_CHANNEL
         if sensorIndex is not None:
             self.SENSORNODE.update({"POWER": [sensorIndex],
                                     "CURRENT": [sensorIndex],
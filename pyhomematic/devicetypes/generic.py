@@ -1,3 +1,6 @@
+import asyncio
+import time
+import types
 import logging
 
 LOG = logging.getLogger(__name__)
@@ -10,25 +13,182 @@ PARAM_OPERATION_EVENT = 4
 PARAM_UNREACH = 'UNREACH'
 PARAMSET_VALUES = 'VALUES'
 
+# How getSensorData() & co. read datapoints: always from the CCU / Homegear, from the
+# value cache maintained by events, or from the cache if the value is at most READ_MAXAGE
+# seconds old. The cache policies fall back to getValue() on a miss.
+READ_REMOTE = 'remote'
+READ_CACHE = 'cache'
+READ_CACHE_MAXAGE = 'cache-maxage'
+READ_POLICIES = (READ_REMOTE, READ_CACHE, READ_CACHE_MAXAGE)
+READ_POLICY = READ_REMOTE
+READ_MAXAGE = 300
+
+# Where a cached value came from
+SOURCE_EVENT = 'event'
+SOURCE_GETVALUE = 'getValue'
+SOURCE_PARAMSET = 'paramset'
+
+_monotonic = time.monotonic
+
+NODES = ('_SENSORNODE', '_BINARYNODE', '_ATTRIBUTENODE', '_WRITENODE', '_EVENTNODE', '_ACTIONNODE')
+# (device class, TYPE) -> shared node tables, False if they can't be shared
+_NODE_METADATA = {}
+
+
+class DescriptionField():
+    """
+    Read-only attribute returning a field of the raw device description. Rarely used
+    fields are looked up on access instead of being copied into every object.
+    """
+    __slots__ = ('key', 'default')
+
+    def __init__(self, key, default=None):
+        self.key = key
+        self.default = default
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance._description.get(self.key, self.default)
+
+
+class ChannelTable():
+    """
+    Declarative TYPE -> channels mapping, usable as read-only attribute (e.g. ELEMENT).
+    rules is an ordered sequence of (substrings, channels), the first rule with a
+    substring contained in TYPE wins. exact maps complete TYPEs and is checked first,
+    default is returned if nothing matches. With upper, TYPE is matched in upper case.
+    Each TYPE is resolved once, later lookups are a dict lookup returning the same
+    (shared, not to be modified) channel list.
+    """
+
+    def __init__(self, rules, default=None, exact=None, upper=False):
+        self.rules = tuple((tuple(substrings), channels) for substrings, channels in rules)
+        self.default = default
+        self.exact = dict(exact or {})
+        self.upper = upper
+        self._resolved = {}
+
+    def resolve(self, devicetype):
+        """Channels for devicetype."""
+        try:
+            return self._resolved[devicetype]
+        except KeyError:
+            pass
+        channels = self.exact.get(devicetype, self)
+        if channels is self:
+            channels = self.default
+            name = devicetype.upper() if self.upper else devicetype
+            for substrings, rulechannels in self.rules:
+                if any(substring in name for substring in substrings):
+                    channels = rulechannels
+                    break
+        self._resolved[devicetype] = channels
+        return channels
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return self.resolve(instance._TYPE)
+
+
+class ValueStore(dict):
+    """
+    Value cache of a device or channel, a dict of key -> value. Values received from
+    the CCU / Homegear are stored with set(), which records the time.monotonic() of
+    their arrival and their source (SOURCE_EVENT, SOURCE_GETVALUE or SOURCE_PARAMSET)
+    in updated, created with the first of them. To keep events cheap, updated maps
+    keys of event values to their bare timestamp, all others to (timestamp, source).
+    """
+    __slots__ = ('updated', )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updated = None
+
+    def set(self, key, value, source):
+        self[key] = value
+        if self.updated is None:
+            self.updated = {}
+        self.updated[key] = _monotonic() if source == SOURCE_EVENT else (_monotonic(), source)
+
+    def _meta(self, key):
+        updated = (self.updated or {}).get(key)
+        if updated is None:
+            return None, None
+        if isinstance(updated, tuple):
+            return updated
+        return updated, SOURCE_EVENT
+
+    def entry(self, key):
+        """ (value, timestamp, source) of key. Timestamp and source are None if the value has not been received. """
+        return (self[key], ) + self._meta(key)
+
+    def timestamp(self, key):
+        """ time.monotonic() of the arrival of the value of key, None if it has not been received. """
+        return self._meta(key)[0]
+
+    def source(self, key):
+        """ Source of the value of key, None if it has not been received. """
+        return self._meta(key)[1]
+
+    def age(self, key, now=None):
+        """ Seconds since the value of key has been received, None if it has not been. """
+        timestamp = self.timestamp(key)
+        if timestamp is None:
+            return None
+        return (_monotonic() if now is None else now) - timestamp
+
+    def olderThan(self, seconds, now=None):
+        """ Keys of the values received more than seconds ago. """
+        if not self.updated:
+            return []
+        limit = (_monotonic() if now is None else now) - seconds
+        return [key for key in self.updated if self._meta(key)[0] < limit]
+
+
+class _ProxyRecorder():
+    """Forwards to a proxy and remembers whether it has been used."""
+
+    def __init__(self, proxy):
+        self._target = proxy
+        self.used = False
+
+    def __getattr__(self, name):
+        self.used = True
+        return getattr(self._target, name)
+
+    def __bool__(self):
+        self.used = True
+        return bool(self._target)
+
 
 class HMGeneric():
+    # Device objects are slotted to keep thousands of channels small. Subclasses
+    # without __slots__ of their own (the device types) get a __dict__ as usual.
+    __slots__ = ('_description', '_ADDRESS', '_PARAMSETS', '_TYPE', '_PARAMSET_DESCRIPTIONS',
+                 '_proxy', '_paramsets', '_eventcallbacks', '_name', '_VALUES', '__weakref__')
+
+    _FAMILY = DescriptionField('FAMILY')
+    _FLAGS = DescriptionField('FLAGS')
+    _ID = DescriptionField('ID')
+    _VERSION = DescriptionField('VERSION')
+
     # pylint: disable=unused-argument
     def __init__(self, device_description, proxy, resolveparamsets):
         # These properties are available for every device and its channels
+        self._description = device_description
         self._ADDRESS = device_description.get('ADDRESS')
-        LOG.debug("HMGeneric.__init__: device_description: " + str(self._ADDRESS) + " : " + str(device_description))
-        self._FAMILY = device_description.get('FAMILY')
-        self._FLAGS = device_description.get('FLAGS')
-        self._ID = device_description.get('ID')
+        LOG.debug("HMGeneric.__init__: device_description: %s : %s", self._ADDRESS, device_description)
         self._PARAMSETS = device_description.get('PARAMSETS')
-        self._PARAMSET_DESCRIPTIONS = {}
         self._TYPE = device_description.get('TYPE')
-        self._VERSION = device_description.get('VERSION')
+        # Created when needed
+        self._PARAMSET_DESCRIPTIONS = None
+        self._paramsets = None
+        self._eventcallbacks = ()
         self._proxy = proxy
-        self._paramsets = {}
-        self._eventcallbacks = []
         self._name = None
-        self._VALUES = {}   # Dictionary to cache values. They are updated in the event() function.
+        self._VALUES = ValueStore()   # Cache of values. They are updated in the event() function.
         self._VALUES[PARAM_UNREACH] = None
 
     @property
@@ -41,6 +201,8 @@ class HMGeneric():
 
     @property
     def PARAMSETS(self):
+        if self._paramsets is None:
+            self._paramsets = {}
         return self._paramsets
 
     @property
@@ -55,26 +217,63 @@ class HMGeneric():
         """
         Handle the event received by server.
         """
-        LOG.debug(
-            "HMGeneric.event: address=%s, interface_id=%s, key=%s, value=%s"
-            % (self._ADDRESS, interface_id, key, value))
+        LOG.debug("HMGeneric.event: address=%s, interface_id=%s, key=%s, value=%s",
+                  self._ADDRESS, interface_id, key, value)
 
-        self._VALUES[key] = value   # Cache the value
+        # Cache the value, ValueStore.set() inlined
+        values = self._VALUES
+        values[key] = value
+        updated = values.updated
+        if updated is None:
+            updated = values.updated = {}
+        updated[key] = _monotonic()
 
         for callback in self._eventcallbacks:
-            LOG.debug("HMGeneric.event: Using callback %s", str(callback))
+            LOG.debug("HMGeneric.event: Using callback %s", callback)
             callback(self._ADDRESS, interface_id, key, value)
 
+    def valueAge(self, key):
+        """ Seconds since the cached value of key has been updated, None if it never was. """
+        return self._VALUES.age(key)
+
+    def valueSource(self, key):
+        """ Where the cached value of key came from: SOURCE_EVENT, SOURCE_GETVALUE, SOURCE_PARAMSET or None. """
+        return self._VALUES.source(key)
+
+    def staleValues(self, maxage):
+        """ Keys of the cached values which have not been updated for more than maxage seconds. """
+        return self._VALUES.olderThan(maxage)
+
+    def _addEventCallback(self, callback):
+        if not self._eventcallbacks:
+            self._eventcallbacks = []
+        self._eventcallbacks.append(callback)
+
+    def _setParamsetDescription(self, paramset, description):
+        if self._PARAMSET_DESCRIPTIONS is None:
+            self._PARAMSET_DESCRIPTIONS = {}
+        self._PARAMSET_DESCRIPTIONS[paramset] = description
+
     def getParamsetDescription(self, paramset):
         """
         Descriptions for paramsets are available to determine what can be don with the device.
         """
         try:
-            self._PARAMSET_DESCRIPTIONS[paramset] = self._proxy.getParamsetDescription(self._ADDRESS, paramset)
+            self._setParamsetDescription(paramset, self._proxy.getParamsetDescription(self._ADDRESS, paramset))
         except Exception as err:
             LOG.error("HMGeneric.getParamsetDescription: Exception: %s", err)
             return False
 
+    async def asyncGetParamsetDescription(self, paramset):
+        """
+        Coroutine counterpart of getParamsetDescription().
+        """
+        try:
+            self._setParamsetDescription(paramset, await self._proxy._aio.getParamsetDescription(self._ADDRESS, paramset))
+        except Exception as err:
+            LOG.error("HMGeneric.asyncGetParamsetDescription: Exception: %s", err)
+            return False
+
     def updateParamset(self, paramset):
         """
         Devices should not update their own paramsets. They rely on the state of the server.
@@ -85,16 +284,35 @@ class HMGeneric():
                 if self._proxy:
                     returnset = self._proxy.getParamset(self._ADDRESS, paramset)
                     if returnset:
-                        self._paramsets[paramset] = returnset
+                        self.PARAMSETS[paramset] = returnset
                         if self.PARAMSETS:
                             if self.PARAMSETS.get(PARAMSET_VALUES):
-                                self._VALUES[PARAM_UNREACH] = self.PARAMSETS.get(PARAMSET_VALUES).get(PARAM_UNREACH)
+                                self._VALUES.set(PARAM_UNREACH, self.PARAMSETS.get(PARAMSET_VALUES).get(PARAM_UNREACH), SOURCE_PARAMSET)
                         return True
             return False
         except Exception as err:
             LOG.debug("HMGeneric.updateParamset: Exception: %s, %s, %s" % (str(err), str(self._ADDRESS), str(paramset)))
             return False
 
+    async def asyncUpdateParamset(self, paramset):
+        """
+        Coroutine counterpart of updateParamset().
+        """
+        try:
+            if paramset:
+                if self._proxy:
+                    returnset = await self._proxy._aio.getParamset(self._ADDRESS, paramset)
+                    if returnset:
+                        self.PARAMSETS[paramset] = returnset
+                        if self.PARAMSETS:
+                            if self.PARAMSETS.get(PARAMSET_VALUES):
+                                self._VALUES.set(PARAM_UNREACH, self.PARAMSETS.get(PARAMSET_VALUES).get(PARAM_UNREACH), SOURCE_PARAMSET)
+                        return True
+            return False
+        except Exception as err:
+            LOG.debug("HMGeneric.asyncUpdateParamset: Exception: %s, %s, %s" % (str(err), str(self._ADDRESS), str(paramset)))
+            return False
+
     def updateParamsets(self):
         """
         Devices should update their own paramsets. They rely on the state of the server. Hence we pull all paramsets.
@@ -107,6 +325,17 @@ class HMGeneric():
             LOG.error("HMGeneric.updateParamsets: Exception: %s", err)
             return False
 
+    async def asyncUpdateParamsets(self):
+        """
+        Coroutine counterpart of updateParamsets(). The paramsets are fetched concurrently.
+        """
+        try:
+            await asyncio.gather(*(self.asyncUpdateParamset(ps) for ps in self._PARAMSETS))
+            return True
+        except Exception as err:
+            LOG.error("HMGeneric.asyncUpdateParamsets: Exception: %s", err)
+            return False
+
     def putParamset(self, paramset, data={}, rx_mode=None):
         """
         Some devices act upon changes to paramsets.
@@ -130,44 +359,79 @@ class HMGeneric():
             LOG.error("HMGeneric.putParamset: Exception: %s", err)
             return False
 
+    async def asyncPutParamset(self, paramset, data={}, rx_mode=None):
+        """
+        Coroutine counterpart of putParamset().
+        """
+        try:
+            if paramset in self._PARAMSETS and data:
+                if rx_mode is None:
+                    await self._proxy._aio.putParamset(self._ADDRESS, paramset, data)
+                else:
+                    await self._proxy._aio.putParamset(self._ADDRESS, paramset, data, rx_mode)
+                await self.asyncUpdateParamsets()
+                return True
+            else:
+                return False
+        except Exception as err:
+            LOG.error("HMGeneric.asyncPutParamset: Exception: %s", err)
+            return False
+
 
 class HMChannel(HMGeneric):
+    __slots__ = ('_PARENT', )
+
+    # These properties only exist for device-channels
+    _AES_ACTIVE = DescriptionField('AES_ACTIVE')
+    _DIRECTION = DescriptionField('DIRECTION')
+    _INDEX = DescriptionField('INDEX')
+    _LINK_SOURCE_ROLES = DescriptionField('LINK_SOURCE_ROLES')
+    _LINK_TARGET_ROLES = DescriptionField('LINK_TARGET_ROLES')
+    _PARENT_TYPE = DescriptionField('PARENT_TYPE')
+
+    # Optional properties of device-channels
+    _GROUP = DescriptionField('GROUP')
+    _TEAM = DescriptionField('TEAM')
+    _TEAM_TAG = DescriptionField('TEAM_TAG')
+    _TEAM_CHANNELS = DescriptionField('TEAM_CHANNELS')
+
+    # Not in specification, but often present
+    _CHANNEL = DescriptionField('CHANNEL')
+
     def __init__(self, device_description, proxy, resolveparamsets=False):
         super().__init__(device_description, proxy, resolveparamsets)
 
-        # These properties only exist for device-channels
         self._PARENT = device_description.get('PARENT')
-        self._AES_ACTIVE = device_description.get('AES_ACTIVE')
-        self._DIRECTION = device_description.get('DIRECTION')
-        self._INDEX = device_description.get('INDEX')
-        self._LINK_SOURCE_ROLES = device_description.get('LINK_SOURCE_ROLES')
-        self._LINK_TARGET_ROLES = device_description.get('LINK_TARGET_ROLES')
-        self._PARENT_TYPE = device_description.get('PARENT_TYPE')
 
         # We set the name to the parents address initially
-        self._name = device_description.get('ADDRESS')
-
-        # Optional properties of device-channels
-        self._GROUP = device_description.get('GROUP')
-        self._TEAM = device_description.get('TEAM')
-        self._TEAM_TAG = device_description.get('TEAM_TAG')
-        self._TEAM_CHANNELS = device_description.get('TEAM_CHANNELS')
-
-        # Not in specification, but often present
-        self._CHANNEL = device_description.get('CHANNEL')
+        self._name = self._ADDRESS
 
         if resolveparamsets:
             self.updateParamsets()
 
-    def getCachedOrUpdatedValue(self, key):
+    def getCachedOrUpdatedValue(self, key, maxage=None):
         """ Gets the device's value with the given key.
 
-        If the key is not found in the cache, the value is queried from the host.
+        If the key is not found in the cache, or with maxage its value is older
+        than maxage seconds, the value is queried from the host.
         """
-        try:
+        if self._isCached(key, maxage):
             return self._VALUES[key]
-        except KeyError:
-            return self.getValue(key)
+        return self.getValue(key)
+
+    async def asyncGetCachedOrUpdatedValue(self, key, maxage=None):
+        """ Coroutine counterpart of getCachedOrUpdatedValue(). """
+        if self._isCached(key, maxage):
+            return self._VALUES[key]
+        return await self.asyncGetValue(key)
+
+    def _isCached(self, key, maxage=None):
+        if key not in self._VALUES:
+            return False
+        if maxage is None:
+            return True
+        age = self.valueAge(key)
+        return age is not None and age <= maxage
 
     @property
     def PARENT(self):
@@ -184,7 +448,7 @@ class HMChannel(HMGeneric):
         Signature for callback-functions: foo(address, interface_id, key, value).
         """
         if hasattr(callback, '__call__'):
-            self._eventcallbacks.append(callback)
+            self._addEventCallback(callback)
 
     def setValue(self, key, value):
         """
@@ -199,6 +463,19 @@ class HMChannel(HMGeneric):
                       self._ADDRESS, err)
             return False
 
+    async def asyncSetValue(self, key, value):
+        """
+        Coroutine counterpart of setValue().
+        """
+        LOG.debug("HMGeneric.asyncSetValue: address = '%s', key = '%s' value = '%s'", self._ADDRESS, key, value)
+        try:
+            await self._proxy._aio.setValue(self._ADDRESS, key, value)
+            return True
+        except Exception as err:
+            LOG.error("HMGeneric.asyncSetValue: %s on %s Exception: %s", key,
+                      self._ADDRESS, err)
+            return False
+
     def getValue(self, key):
         """
         Some devices allow to directly get values for specific parameters.
@@ -206,15 +483,49 @@ class HMChannel(HMGeneric):
         LOG.debug("HMGeneric.getValue: address = '%s', key = '%s'", self._ADDRESS, key)
         try:
             returnvalue = self._proxy.getValue(self._ADDRESS, key)
-            self._VALUES[key] = returnvalue
+            self._VALUES.set(key, returnvalue, SOURCE_GETVALUE)
             return returnvalue
         except Exception as err:
             LOG.info("HMGeneric.getValue: %s on %s Exception: %s", key,
                      self._ADDRESS, err)
             return False
 
+    async def asyncGetValue(self, key):
+        """
+        Coroutine counterpart of getValue().
+        """
+        LOG.debug("HMGeneric.asyncGetValue: address = '%s', key = '%s'", self._ADDRESS, key)
+        try:
+            returnvalue = await self._proxy._aio.getValue(self._ADDRESS, key)
+            self._VALUES.set(key, returnvalue, SOURCE_GETVALUE)
+            return returnvalue
+        except Exception as err:
+            LOG.info("HMGeneric.asyncGetValue: %s on %s Exception: %s", key,
+                     self._ADDRESS, err)
+            return False
+
 
+# Every accessor comes in a blocking and a coroutine variant
+# pylint: disable=too-many-public-methods
 class HMDevice(HMGeneric):
+    __slots__ = ('_hmchannels', '_SENSORNODE', '_BINARYNODE', '_ATTRIBUTENODE',
+                 '_WRITENODE', '_EVENTNODE', '_ACTIONNODE', '_readpolicy')
+
+    # These properties only exist for interfaces themselves
+    _CHILDREN = DescriptionField('CHILDREN')
+    _RF_ADDRESS = DescriptionField('RF_ADDRESS')
+
+    # Optional properties might not always be present
+    _CHANNELS = DescriptionField('CHANNELS', ())
+    _PHYSICAL_ADDRESS = DescriptionField('PHYSICAL_ADDRESS')
+    _INTERFACE = DescriptionField('INTERFACE')
+    _ROAMING = DescriptionField('ROAMING')
+    _RX_MODE = DescriptionField('RX_MODE')
+    _FIRMWARE = DescriptionField('FIRMWARE')
+    _AVAILABLE_FIRMWARE = DescriptionField('AVAILABLE_FIRMWARE')
+    _UPDATABLE = DescriptionField('UPDATABLE')
+    _PARENT_TYPE = None
+
     def __init__(self, device_description, proxy, resolveparamsets=False):
         super().__init__(device_description, proxy, resolveparamsets)
 
@@ -232,27 +543,48 @@ class HMDevice(HMGeneric):
         self._EVENTNODE = {}
         self._ACTIONNODE = {}
 
-        # These properties only exist for interfaces themselves
-        self._CHILDREN = device_description.get('CHILDREN')
-        self._RF_ADDRESS = device_description.get('RF_ADDRESS')
+        # (policy, maxage), None = READ_POLICY and READ_MAXAGE
+        self._readpolicy = None
 
         # We set the name to the address initially
-        self._name = device_description.get('ADDRESS')
+        self._name = self._ADDRESS
 
-        # Optional properties might not always be present
-        if 'CHANNELS' in device_description:
-            self._CHANNELS = device_description['CHANNELS']
-        else:
-            self._CHANNELS = []
-
-        self._PHYSICAL_ADDRESS = device_description.get('PHYSICAL_ADDRESS')
-        self._INTERFACE = device_description.get('INTERFACE')
-        self._ROAMING = device_description.get('ROAMING')
-        self._RX_MODE = device_description.get('RX_MODE')
-        self._FIRMWARE = device_description.get('FIRMWARE')
-        self._AVAILABLE_FIRMWARE = device_description.get('AVAILABLE_FIRMWARE')
-        self._UPDATABLE = device_description.get('UPDATABLE')
-        self._PARENT_TYPE = None
+    @classmethod
+    def fromDescription(cls, device_description, proxy, resolveparamsets=False):
+        """
+        Create a device object sharing its datapoint metadata with all devices of the same class and TYPE.
+        The node tables are compiled by the first device, later devices skip the __init__ of the device
+        type. Device types whose __init__ does more than filling the node tables (other attributes, calls
+        to the CCU / Homegear) are always constructed the regular way with node tables of their own.
+        Shared node tables are read-only mappings with tuples of channels.
+        """
+        key = (cls, device_description.get('TYPE'))
+        nodes = _NODE_METADATA.get(key)
+        if nodes is None:
+            recorder = _ProxyRecorder(proxy)
+            device = cls(device_description, recorder, resolveparamsets)
+            device._proxy = proxy
+            if recorder.used or getattr(device, '__dict__', None):
+                _NODE_METADATA[key] = False
+                return device
+            nodes = _NODE_METADATA[key] = tuple(
+                types.MappingProxyType({name: tuple(channels) for name, channels in getattr(device, node).items()})
+                for node in NODES)
+            device._setNodes(nodes)
+            return device
+        if nodes is False:
+            return cls(device_description, proxy, resolveparamsets)
+        device = cls.__new__(cls)
+        HMGeneric.__init__(device, device_description, proxy, resolveparamsets)
+        device._hmchannels = {}
+        device._readpolicy = None
+        device._name = device._ADDRESS
+        device._setNodes(nodes)
+        return device
+
+    def _setNodes(self, nodes):
+        for node, table in zip(NODES, nodes):
+            setattr(self, node, table)
 
     def getCachedOrUpdatedValue(self, key, channel=None):
         """ Gets the channel's value with the given key.
@@ -266,9 +598,40 @@ class HMDevice(HMGeneric):
         try:
             return self._VALUES[key]
         except KeyError:
-            value = self._VALUES[key] = self.getValue(key)
+            value = self.getValue(key)
+            self._VALUES.set(key, value, SOURCE_GETVALUE)
+            return value
+
+    async def asyncGetCachedOrUpdatedValue(self, key, channel=None):
+        """ Coroutine counterpart of getCachedOrUpdatedValue(). """
+        if channel:
+            return await self._hmchannels[channel].asyncGetCachedOrUpdatedValue(key)
+
+        try:
+            return self._VALUES[key]
+        except KeyError:
+            value = await self.asyncGetValue(key)
+            self._VALUES.set(key, value, SOURCE_GETVALUE)
             return value
 
+    def setReadPolicy(self, policy=None, maxage=None):
+        """
+        Set how getSensorData() & co. read datapoints: READ_REMOTE, READ_CACHE or
+        READ_CACHE_MAXAGE with values at most maxage seconds old (default READ_MAXAGE).
+        None resets the device to the module-wide READ_POLICY.
+        """
+        if policy is None:
+            self._readpolicy = None
+            return
+        if policy not in READ_POLICIES:
+            raise ValueError("Unknown read policy %s" % policy)
+        self._readpolicy = (policy, READ_MAXAGE if maxage is None else maxage)
+
+    @property
+    def READPOLICY(self):
+        """ (policy, maxage) used by getSensorData() & co. """
+        return self._readpolicy or (READ_POLICY, READ_MAXAGE)
+
     @property
     def UNREACH(self):
         """ Returns true if the device or any children is not reachable """
@@ -324,6 +687,48 @@ class HMDevice(HMGeneric):
         """ Returns a sensor node """
         return self._getNodeData(name, self._WRITENODE, channel)
 
+    async def asyncGetAttributeData(self, name, channel=None):
+        """ Coroutine counterpart of getAttributeData() """
+        return await self._asyncGetNodeData(name, self._ATTRIBUTENODE, channel)
+
+    async def asyncGetBinaryData(self, name, channel=None):
+        """ Coroutine counterpart of getBinaryData() """
+        return await self._asyncGetNodeData(name, self._BINARYNODE, channel)
+
+    async def asyncGetSensorData(self, name, channel=None):
+        """ Coroutine counterpart of getSensorData() """
+        return await self._asyncGetNodeData(name, self._SENSORNODE, channel)
+
+    async def asyncGetWriteData(self, name, channel=None):
+        """ Coroutine counterpart of getWriteData() """
+        return await self._asyncGetNodeData(name, self._WRITENODE, channel)
+
+    def _nodeChannel(self, name, metadata, channel=None):
+        """ Returns the channel of a data point or None """
+        nodeChannelList = metadata[name]
+        if len(nodeChannelList) > 1:
+            return channel if channel is not None else nodeChannelList[0]
+        elif len(nodeChannelList) == 1:
+            return nodeChannelList[0]
+        return None
+
+    async def _asyncGetNodeData(self, name, metadata, channel=None):
+        """ Coroutine counterpart of _getNodeData() """
+        if name in metadata:
+            nodeChannel = self._nodeChannel(name, metadata, channel)
+            if nodeChannel is None:
+                LOG.warning("HMDevice._asyncGetNodeData: %s not found in %s, empty nodeChannelList" % (name, metadata))
+                return None
+            if nodeChannel in self.CHANNELS:
+                policy, maxage = self.READPOLICY
+                if policy == READ_REMOTE:
+                    return await self._hmchannels[nodeChannel].asyncGetValue(name)
+                return await self._hmchannels[nodeChannel].asyncGetCachedOrUpdatedValue(
+                    name, maxage if policy == READ_CACHE_MAXAGE else None)
+
+        LOG.error("HMDevice._asyncGetNodeData: %s not found in %s" % (name, metadata))
+        return None
+
     def _getNodeData(self, name, metadata, channel=None):
         """ Returns a data point from data"""
         nodeChannel = None
@@ -337,7 +742,11 @@ class HMDevice(HMGeneric):
                 LOG.warning("HMDevice._getNodeData: %s not found in %s, empty nodeChannelList" % (name, metadata))
                 return None
             if nodeChannel is not None and nodeChannel in self.CHANNELS:
-                return self._hmchannels[nodeChannel].getValue(name)
+                policy, maxage = self.READPOLICY
+                if policy == READ_REMOTE:
+                    return self._hmchannels[nodeChannel].getValue(name)
+                return self._hmchannels[nodeChannel].getCachedOrUpdatedValue(
+                    name, maxage if policy == READ_CACHE_MAXAGE else None)
 
         LOG.error("HMDevice._getNodeData: %s not found in %s" % (name, metadata))
         return None
@@ -364,6 +773,24 @@ class HMDevice(HMGeneric):
                   (name, data, nodeChannel))
         return False
 
+    async def asyncWriteNodeData(self, name, data, channel=None):
+        return await self._asyncSetNodeData(name, self.WRITENODE, data, channel)
+
+    async def asyncActionNodeData(self, name, data, channel=None):
+        return await self._asyncSetNodeData(name, self.ACTIONNODE, data, channel)
+
+    async def _asyncSetNodeData(self, name, metadata, data, channel=None):
+        """ Coroutine counterpart of _setNodeData() """
+        nodeChannel = None
+        if name in metadata:
+            nodeChannel = self._nodeChannel(name, metadata, channel)
+            if nodeChannel is not None and nodeChannel in self.CHANNELS:
+                return await self._hmchannels[nodeChannel].asyncSetValue(name, data)
+
+        LOG.error("HMDevice._asyncSetNodeData: %s not found with value %s on %s" %
+                  (name, data, nodeChannel))
+        return False
+
     def get_rssi(self, channel=0):
         """
         This is a stub method which is implemented by the helpers
@@ -390,12 +817,12 @@ class HMDevice(HMGeneric):
         """
         if hasattr(callback, '__call__'):
             if channel == 0:
-                self._eventcallbacks.append(callback)
+                self._addEventCallback(callback)
             elif not bequeath and channel > 0 and channel in self._hmchannels:
-                self._hmchannels[channel]._eventcallbacks.append(callback)
+                self._hmchannels[channel]._addEventCallback(callback)
             if bequeath:
                 for channel, device in self._hmchannels.items():
-                    device._eventcallbacks.append(callback)
+                    device._addEventCallback(callback)
 
     def setValue(self, key, value, channel=1):
         """
@@ -414,3 +841,21 @@ class HMDevice(HMGeneric):
             return self.CHANNELS[channel].getValue(key)
 
         LOG.error("HMDevice.getValue: channel not found %i!" % channel)
+
+    async def asyncSetValue(self, key, value, channel=1):
+        """
+        Coroutine counterpart of setValue().
+        """
+        if channel in self.CHANNELS:
+            return await self.CHANNELS[channel].asyncSetValue(key, value)
+
+        LOG.error("HMDevice.asyncSetValue: channel not found %i!" % channel)
+
+    async def asyncGetValue(self, key, channel=1):
+        """
+        Coroutine counterpart of getValue().
+        """
+        if channel in self.CHANNELS:
+            return await self.CHANNELS[channel].asyncGetValue(key)
+
+        LOG.error("HMDevice.asyncGetValue: channel not found %i!" % channel)
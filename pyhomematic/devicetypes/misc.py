@@ -1,5 +1,5 @@
 import logging
-from pyhomematic.devicetypes.generic import HMDevice
+from pyhomematic.devicetypes.generic import HMDevice, ChannelTable
 from pyhomematic.devicetypes.helper import HelperActionPress, \
     HelperEventRemote, HelperEventPress, HelperRssiPeer, HelperLowBatIP, \
     HelperLowBat, HelperOperatingVoltageIP
@@ -26,41 +26,25 @@ class RemoteVirtual(HMCCU, HelperEventRemote, HelperActionPress):
 class Remote(HMEvent, HelperEventRemote, HelperActionPress, HelperRssiPeer):
     """Remote handle buttons."""
 
-    @property
-    def ELEMENT(self):
-        if "RC-2" in self.TYPE or "PB-2" in self.TYPE or "WRC2" in self.TYPE or "BRC2" in self.TYPE or "WRCC2" in self.TYPE:
-            return [1, 2]
-        if "HM-Dis-WM55" in self.TYPE or "HM-Dis-EP-WM55" in self.TYPE:
-            return [1, 2]
-        if "HM-RC-Dis-H-x-EU" in self.TYPE:
-            return list(range(1, 21))
-        if "Sec3" in self.TYPE or "Key3" in self.TYPE:
-            return [1, 2, 3]
-        if "RC-4" in self.TYPE or "PB-4" in self.TYPE:
-            return [1, 2, 3, 4]
-        if "HM-PBI-4-FM" in self.TYPE or "ZEL STG RM FST UP4" in self.TYPE or "263 145" in self.TYPE or "HM-PBI-X" in self.TYPE:
-            return [1, 2, 3, 4]
-        if "Sec4" in self.TYPE or "Key4" in self.TYPE or "KRCA" in self.TYPE or "KRC4" in self.TYPE:
-            return [1, 2, 3, 4]
-        if "PB-6" in self.TYPE or "WRC6" in self.TYPE:
-            return [1, 2, 3, 4, 5, 6]
-        if "RC-8" in self.TYPE or "HM-MOD-EM-8" in self.TYPE:
-            return [1, 2, 3, 4, 5, 6, 7, 8]
-        if "RC-12" in self.TYPE:
-            return [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
-        if "HM-OU-LED16" in self.TYPE:
-            return list(range(1, 16))
-        if "RC-19" in self.TYPE or "HM-PB-4Dis-WM" in self.TYPE:
-            return list(range(1, 20))
-        if "HMW-IO-4-FM" in self.TYPE:
-            return [1, 2, 3, 4]
-        if "HmIP-RC8" in self.TYPE:
-            return [1, 2, 3, 4, 5, 6, 7, 8]
-        if "HmIP-MOD-RC8" in self.TYPE:
-            return [1, 2, 3, 4, 5, 6, 7, 8]
-        if "HmIP-WRCD" in self.TYPE or "HmIP-WRCR" in self.TYPE:
-            return [1, 2, 3]
-        return [1]
+    ELEMENT = ChannelTable((
+        (("RC-2", "PB-2", "WRC2", "BRC2", "WRCC2"), [1, 2]),
+        (("HM-Dis-WM55", "HM-Dis-EP-WM55"), [1, 2]),
+        (("HM-RC-Dis-H-x-EU", ), list(range(1, 21))),
+        (("Sec3", "Key3"), [1, 2, 3]),
+        (("RC-4", "PB-4"), [1, 2, 3, 4]),
+        (("HM-PBI-4-FM", "ZEL STG RM FST UP4", "263 145", "HM-PBI-X"), [1, 2, 3, 4]),
+        (("Sec4", "Key4", "KRCA", "KRC4"), [1, 2, 3, 4]),
+        (("PB-6", "WRC6"), [1, 2, 3, 4, 5, 6]),
+        (("RC-8", "HM-MOD-EM-8"), [1, 2, 3, 4, 5, 6, 7, 8]),
+        (("RC-12", ), [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]),
+        (("HM-OU-LED16", ), list(range(1, 16))),
+        (("RC-19", "HM-PB-4Dis-WM"), list(range(1, 20))),
+        (("HMW-IO-4-FM", ), [1, 2, 3, 4]),
+        (("HmIP-RC8", ), [1, 2, 3, 4, 5, 6, 7, 8]),
+        (("HmIP-MOD-RC8", ), [1, 2, 3, 4, 5, 6, 7, 8]),
+        (("HmIP-WRCD", "HmIP-WRCR"), [1, 2, 3]),
+    ), default=[1])
+
 
 class RemoteWired(HMEvent, HelperEventRemote, HelperActionPress):
     """Wired Remote handle buttons."""
@@ -11,17 +11,14 @@ class HMThermostat(HMDevice):
     HM-CC-RT-DN, HM-CC-RT-DN-BoM
     ClimateControl-RadiatorThermostat that measures temperature and allows to set a target temperature or use some automatic mode.
     """
-    def __init__(self, device_description, proxy, resolveparamsets=False):
-        super().__init__(device_description, proxy, resolveparamsets)
-
-        # constante
-        self.AUTO_MODE = 0
-        self.MANU_MODE = 1
-        self.PARTY_MODE = 2
-        self.BOOST_MODE = 3
-        self.COMFORT_MODE = 4
-        self.LOWERING_MODE = 5
-        self.OFF_VALUE = 4.5
+    # constante
+    AUTO_MODE = 0
+    MANU_MODE = 1
+    PARTY_MODE = 2
+    BOOST_MODE = 3
+    COMFORT_MODE = 4
+    LOWERING_MODE = 5
+    OFF_VALUE = 4.5
 
     def actual_temperature(self):
         """ Returns the current temperature. """
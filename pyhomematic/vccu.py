@@ -1,12 +1,16 @@
 import os
 import time
+import socket
 import logging
 import threading
+import socketserver
 from xmlrpc.server import SimpleXMLRPCServer
 from xmlrpc.server import SimpleXMLRPCRequestHandler
 import xmlrpc.client
 import json
 
+from pyhomematic import _binrpc
+
 LOG = logging.getLogger(__name__)
 LOCAL = "127.0.0.1"
 LOCALPORT = 2001
@@ -46,6 +50,7 @@ class RPCFunctions():
     def __init__(self):
         LOG.debug("RPCFunctions.__init__")
         self.remotes = {}
+        self.dutycycle = 0
         try:
             script_dir = os.path.dirname(__file__)
             rel_path = DEVICE_DESCRIPTIONS
@@ -77,19 +82,41 @@ class RPCFunctions():
         LOG.debug("RPCFunctions.getServiceMessages")
         return [['VCU0000001:1', 'ERROR', 7]]
 
+    def ping(self, callerId):
+        LOG.debug("RPCFunctions.ping: callerId=%s" % callerId)
+        return True
+
+    def listBidcosInterfaces(self):
+        LOG.debug("RPCFunctions.listBidcosInterfaces")
+        return [{'ADDRESS': 'VCU0000000', 'CONNECTED': True, 'DEFAULT': True,
+                 'DESCRIPTION': '', 'DUTY_CYCLE': self.dutycycle}]
+
     def getValue(self, address, value_key):
         LOG.debug("RPCFunctions.getValue: address=%s, value_key=%s" % (address, value_key))
         return True
 
+    def getParamset(self, address, paramset_key):
+        LOG.debug("RPCFunctions.getParamset: address=%s, paramset_key=%s" % (address, paramset_key))
+        if paramset_key != "VALUES":
+            return {}
+        return {"LEVEL": 0.0, "STATE": False, "WORKING": False, "DIRECTION": 0,
+                "ERROR": 0, "LOWBAT": False, "UNREACH": False, "INFO": address}
+
     def setValue(self, address, value_key, value):
         LOG.debug("RPCFunctions.getValue: address=%s, value_key=%s, value=%s" % (address, value_key, value))
         return ""
 
+    def getVersion(self):
+        return "pyhomematic VCCU"
+
     def init(self, url, interface_id=None):
         LOG.debug("RPCFunctions.init: url=%s, interface_id=%s" % (url, interface_id))
         if interface_id:
             try:
-                self.remotes[interface_id] = LockingServerProxy(url)
+                if url.startswith("%s://" % _binrpc.SCHEME):
+                    self.remotes[interface_id] = _binrpc.ServerProxy(url)
+                else:
+                    self.remotes[interface_id] = LockingServerProxy(url)
                 t = threading.Thread(name='_askDevices', target=self._askDevices, args=(interface_id, ))
                 t.start()
             except Exception as err:
@@ -97,9 +124,27 @@ class RPCFunctions():
         return ""
 
 class RequestHandler(SimpleXMLRPCRequestHandler):
-    """We handle requests to / and /RPC2"""
+    """We handle requests to / and /RPC2, and BIN-RPC connections"""
     rpc_paths = ('/', '/RPC2',)
 
+    def handle(self):
+        try:
+            magic = self.request.recv(len(_binrpc.MAGIC), socket.MSG_PEEK | socket.MSG_WAITALL)
+        except OSError:
+            return
+        if magic != _binrpc.MAGIC:
+            super().handle()
+            return
+        try:
+            _binrpc.serve(self.rfile, self.wfile, self.server._dispatch)
+        except (OSError, _binrpc.BinRpcError) as err:
+            LOG.debug("RequestHandler.handle: BIN-RPC connection closed: %s" % err)
+
+class XMLRPCServer(socketserver.ThreadingMixIn, SimpleXMLRPCServer):
+    """Handle each connection in a thread of its own, BIN-RPC connections stay open"""
+    daemon_threads = True
+    block_on_close = False
+
 class ServerThread(threading.Thread):
     """XML-RPC server thread to handle messages from CCU / Homegear"""
     def __init__(self, local=LOCAL, localport=LOCALPORT):
@@ -114,9 +159,9 @@ class ServerThread(threading.Thread):
 
         # Setup server to handle requests from CCU / Homegear
         LOG.debug("ServerThread.__init__: Setting up server")
-        self.server = SimpleXMLRPCServer((self._local, self._localport),
-                                         requestHandler=RequestHandler,
-                                         logRequests=False)
+        self.server = XMLRPCServer((self._local, self._localport),
+                                   requestHandler=RequestHandler,
+                                   logRequests=False)
         self._localport = self.server.socket.getsockname()[1]
         self.server.register_introspection_functions()
         self.server.register_multicall_functions()
@@ -129,6 +174,12 @@ class ServerThread(threading.Thread):
                  (self._local, self._localport))
         self.server.serve_forever()
 
+    def sendEvents(self, interface_id, events):
+        """Send events given as (address, value_key, value) to the client registered with interface_id"""
+        proxy = self._rpcfunctions.remotes[interface_id]
+        for address, value_key, value in events:
+            proxy.event(interface_id, address, value_key, value)
+
     def stop(self):
         """Shut down our XML-RPC server."""
         LOG.info("Shutting down server")
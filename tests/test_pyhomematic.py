@@ -4,10 +4,25 @@ import logging
 import time
 import socket
 import json
+import tempfile
+import threading
+import asyncio
+import http.client
+import xmlrpc.client
 
 from pyhomematic import vccu
-from pyhomematic import HMConnection
+from pyhomematic import HMConnection, AsyncHMConnection
 from pyhomematic import devicetypes
+from pyhomematic.devicetypes import generic
+from pyhomematic import _hm
+from pyhomematic import _aioclient
+from pyhomematic import _batch
+from pyhomematic import _binrpc
+from pyhomematic import _dutycycle
+from pyhomematic import _circuitbreaker
+from pyhomematic._subscriptions import SubscriptionRegistry
+from pyhomematic._eventqueue import EventQueue, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST
+from pyhomematic.devicetypes.generic import HMChannel
 from pyhomematic.devicetypes.helper import HelperRssiDevice, HelperRssiPeer
 
 logging.basicConfig(level=logging.INFO)
@@ -23,6 +38,42 @@ BASE_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, os.pardir))
 with open(os.path.join(BASE_DIR, SUPPORTED_DEVICES_JSON)) as fptr:
     DEVICES = json.load(fptr)
 
+class FakeBinRpcServer(threading.Thread):
+    """
+    BIN-RPC server answering the requests of the n-th connection with
+    replies[n]: a list with one entry per request, "ok" to answer, "close"
+    to close the connection without answering, "truncated" to send a broken
+    frame and close.
+    """
+
+    def __init__(self, replies):
+        super().__init__(daemon=True)
+        self.replies = list(replies)
+        self.requests = []
+        self.socket = socket.create_server((DEFAULT_IP, 0))
+        self.url = "xmlrpc_bin://%s:%i" % (DEFAULT_IP, self.socket.getsockname()[1])
+        self.start()
+
+    def run(self):
+        for replies in self.replies:
+            connection, _ = self.socket.accept()
+            rfile = connection.makefile('rb')
+            for reply in replies:
+                frame = _binrpc.readFrame(rfile)
+                if frame is None:
+                    break
+                if reply == "close":
+                    break
+                self.requests.append(_binrpc.loads(*frame)[1])
+                if reply == "truncated":
+                    connection.sendall(_binrpc.dumps(("",), methodresponse=True)[:10])
+                    break
+                connection.sendall(_binrpc.dumps(("",), methodresponse=True))
+            rfile.close()
+            connection.close()
+        self.socket.close()
+
+
 class Test_0_VCCU(unittest.TestCase):
     def setUp(self):
         LOG.info("TestVCCU.setUp")
@@ -168,5 +219,1606 @@ class Test_3_HelperClassHierarchy(unittest.TestCase):
             )
 
 
+class Test_4_WorkerPool(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestWorkerPool.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+        self.events = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        LOG.debug("TestWorkerPool.tearDown")
+        self.vccu.stop()
+
+    def eventcallback(self, interface_id, address, value_key, value):
+        with self.lock:
+            self.events.append((address, value_key, value))
+
+    def test_0_pooled_events(self):
+        LOG.info("TestWorkerPool.test_0_pooled_events")
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            eventcallback=self.eventcallback,
+            workers=4,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": True
+                }
+            }
+        )
+        client.start()
+        time.sleep(STARTUP_DELAY)
+        address = next(iter(client.devices_all[DEFAULT_REMOTE]))
+        interface_id = "%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)
+
+        def send(count):
+            proxy = xmlrpc.client.ServerProxy("http://%s:%i" % (DEFAULT_IP, client._server._localport))
+            for i in range(count):
+                proxy.event(interface_id, address, "level", i)
+
+        senders = [threading.Thread(target=send, args=(25,)) for _ in range(4)]
+        for sender in senders:
+            sender.start()
+        for sender in senders:
+            sender.join()
+        self.assertEqual(len(self.events), 100)
+        self.assertEqual(self.events[0][1], "LEVEL")
+        client.stop()
+
+    def test_1_ordering(self):
+        LOG.info("TestWorkerPool.test_1_ordering")
+        received = []
+
+        class Events():
+            def event(self, interface_id, address, value_key, value):
+                received.append(value)
+                return True
+
+        class SlowServer(_hm.PooledXMLRPCServer):
+            """The first request takes longer to parse than the second one"""
+            def _marshaled_dispatch(self, data, dispatch_method=None, path=None):
+                if b'first' in data:
+                    time.sleep(0.3)
+                return super()._marshaled_dispatch(data, dispatch_method, path)
+
+        for fastevents in (True, False):
+            del received[:]
+            server = SlowServer((DEFAULT_IP, 0), workers=2, logRequests=False)
+            server.fastevents = fastevents
+            server.register_multicall_functions()
+            server.register_instance(Events())
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            url = "http://%s:%i" % (DEFAULT_IP, server.socket.getsockname()[1])
+
+            def send(values):
+                proxy = xmlrpc.client.ServerProxy(url)
+                multicall = xmlrpc.client.MultiCall(proxy)
+                for value in values:
+                    multicall.event("test", "VCU0000001:1", "LEVEL", value)
+                tuple(multicall())
+
+            first = threading.Thread(target=send, args=(["first", "first2"], ))
+            first.start()
+            time.sleep(0.1)
+            send(["second"])
+            first.join()
+            self.assertEqual(received, ["first", "first2", "second"])
+            server.shutdown()
+            server.server_close()
+
+
+class Test_5_AsyncConnection(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestAsyncConnection.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+
+    def tearDown(self):
+        LOG.debug("TestAsyncConnection.tearDown")
+        self.vccu.stop()
+
+    def test_0_async_events(self):
+        LOG.info("TestAsyncConnection.test_0_async_events")
+        events = []
+
+        async def eventcallback(interface_id, address, value_key, value):
+            events.append((address, value_key, value))
+
+        async def run():
+            client = AsyncHMConnection(
+                interface_id=DEFAULT_INTERFACE_CLIENT,
+                eventcallback=eventcallback,
+                remotes={
+                    DEFAULT_REMOTE: {
+                        "ip": DEFAULT_IP,
+                        "port": self.localport,
+                        "connect": True
+                    }
+                }
+            )
+            self.assertTrue(await client.start())
+            await asyncio.sleep(STARTUP_DELAY)
+            devices = client.devices.get(DEFAULT_REMOTE)
+            self.assertGreater(len(devices.keys()), 0)
+            servicemessages = await client.getServiceMessages(DEFAULT_REMOTE)
+            self.assertEqual(servicemessages[0][0], 'VCU0000001:1')
+
+            address = next(iter(client.devices_all[DEFAULT_REMOTE]))
+            interface_id = "%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)
+            proxy = xmlrpc.client.ServerProxy("http://%s:%i" % (DEFAULT_IP, client._server._localport))
+            await client.call(proxy.event, interface_id, address, "state", True)
+            await asyncio.sleep(0.1)
+            self.assertEqual(events, [(address, "STATE", True)])
+            self.assertTrue(await client.stop())
+
+        asyncio.run(run())
+
+
+class Test_6_EventFastPath(unittest.TestCase):
+    def setUp(self):
+        self.calls = [
+            {'methodName': 'event', 'params': ['test-default', 'VCU0000001:1', 'LEVEL', 0.5]},
+            {'methodName': 'event', 'params': ['test-default', 'VCU0000001:1', 'STATE', True]},
+            {'methodName': 'event', 'params': ['test-default', 'VCU0000001:1', 'RSSI_PEER', -65]},
+            {'methodName': 'event', 'params': ['test-default', 'VCU0000001:1', 'TEXT', 'ä & <b>']},
+        ]
+
+    def test_0_decode_like_generic(self):
+        for encoding in ('utf-8', 'iso-8859-1'):
+            for call in self.calls:
+                body = xmlrpc.client.dumps(tuple(call['params']), 'event', encoding=encoding).encode(encoding)
+                params, _ = xmlrpc.client.loads(body)
+                decoded = _hm.decodeEvents(body)
+                if isinstance(call['params'][3], str) and '&' in call['params'][3]:
+                    self.assertIsNone(decoded)
+                else:
+                    self.assertEqual(decoded, (False, [params]))
+            body = xmlrpc.client.dumps((self.calls[:3],), 'system.multicall', encoding=encoding).encode(encoding)
+            params, _ = xmlrpc.client.loads(body)
+            self.assertEqual(_hm.decodeEvents(body), (True, [tuple(c['params']) for c in params[0]]))
+
+    def test_1_fallback(self):
+        self.assertIsNone(_hm.decodeEvents(xmlrpc.client.dumps(('test-default',), 'listDevices').encode()))
+        self.assertIsNone(_hm.decodeEvents(xmlrpc.client.dumps(('a', 'b', 'c', [1]), 'event').encode()))
+        mixed = self.calls[:1] + [{'methodName': 'listDevices', 'params': ['test-default']}]
+        self.assertIsNone(_hm.decodeEvents(xmlrpc.client.dumps((mixed,), 'system.multicall').encode()))
+
+    def test_2_dispatch(self):
+        received = []
+
+        class Functions():
+            def event(self, interface_id, address, value_key, value):
+                received.append((interface_id, address, value_key, value))
+                return True
+
+        dispatcher = _hm.XMLRPCDispatcher()
+        dispatcher.register_multicall_functions()
+        dispatcher.register_instance(Functions())
+        body = xmlrpc.client.dumps((self.calls,), 'system.multicall').encode()
+        response, _ = xmlrpc.client.loads(dispatcher._marshaled_dispatch(body))
+        self.assertEqual(response[0], [[True]] * len(self.calls))
+        self.assertEqual(received, [tuple(c['params']) for c in self.calls])
+
+
+class Test_7_EventQueue(unittest.TestCase):
+    def setUp(self):
+        self.handled = []
+        self.release = threading.Event()
+
+    def handler(self, interface_id, address, value_key, value):
+        self.release.wait(5)
+        self.handled.append((address, value_key, value))
+
+    def test_0_order(self):
+        queue = EventQueue(consumers=4)
+        queue.start(self.handler)
+        self.release.set()
+        for i in range(50):
+            queue.put("test-default", "VCU0000001:%i" % (i % 3), "LEVEL", i)
+        self.assertTrue(queue.join(5))
+        queue.stop()
+        self.assertEqual(len(self.handled), 50)
+        for channel in range(3):
+            values = [v for a, _, v in self.handled if a == "VCU0000001:%i" % channel]
+            self.assertEqual(values, sorted(values))
+
+    def test_1_coalesce(self):
+        queue = EventQueue(consumers=1, coalesce=True)
+        queue.start(self.handler)
+        queue.put("test-default", "VCU0000001:1", "LEVEL", 0)
+        time.sleep(0.1)
+        for i in range(1, 20):
+            queue.put("test-default", "VCU0000001:1", "LEVEL", i)
+        queue.put("test-default", "VCU0000001:1", "STATE", True)
+        self.release.set()
+        self.assertTrue(queue.join(5))
+        queue.stop()
+        self.assertEqual(self.handled, [("VCU0000001:1", "LEVEL", 0),
+                                        ("VCU0000001:1", "LEVEL", 19),
+                                        ("VCU0000001:1", "STATE", True)])
+
+    def test_2_drop_policies(self):
+        for policy, expected in ((POLICY_DROP_OLDEST, [0, 7, 8, 9]),
+                                 (POLICY_DROP_NEWEST, [0, 1, 2, 3])):
+            self.handled = []
+            self.release.clear()
+            queue = EventQueue(consumers=1, maxsize=3, policy=policy)
+            queue.start(self.handler)
+            queue.put("test-default", "VCU0000001:1", "LEVEL", 0)
+            time.sleep(0.1)
+            for i in range(1, 10):
+                queue.put("test-default", "VCU0000001:1", "LEVEL", i)
+            stats = queue.statistics()["default"]
+            self.assertEqual(stats["dropped"], 6)
+            self.assertEqual(stats["pending"], 3)
+            self.release.set()
+            self.assertTrue(queue.join(5))
+            queue.stop()
+            self.assertEqual([v for _, _, v in self.handled], expected)
+            stats = queue.statistics()["default"]
+            self.assertEqual(stats["enqueued"], 4 if policy == POLICY_DROP_NEWEST else 10)
+            self.assertEqual(stats["pending"], 0)
+
+
+class Test_8_EventRouting(unittest.TestCase):
+    """RPCFunctions.event against the former implementation, see benchmark.py routing for the timing."""
+    REMOTE = "eventrouting"
+    INTERFACE_ID = "test-eventrouting"
+
+    def setUp(self):
+        with open(os.path.join(BASE_DIR, "pyhomematic/devicetypes/json/device_descriptions.json")) as fptr:
+            descriptions = json.load(fptr)
+        self.callbacks = 0
+        self.rpcfunctions = _hm.RPCFunctions(proxies={self.INTERFACE_ID: None},
+                                             remotes={self.REMOTE: {}},
+                                             eventcallback=self.eventcallback)
+        self.rpcfunctions.newDevices(self.INTERFACE_ID, descriptions)
+        self.address = [d['ADDRESS'] for d in descriptions if d['PARENT']][0]
+
+    def tearDown(self):
+        for storage in (_hm.devices, _hm.devices_all, _hm.devices_raw, _hm.devices_raw_dict, _hm.paramsets):
+            storage.pop(self.REMOTE, None)
+
+    def eventcallback(self, interface_id, address, value_key, value):
+        self.callbacks += 1
+
+    def legacy_event(self, interface_id, address, value_key, value):
+        rpc = self.rpcfunctions
+        LOG.debug("RPCFunctions.event: interface_id = %s, address = %s, value_key = %s, value = %s" % (
+            interface_id, address, value_key.upper(), str(value)))
+        rpc.devices_all[interface_id.split(
+            '-')[-1]][address].event(interface_id, value_key.upper(), value)
+        if rpc.eventcallback:
+            rpc.eventcallback(interface_id=interface_id, address=address,
+                              value_key=value_key.upper(), value=value)
+        return True
+
+    def test_0_routing(self):
+        self.assertTrue(self.rpcfunctions.event(self.INTERFACE_ID, self.address, "level", 0.5))
+        device = self.rpcfunctions.devices_all[self.REMOTE][self.address]
+        self.assertEqual(device._VALUES["LEVEL"], 0.5)
+        self.assertEqual(self.callbacks, 1)
+
+    def test_1_legacy_routing(self):
+        received = []
+        self.rpcfunctions.eventcallback = lambda **kwargs: received.append(kwargs)
+        device = self.rpcfunctions.devices_all[self.REMOTE][self.address]
+        for value in (0.5, 0.7):
+            args = (self.INTERFACE_ID, self.address, "level", value)
+            self.assertEqual(self.rpcfunctions.event(*args), self.legacy_event(*args))
+            self.assertEqual(received[-2], received[-1])
+            self.assertEqual(device._VALUES["LEVEL"], value)
+        # Routes and keys are resolved once
+        self.assertIs(self.rpcfunctions._eventroutes[self.INTERFACE_ID][1],
+                      self.rpcfunctions.devices_all[self.REMOTE])
+        self.assertIs(received[0]["value_key"], received[2]["value_key"])
+
+
+class Test_9_Subscriptions(unittest.TestCase):
+    def setUp(self):
+        self.registry = SubscriptionRegistry()
+        self.received = []
+
+    def callback(self, name):
+        return lambda address, interface_id, key, value: self.received.append((name, address, key, value))
+
+    def test_0_match(self):
+        self.registry.subscribe(self.callback("all"))
+        self.registry.subscribe(self.callback("remote"), remote="default")
+        self.registry.subscribe(self.callback("device"), address="VCU0000001")
+        self.registry.subscribe(self.callback("channel"), address="VCU0000001:2")
+        self.registry.subscribe(self.callback("level"), channel=1, parameter="level")
+        self.registry.subscribe(self.callback("other"), remote="other", parameter="LEVEL")
+        self.assertEqual(len(self.registry), 6)
+        self.registry.dispatch("default", "test-default", "VCU0000001:1", "LEVEL", 0.5)
+        self.assertEqual(sorted(name for name, _, _, _ in self.received),
+                         ["all", "device", "level", "remote"])
+        self.received = []
+        self.registry.dispatch("default", "test-default", "VCU0000001:2", "STATE", True)
+        self.assertEqual(sorted(name for name, _, _, _ in self.received),
+                         ["all", "channel", "device", "remote"])
+        self.received = []
+        self.registry.dispatch("default", "test-default", "CENTRAL", "PONG", "test-default")
+        self.assertEqual(sorted(name for name, _, _, _ in self.received), ["all", "remote"])
+
+    def test_1_unsubscribe(self):
+        first = self.registry.subscribe(self.callback("first"), parameter="LEVEL")
+        second = self.registry.subscribe(self.callback("second"), parameter="LEVEL")
+        self.assertTrue(self.registry.unsubscribe(first))
+        self.assertFalse(self.registry.unsubscribe(first))
+        self.registry.dispatch("default", "test-default", "VCU0000001:1", "LEVEL", 0.5)
+        self.assertEqual([name for name, _, _, _ in self.received], ["second"])
+        self.assertTrue(self.registry.unsubscribe(second))
+        self.assertEqual(len(self.registry), 0)
+        self.assertEqual(self.registry.match("default", "VCU0000001:1", "LEVEL"), [])
+
+
+class Test_10_KeepAlive(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestKeepAlive.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+        self.events = []
+
+    def tearDown(self):
+        LOG.debug("TestKeepAlive.tearDown")
+        self.vccu.stop()
+
+    def eventcallback(self, interface_id, address, value_key, value):
+        self.events.append((address, value_key, value))
+
+    def test_0_persistent_connection(self):
+        LOG.info("TestKeepAlive.test_0_persistent_connection")
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            eventcallback=self.eventcallback,
+            keepalive=True,
+            keepalivemax=3,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": True
+                }
+            }
+        )
+        client.start()
+        time.sleep(STARTUP_DELAY)
+        address = next(iter(client.devices_all[DEFAULT_REMOTE]))
+        interface_id = "%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)
+        body = xmlrpc.client.dumps((interface_id, address, "LEVEL", 0.5), 'event').encode()
+        connection = http.client.HTTPConnection(DEFAULT_IP, client._server._localport)
+        sockets = []
+        for _ in range(3):
+            connection.request("POST", "/RPC2", body, {"Content-Type": "text/xml"})
+            response = connection.getresponse()
+            self.assertEqual(response.status, 200)
+            response.read()
+            sockets.append(connection.sock)
+        self.assertIsNotNone(sockets[0])
+        self.assertIs(sockets[0], sockets[1])
+        self.assertEqual(response.getheader("Connection"), "close")
+        connection.close()
+
+        self.vccu.sendEvents(interface_id, [(address, "STATE", True)] * 5)
+        self.assertEqual(len(self.events), 8)
+        client.stop()
+
+    def test_1_idle_connections(self):
+        LOG.info("TestKeepAlive.test_1_idle_connections")
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            eventcallback=self.eventcallback,
+            workers=1,
+            keepalive=True,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": True
+                }
+            }
+        )
+        # Each remote needs a worker for its persistent connection
+        self.assertEqual(client._server.workers, 2)
+        client.start()
+        time.sleep(STARTUP_DELAY)
+        address = next(iter(client.devices_all[DEFAULT_REMOTE]))
+        interface_id = "%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)
+        body = xmlrpc.client.dumps((interface_id, address, "LEVEL", 0.5), 'event').encode()
+        # Idle connections occupying all workers are closed for a waiting one
+        connections = [http.client.HTTPConnection(DEFAULT_IP, client._server._localport, timeout=5)
+                       for _ in range(client._server.workers + 1)]
+        try:
+            for connection in connections:
+                connection.request("POST", "/RPC2", body, {"Content-Type": "text/xml"})
+                response = connection.getresponse()
+                self.assertEqual(response.status, 200)
+                response.read()
+        finally:
+            for connection in connections:
+                connection.close()
+            client.stop()
+
+
+class Test_11_BinRpc(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestBinRpc.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+        self.events = []
+
+    def tearDown(self):
+        LOG.debug("TestBinRpc.tearDown")
+        self.vccu.stop()
+
+    def eventcallback(self, interface_id, address, value_key, value):
+        self.events.append((address, value_key, value))
+
+    def test_0_codec(self):
+        LOG.info("TestBinRpc.test_0_codec")
+        params = ("VCU0000001:1", "LEVEL", 0.25, -7, 2**40, True, None,
+                  ["a", {"ADDRESS": "VCU0000001", "FLAGS": 1}])
+        frame = _binrpc.dumps(params, "event")
+        msgtype, length = _binrpc.parseHeader(frame[:8])
+        self.assertEqual(msgtype, _binrpc.MSG_REQUEST)
+        self.assertEqual(length, len(frame) - 8)
+        decoded, methodname = _binrpc.loads(msgtype, frame[8:])
+        self.assertEqual(methodname, "event")
+        self.assertEqual(decoded, params[:6] + ("", list(params[7])))
+        fault = _binrpc.dumps(xmlrpc.client.Fault(-1, "Unknown method"))
+        with self.assertRaises(xmlrpc.client.Fault):
+            _binrpc.loads(_binrpc.MSG_FAULT, fault[8:])
+
+    def test_1_callbacks(self):
+        LOG.info("TestBinRpc.test_1_callbacks")
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            eventcallback=self.eventcallback,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": True,
+                    "callbackprotocol": "binrpc"
+                }
+            }
+        )
+        self.assertGreater(client._server.workers, 0)
+        client.start()
+        time.sleep(STARTUP_DELAY)
+        interface_id = "%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)
+        self.assertIsInstance(self.vccu._rpcfunctions.remotes[interface_id], _binrpc.ServerProxy)
+        self.assertTrue(client.devices_all[DEFAULT_REMOTE])
+        address = next(iter(client.devices_all[DEFAULT_REMOTE]))
+        self.vccu.sendEvents(interface_id, [(address, "LEVEL", 0.5), (address, "STATE", True)])
+        self.assertEqual(self.events, [(address, "LEVEL", 0.5), (address, "STATE", True)])
+        client.stop()
+
+    def test_2_client_transport(self):
+        LOG.info("TestBinRpc.test_2_client_transport")
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": True,
+                    "protocol": "binrpc"
+                }
+            }
+        )
+        client.start()
+        time.sleep(STARTUP_DELAY)
+        interface_id = "%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)
+        proxy = client._server.proxies[interface_id]
+        self.assertEqual(proxy._protocol, _hm.PROTOCOL_BINRPC)
+        # Callbacks use the protocol of the remote unless configured otherwise
+        self.assertTrue(client._server.callbackUrl(proxy).startswith("xmlrpc_bin://"))
+        self.assertTrue(client.devices_all[DEFAULT_REMOTE])
+        self.assertEqual(client.getServiceMessages(DEFAULT_REMOTE)[0][0], 'VCU0000001:1')
+        self.assertEqual(proxy.getParamset('VCU0000001:1', 'VALUES')['INFO'], 'VCU0000001:1')
+        with self.assertRaises(xmlrpc.client.Fault):
+            proxy.unknownMethod()
+        client.stop()
+
+    def test_4_retry(self):
+        LOG.info("TestBinRpc.test_4_retry")
+        # A kept-alive connection closed by the server is reopened
+        server = FakeBinRpcServer([["ok", "close"], ["ok"]])
+        proxy = _binrpc.ServerProxy(server.url)
+        proxy.setValue("VCU0000001:1", "STATE", True)
+        proxy.setValue("VCU0000001:1", "STATE", False)
+        self.assertEqual(server.requests, ["setValue", "setValue"])
+        server.join()
+        # A broken response is not retried, the request may have been processed
+        server = FakeBinRpcServer([["ok", "truncated"], ["ok"]])
+        proxy = _binrpc.ServerProxy(server.url)
+        proxy.setValue("VCU0000001:1", "STATE", True)
+        with self.assertRaises(_binrpc.BinRpcError):
+            proxy.setValue("VCU0000001:1", "STATE", False)
+        self.assertEqual(server.requests, ["setValue", "setValue"])
+        proxy.close()
+
+    def test_3_unsupported_options(self):
+        LOG.info("TestBinRpc.test_3_unsupported_options")
+        for options in ({"ssl": True}, {"username": "Admin", "password": "secret"}):
+            remote = {"ip": DEFAULT_IP, "port": self.localport, "connect": False, "protocol": "binrpc"}
+            remote.update(options)
+            with self.assertRaises(ValueError):
+                HMConnection(interface_id=DEFAULT_INTERFACE_CLIENT, autostart=False,
+                             remotes={DEFAULT_REMOTE: remote})
+
+
+class Test_12_ConnectionPool(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestConnectionPool.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+
+    def tearDown(self):
+        LOG.debug("TestConnectionPool.tearDown")
+        self.vccu.stop()
+
+    def test_0_fair_queuing(self):
+        LOG.info("TestConnectionPool.test_0_fair_queuing")
+        pool = _hm.ConnectionPool(["connection"])
+        order = []
+
+        def request(i):
+            connection = pool.acquire()
+            order.append(i)
+            pool.release(connection)
+
+        connection = pool.acquire()
+        threads = []
+        for i in range(3):
+            thread = threading.Thread(target=request, args=(i, ))
+            thread.start()
+            threads.append(thread)
+            while pool.waiting() < i + 1:
+                time.sleep(0.01)
+        pool.release(connection)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, [0, 1, 2])
+
+    def test_1_parallel_requests(self):
+        LOG.info("TestConnectionPool.test_1_parallel_requests")
+        for protocol in (_hm.PROTOCOL_XMLRPC, _hm.PROTOCOL_BINRPC):
+            client = HMConnection(
+                interface_id=DEFAULT_INTERFACE_CLIENT,
+                autostart=False,
+                remotes={
+                    DEFAULT_REMOTE: {
+                        "ip": DEFAULT_IP,
+                        "port": self.localport,
+                        "connect": False,
+                        "protocol": protocol,
+                        "connections": 3
+                    }
+                }
+            )
+            proxy = client._server.proxies["%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)]
+            self.assertEqual(proxy._pool.size, 3)
+            results = []
+
+            def request():
+                for _ in range(10):
+                    results.append(proxy.getParamset('VCU0000001:1', 'VALUES')['INFO'])
+
+            threads = [threading.Thread(target=request) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(results, ['VCU0000001:1'] * 50)
+            client._server.server.server_close()
+
+
+class Test_13_Batch(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestBatch.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+
+    def tearDown(self):
+        LOG.debug("TestBatch.tearDown")
+        self.vccu.stop()
+
+    def test_0_multicall(self):
+        LOG.info("TestBatch.test_0_multicall")
+        for protocol in (_hm.PROTOCOL_XMLRPC, _hm.PROTOCOL_BINRPC):
+            client = HMConnection(
+                interface_id=DEFAULT_INTERFACE_CLIENT,
+                autostart=False,
+                remotes={
+                    DEFAULT_REMOTE: {
+                        "ip": DEFAULT_IP,
+                        "port": self.localport,
+                        "connect": False,
+                        "protocol": protocol
+                    }
+                }
+            )
+            with client.batch(DEFAULT_REMOTE, maxsize=3) as batch:
+                for i in range(5):
+                    batch.setValue("VCU000000%i:1" % i, "STATE", True)
+                index = batch.call("unknownMethod")
+                batch.getValue("VCU0000001:1", "STATE")
+            self.assertEqual(len(batch.results), 7)
+            self.assertEqual(batch.requests, 3)
+            self.assertEqual(batch.results[:5], [""] * 5)
+            self.assertTrue(batch.results[6])
+            self.assertEqual(len(batch.errors), 1)
+            self.assertEqual(batch.errors[0][0], index)
+            self.assertIsInstance(batch.errors[0][1], xmlrpc.client.Fault)
+            client._server.server.server_close()
+
+    def test_1_malformed_response(self):
+        LOG.info("TestBatch.test_1_malformed_response")
+
+        class Proxy():
+            def __init__(self, responses):
+                self.responses = responses
+                self.system = self
+
+            def multicall(self, calls):
+                return self.responses.pop(0)
+
+        batch = _batch.Batch(Proxy([[[""]], "", [], [[""], [True]]]), maxsize=2)
+        for i in range(8):
+            batch.setValue("VCU000000%i:1" % i, "STATE", True)
+        results = batch.execute()
+        self.assertEqual(len(results), 8)
+        self.assertEqual([index for index, _ in batch.errors], [0, 1, 2, 3, 4, 5])
+        self.assertIsInstance(results[0], _batch.BatchError)
+        self.assertEqual(results[6:], ["", True])
+
+        # Indices of calls added after execute() refer to their results
+        batch = _batch.Batch(Proxy([[["a"]], [["b"]]]))
+        first = batch.getValue("VCU0000001:1", "STATE")
+        batch.execute()
+        second = batch.getValue("VCU0000002:1", "STATE")
+        batch.execute()
+        self.assertEqual((batch.results[first], batch.results[second]), ("a", "b"))
+
+
+class Test_14_WarmUp(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestWarmUp.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+        self.systemevents = []
+
+    def tearDown(self):
+        LOG.debug("TestWarmUp.tearDown")
+        self.vccu.stop()
+
+    def systemcallback(self, src, *args):
+        self.systemevents.append((src, args))
+
+    def test_0_warmup(self):
+        LOG.info("TestWarmUp.test_0_warmup")
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            systemcallback=self.systemcallback,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": True,
+                    "warmup": True
+                }
+            }
+        )
+        client.start()
+        time.sleep(STARTUP_DELAY)
+        for _ in range(50):
+            if DEFAULT_REMOTE in client._server._rpcfunctions.warmups:
+                break
+            time.sleep(0.1)
+        stats = client._server._rpcfunctions.warmups[DEFAULT_REMOTE]
+        channels = [device for device in client.devices_all[DEFAULT_REMOTE].values()
+                    if isinstance(device, HMChannel) and 'VALUES' in device._PARAMSETS]
+        self.assertEqual(stats['channels'], len(channels))
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(stats['calls'], -(-len(channels) // _hm.BATCH_SIZE))
+        self.assertIn(('warmUp', ("%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE), stats)),
+                      self.systemevents)
+        channel = channels[0]
+        self.assertEqual(channel.getCachedOrUpdatedValue('INFO'), channel.ADDRESS)
+        self.assertFalse(channel.UNREACH)
+
+        # Values received via events are not overwritten
+        channel.event(DEFAULT_INTERFACE_CLIENT, 'LEVEL', 0.5)
+        stats = client.warmUp(DEFAULT_REMOTE)
+        self.assertEqual(stats['channels'], len(channels))
+        self.assertEqual(channel.getCachedOrUpdatedValue('LEVEL'), 0.5)
+        client.stop()
+
+    def test_1_devicefile(self):
+        LOG.info("TestWarmUp.test_1_devicefile")
+        with tempfile.TemporaryDirectory() as directory:
+            devicefile = os.path.join(directory, "devices_%s.json")
+            with open(devicefile % DEFAULT_REMOTE, "w") as fptr:
+                json.dump(self.vccu._rpcfunctions.devices, fptr)
+            # The devices restored from the devicefile exist before the capabilities are probed
+            client = HMConnection(
+                interface_id=DEFAULT_INTERFACE_CLIENT,
+                autostart=False,
+                devicefile=devicefile,
+                remotes={
+                    DEFAULT_REMOTE: {
+                        "ip": DEFAULT_IP,
+                        "port": self.localport,
+                        "connect": True
+                    }
+                }
+            )
+            self.assertTrue(client.devices_all[DEFAULT_REMOTE])
+            client.start()
+            time.sleep(STARTUP_DELAY)
+            try:
+                for _ in range(50):
+                    if DEFAULT_REMOTE in client._server._rpcfunctions.warmups:
+                        break
+                    time.sleep(0.1)
+                channels = [device for device in client.devices_all[DEFAULT_REMOTE].values()
+                            if isinstance(device, HMChannel) and 'VALUES' in device._PARAMSETS]
+                self.assertEqual(client._server._rpcfunctions.warmups[DEFAULT_REMOTE]['channels'], len(channels))
+            finally:
+                client.stop()
+
+
+class Test_15_SingleFlight(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestSingleFlight.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+
+    def tearDown(self):
+        LOG.debug("TestSingleFlight.tearDown")
+        self.vccu.stop()
+
+    def test_0_shared_reads(self):
+        LOG.info("TestSingleFlight.test_0_shared_reads")
+        calls = []
+
+        def getValue(address, value_key):
+            calls.append((address, value_key))
+            time.sleep(0.3)
+            return 21.5
+
+        self.vccu._rpcfunctions.getValue = getValue
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": False,
+                    "connections": 4
+                }
+            }
+        )
+        proxy = client._server.proxies["%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)]
+        results = []
+
+        def request(address):
+            results.append(proxy.getValue(address, "ACTUAL_TEMPERATURE"))
+
+        threads = [threading.Thread(target=request, args=("VCU000000%i:1" % (i % 2), ))
+                   for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [21.5] * 6)
+        self.assertEqual(sorted(calls), [("VCU0000000:1", "ACTUAL_TEMPERATURE"),
+                                         ("VCU0000001:1", "ACTUAL_TEMPERATURE")])
+        self.assertEqual(proxy._singleflight.shared, 4)
+
+        # Subsequent calls are not cached
+        proxy.getValue("VCU0000000:1", "ACTUAL_TEMPERATURE")
+        self.assertEqual(len(calls), 3)
+        client._server.server.server_close()
+
+
+class Test_16_WriteCoalescing(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestWriteCoalescing.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+
+    def tearDown(self):
+        LOG.debug("TestWriteCoalescing.tearDown")
+        self.vccu.stop()
+
+    def test_0_debounce(self):
+        LOG.info("TestWriteCoalescing.test_0_debounce")
+        writes = []
+
+        def setValue(address, value_key, value):
+            writes.append((address, value_key, value))
+            return ""
+
+        self.vccu._rpcfunctions.setValue = setValue
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": False,
+                    "debounce": 0.3
+                }
+            }
+        )
+        proxy = client._server.proxies["%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)]
+        for i in range(10):
+            proxy.setValue("VCU0000001:1", "LEVEL", i / 10)
+        proxy.setValue("VCU0000002:1", "LEVEL", 1.0)
+        self.assertEqual(writes, [("VCU0000001:1", "LEVEL", 0.0), ("VCU0000002:1", "LEVEL", 1.0)])
+        time.sleep(0.5)
+        self.assertEqual(writes[-1], ("VCU0000001:1", "LEVEL", 0.9))
+        self.assertEqual(client.writeStatistics(DEFAULT_REMOTE), {'sent': 3, 'suppressed': 8})
+
+        # Pending values are sent when the proxies are cleared
+        proxy.setValue("VCU0000001:1", "LEVEL", 0.5)
+        proxy.setValue("VCU0000001:1", "LEVEL", 0.6)
+        client._server.clearProxies()
+        self.assertEqual(writes[-1], ("VCU0000001:1", "LEVEL", 0.6))
+        client._server.server.server_close()
+
+
+class Test_17_DutyCycle(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestDutyCycle.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+
+    def tearDown(self):
+        LOG.debug("TestDutyCycle.tearDown")
+        self.vccu.stop()
+
+    def test_0_scheduling(self):
+        LOG.info("TestDutyCycle.test_0_scheduling")
+        writes = []
+
+        def setValue(address, value_key, value):
+            writes.append((address, value_key, value))
+            return ""
+
+        def putParamset(address, paramset_key, paramset):
+            writes.append((address, paramset_key, paramset))
+            return ""
+
+        self.vccu._rpcfunctions.setValue = setValue
+        self.vccu._rpcfunctions.putParamset = putParamset
+        self.vccu._rpcfunctions.dutycycle = 85
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": False,
+                    "dutycycle": True
+                }
+            }
+        )
+        proxy = client._server.proxies["%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)]
+        proxy._scheduler.update()
+        self.assertEqual(proxy._scheduler.dutycycle, 85)
+
+        # Interactive writes pass, bulk writes are deferred
+        proxy.putParamset("VCU0000001", "MASTER", {"CYCLIC_INFO_MSG": 1})
+        proxy.setValue("VCU0000001:1", "STATE", True)
+        self.assertEqual(writes, [("VCU0000001:1", "STATE", True)])
+
+        # Interactive writes are deferred, bulk writes rejected
+        self.vccu._rpcfunctions.dutycycle = 99
+        proxy._scheduler.update()
+        proxy.setValue("VCU0000001:1", "STATE", False)
+        with self.assertRaises(_dutycycle.DutyCycleError):
+            proxy.putParamset("VCU0000001", "MASTER", {"CYCLIC_INFO_MSG": 0})
+        self.assertEqual(len(writes), 1)
+
+        # Deferred writes are sent once the duty cycle has recovered, interactive ones first
+        self.vccu._rpcfunctions.dutycycle = 10
+        proxy._scheduler.update()
+        self.assertEqual(writes[1:], [("VCU0000001:1", "STATE", False),
+                                      ("VCU0000001", "MASTER", {"CYCLIC_INFO_MSG": 1})])
+        self.assertEqual(client.dutyCycleStatistics(DEFAULT_REMOTE),
+                         {'dutycycle': 10, 'sent': 3, 'deferred': 2, 'rejected': 1, 'pending': 0})
+
+        # The next write sends the deferred ones if the last known duty cycle allows it
+        self.vccu._rpcfunctions.dutycycle = 99
+        proxy._scheduler.update()
+        proxy.setValue("VCU0000002:1", "STATE", True)
+        proxy._scheduler.dutycycle = 10
+        proxy.setValue("VCU0000003:1", "STATE", True)
+        self.assertEqual(writes[3:], [("VCU0000002:1", "STATE", True), ("VCU0000003:1", "STATE", True)])
+        client._server.clearProxies()
+        client._server.server.server_close()
+
+    def test_1_reads(self):
+        LOG.info("TestDutyCycle.test_1_reads")
+        writes = []
+
+        def putParamset(address, paramset_key, paramset):
+            writes.append((address, paramset_key, paramset))
+            return ""
+
+        self.vccu._rpcfunctions.putParamset = putParamset
+        self.vccu._rpcfunctions.dutycycle = 85
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": False,
+                    "dutycycle": True
+                }
+            }
+        )
+        interface_id = "%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)
+        proxy = client._server.proxies[interface_id]
+        proxy._scheduler.update()
+
+        # Multicalls of reads are not scheduled
+        with client.batch(DEFAULT_REMOTE) as batch:
+            for index in range(1, 5):
+                batch.call('getParamset', "VCU0000001:%i" % index, 'VALUES')
+        self.assertEqual(len(batch.results), 4)
+        self.assertEqual(batch.errors, [])
+        self.assertEqual(batch.results[0]['INFO'], "VCU0000001:1")
+
+        # The reads of a mixed multicall are sent, its writes deferred
+        with client.batch(DEFAULT_REMOTE) as batch:
+            batch.call('getParamset', "VCU0000001:1", 'VALUES')
+            batch.putParamset("VCU0000001", "MASTER", {"CYCLIC_INFO_MSG": 1})
+        self.assertEqual(batch.results[0]['INFO'], "VCU0000001:1")
+        self.assertEqual(batch.results[1], "")
+        self.assertEqual(writes, [])
+
+        # The warm-up fetches values while writes are deferred
+        channels = [HMChannel({'ADDRESS': "VCU0000001:%i" % index, 'PARENT': "VCU0000001",
+                               'PARAMSETS': ['VALUES']}, proxy) for index in range(1, 5)]
+        stats = client._server._rpcfunctions._warmUp(interface_id, channels)
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(channels[3]._VALUES['INFO'], "VCU0000001:4")
+
+        self.vccu._rpcfunctions.dutycycle = 10
+        proxy._scheduler.update()
+        self.assertEqual(writes, [("VCU0000001", "MASTER", {"CYCLIC_INFO_MSG": 1})])
+        self.assertEqual(proxy._scheduler.statistics()['pending'], 0)
+        client._server.clearProxies()
+        client._server.server.server_close()
+
+
+class Test_18_CircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestCircuitBreaker.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+
+    def tearDown(self):
+        LOG.debug("TestCircuitBreaker.tearDown")
+        self.vccu.stop()
+
+    def test_0_breaker(self):
+        LOG.info("TestCircuitBreaker.test_0_breaker")
+        getValue = self.vccu._rpcfunctions.getValue
+        calls = []
+
+        def hangingGetValue(address, value_key):
+            calls.append(address)
+            time.sleep(0.5)
+            return True
+
+        self.vccu._rpcfunctions.getValue = hangingGetValue
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": False,
+                    "readtimeout": 0.1,
+                    "breakerthreshold": 2,
+                    "breakerreset": 0.5
+                }
+            }
+        )
+        proxy = client._server.proxies["%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)]
+        for _ in range(2):
+            with self.assertRaises(socket.timeout):
+                proxy.getValue("VCU0000001:1", "STATE")
+        self.assertEqual(client.circuitBreakerStatus(DEFAULT_REMOTE)['state'], 'open')
+        # An open circuit rejects calls without sending them
+        with self.assertRaises(_circuitbreaker.CircuitOpenError):
+            proxy.getValue("VCU0000001:1", "STATE")
+        self.assertEqual(len(calls), 2)
+
+        # The circuit is closed again after a successful probe
+        self.vccu._rpcfunctions.getValue = getValue
+        time.sleep(0.6)
+        self.assertTrue(proxy.getValue("VCU0000001:1", "STATE"))
+        status = client.circuitBreakerStatus(DEFAULT_REMOTE)
+        self.assertEqual(status['state'], 'closed')
+        self.assertEqual(status['rejected'], 1)
+
+        # Faults do not count as failures
+        for _ in range(3):
+            with self.assertRaises(xmlrpc.client.Fault):
+                proxy.unknownMethod()
+        self.assertEqual(client.circuitBreakerStatus(DEFAULT_REMOTE)['state'], 'closed')
+        # Neither do errors of the client
+        for _ in range(3):
+            with self.assertRaises(TypeError):
+                proxy.setValue("VCU0000001:1", "LEVEL", None)
+        self.assertEqual(client.circuitBreakerStatus(DEFAULT_REMOTE)['failures'], 0)
+        self.assertTrue(proxy.getValue("VCU0000001:1", "STATE"))
+        client._server.server.server_close()
+
+    def test_1_hanging_probe(self):
+        LOG.info("TestCircuitBreaker.test_1_hanging_probe")
+        probing = threading.Event()
+        release = threading.Event()
+
+        def probe():
+            probing.set()
+            release.wait(5)
+
+        def fail():
+            raise ConnectionRefusedError()
+
+        breaker = _circuitbreaker.CircuitBreaker(probe, threshold=1, reset=0.2)
+        with self.assertRaises(ConnectionRefusedError):
+            breaker.call(fail)
+        time.sleep(0.3)
+        thread = threading.Thread(target=breaker.call, args=(lambda: True, ))
+        thread.start()
+        self.assertTrue(probing.wait(5))
+        # Calls are rejected while probing, until the probe is given up
+        with self.assertRaises(_circuitbreaker.CircuitOpenError):
+            breaker.call(lambda: True)
+        time.sleep(0.3)
+        probing.clear()
+        release.set()
+        self.assertTrue(breaker.call(lambda: True))
+        self.assertTrue(probing.is_set())
+        self.assertEqual(breaker.status()['state'], 'closed')
+        thread.join()
+
+
+class Test_19_ParallelSetup(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestParallelSetup.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+
+    def tearDown(self):
+        LOG.debug("TestParallelSetup.tearDown")
+        self.vccu.stop()
+
+    def test_0_proxyinit(self):
+        LOG.info("TestParallelSetup.test_0_proxyinit")
+        init = self.vccu._rpcfunctions.init
+
+        def slowInit(url, interface_id=None):
+            time.sleep(1)
+            return init(url, interface_id)
+
+        self.vccu._rpcfunctions.init = slowInit
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        closedport = s.getsockname()[1]
+        s.close()
+        remotes = {name: {"ip": DEFAULT_IP, "port": self.localport, "connect": True}
+                   for name in ("first", "second", "third")}
+        remotes["unavailable"] = {"ip": DEFAULT_IP, "port": closedport, "connect": True}
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            remotes=remotes
+        )
+        start = time.monotonic()
+        client.start()
+        self.assertLess(time.monotonic() - start, 2.5)
+        self.assertEqual(client._server.failed_inits, ["%s-unavailable" % DEFAULT_INTERFACE_CLIENT])
+        time.sleep(STARTUP_DELAY)
+        for name in ("first", "second", "third"):
+            self.assertTrue(client.devices_all.get(name))
+        client.stop()
+
+    def test_1_failed_remote(self):
+        LOG.info("TestParallelSetup.test_1_failed_remote")
+        cleared = []
+
+        class ServerThread(_hm.ServerThread):
+            def clearProxies(self):
+                cleared.extend(self.proxies.values())
+                super().clearProxies()
+
+        remotes = {"valid": {"ip": DEFAULT_IP, "port": self.localport, "dutycycle": True},
+                   "invalid": {"ip": DEFAULT_IP, "port": self.localport, "protocol": "binrpc", "ssl": True}}
+        with self.assertRaises(ValueError):
+            ServerThread(local=DEFAULT_IP, localport=0, remotes=remotes)
+        # The proxy of the valid remote does not leak its scheduler
+        self.assertEqual(len(cleared), 1)
+        self.assertFalse(cleared[0]._scheduler._running)
+
+
+class Test_20_AsyncClient(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestAsyncClient.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        # Keep the connections of the asyncio client open
+        vccu.RequestHandler.protocol_version = 'HTTP/1.1'
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+
+    def tearDown(self):
+        LOG.debug("TestAsyncClient.tearDown")
+        self.vccu.stop()
+        vccu.RequestHandler.protocol_version = 'HTTP/1.0'
+
+    def test_0_async_client(self):
+        LOG.info("TestAsyncClient.test_0_async_client")
+        for protocol in (_hm.PROTOCOL_XMLRPC, _hm.PROTOCOL_BINRPC):
+            async def run():
+                client = AsyncHMConnection(
+                    interface_id=DEFAULT_INTERFACE_CLIENT,
+                    remotes={
+                        DEFAULT_REMOTE: {
+                            "ip": DEFAULT_IP,
+                            "port": self.localport,
+                            "connect": True,
+                            "protocol": protocol,
+                            "asyncconnections": 2
+                        }
+                    }
+                )
+                self.assertTrue(await client.start())
+                await asyncio.sleep(STARTUP_DELAY)
+                channels = [device for device in client.devices_all[DEFAULT_REMOTE].values()
+                            if isinstance(device, HMChannel)]
+                self.assertTrue(all(await asyncio.gather(*(channel.asyncGetValue('STATE')
+                                                           for channel in channels))))
+                self.assertTrue(await channels[0].asyncSetValue('STATE', False))
+                self.assertTrue(await channels[0].asyncUpdateParamset('VALUES'))
+                self.assertEqual(channels[0].PARAMSETS['VALUES']['INFO'], channels[0].ADDRESS)
+                self.assertEqual(len(await client.listDevices(DEFAULT_REMOTE)),
+                                 len(client.devices_raw[DEFAULT_REMOTE]))
+                device = next(iter(client.devices[DEFAULT_REMOTE].values()))
+                self.assertEqual(await device.asyncGetCachedOrUpdatedValue('STATE', channel=1), True)
+                with self.assertRaises(xmlrpc.client.Fault):
+                    await client._proxy(DEFAULT_REMOTE)._aio.unknownMethod()
+
+                # Connections are kept open and reused
+                pool = client._proxy(DEFAULT_REMOTE)._asyncclient._pool
+                self.assertEqual(len(pool._idle), 2)
+                self.assertTrue(await client.stop())
+
+            asyncio.run(run())
+
+    def test_1_retry(self):
+        LOG.info("TestAsyncClient.test_1_retry")
+
+        async def run(server):
+            proxy = _aioclient.AsyncServerProxy(server.url, connections=1)
+            await proxy.setValue("VCU0000001:1", "STATE", True)
+            try:
+                await proxy.setValue("VCU0000001:1", "STATE", False)
+            finally:
+                proxy.close()
+
+        # A kept-alive connection closed by the server is reopened
+        server = FakeBinRpcServer([["ok", "close"], ["ok"]])
+        asyncio.run(run(server))
+        self.assertEqual(server.requests, ["setValue", "setValue"])
+        server.join()
+        # A broken response is not retried, the request may have been processed
+        server = FakeBinRpcServer([["ok", "truncated"], ["ok"]])
+        with self.assertRaises(asyncio.IncompleteReadError):
+            asyncio.run(run(server))
+        self.assertEqual(server.requests, ["setValue", "setValue"])
+
+
+    def test_2_devicefile(self):
+        LOG.info("TestAsyncClient.test_2_devicefile")
+        with open(os.path.join(BASE_DIR, "pyhomematic/devicetypes/json/device_descriptions.json")) as fptr:
+            descriptions = json.load(fptr)
+        received = []
+
+        async def systemcallback(src, *args):
+            received.append(src)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "devices_%s.json" % DEFAULT_REMOTE), "w") as fptr:
+                json.dump(descriptions, fptr)
+            # The devicefile is loaded before the event loop is known
+            client = AsyncHMConnection(
+                interface_id=DEFAULT_INTERFACE_CLIENT,
+                devicefile=os.path.join(directory, "devices_%s.json"),
+                systemcallback=systemcallback,
+                remotes={
+                    DEFAULT_REMOTE: {
+                        "ip": DEFAULT_IP,
+                        "port": self.localport,
+                        "connect": False
+                    }
+                }
+            )
+
+        async def run():
+            self.assertTrue(await client.start())
+            await asyncio.sleep(0)
+            self.assertIn('createDeviceObjects', received)
+            self.assertTrue(await client.stop())
+
+        asyncio.run(run())
+
+
+class Test_21_Capabilities(unittest.TestCase):
+    def setUp(self):
+        LOG.debug("TestCapabilities.setUp")
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("", 0))
+        self.localport = s.getsockname()[1]
+        s.close()
+        self.vccu = vccu.ServerThread(local=DEFAULT_IP,
+                                      localport=self.localport)
+        self.vccu.start()
+        time.sleep(0.5)
+
+    def tearDown(self):
+        LOG.debug("TestCapabilities.tearDown")
+        self.vccu.stop()
+
+    def test_0_probe(self):
+        LOG.info("TestCapabilities.test_0_probe")
+        client = HMConnection(
+            interface_id=DEFAULT_INTERFACE_CLIENT,
+            autostart=False,
+            remotes={
+                DEFAULT_REMOTE: {
+                    "ip": DEFAULT_IP,
+                    "port": self.localport,
+                    "connect": True
+                }
+            }
+        )
+        client.start()
+        time.sleep(STARTUP_DELAY)
+        capabilities = client.capabilities(DEFAULT_REMOTE)
+        self.assertEqual(capabilities['backend'], _hm.BACKEND_CCU)
+        self.assertEqual(capabilities['version'], "pyhomematic VCCU")
+        self.assertIn('getParamset', capabilities['methods'])
+        self.assertTrue(capabilities['multicall'])
+        self.assertFalse(capabilities['binrpc'])
+        self.assertEqual(client._server.remotes[DEFAULT_REMOTE]['type'], _hm.BACKEND_CCU)
+        # Warm-up is enabled automatically for remotes supporting system.multicall
+        for _ in range(50):
+            if DEFAULT_REMOTE in client._server._rpcfunctions.warmups:
+                break
+            time.sleep(0.1)
+        self.assertEqual(client._server._rpcfunctions.warmups[DEFAULT_REMOTE]['failed'], 0)
+
+        # Without system.multicall batches are sent call by call
+        proxy = client._server.proxies["%s-%s" % (DEFAULT_INTERFACE_CLIENT, DEFAULT_REMOTE)]
+        proxy._capabilities = _hm.Capabilities(['getValue', 'setValue'], "pyhomematic VCCU")
+        with client.batch(DEFAULT_REMOTE) as batch:
+            batch.getValue("VCU0000001:1", "STATE")
+            batch.setValue("VCU0000001:1", "STATE", True)
+        self.assertEqual(batch.results, [True, ""])
+        self.assertEqual(batch.requests, 2)
+        client.stop()
+
+    def test_1_backend(self):
+        LOG.info("TestCapabilities.test_1_backend")
+        homegear = _hm.Capabilities(['system.multicall', 'getAllValues'], "Homegear 0.8.0")
+        self.assertEqual(homegear.backend, _hm.BACKEND_HOMEGEAR)
+        self.assertTrue(homegear.binrpc)
+        self.assertTrue(homegear.supports('getAllValues'))
+        unknown = _hm.Capabilities()
+        self.assertEqual(unknown.backend, _hm.BACKEND_UNKNOWN)
+        self.assertIsNone(unknown.supports('system.multicall'))
+        self.assertFalse(unknown.multicall)
+
+
+class Test_22_CompactDevices(unittest.TestCase):
+    def test_0_channel_layout(self):
+        LOG.info("TestCompactDevices.test_0_channel_layout")
+        description = {'ADDRESS': 'VCU0000001:1', 'PARENT': 'VCU0000001', 'TYPE': 'SWITCH',
+                       'INDEX': 1, 'PARAMSETS': ['MASTER', 'VALUES'], 'AES_ACTIVE': 0,
+                       'LINK_SOURCE_ROLES': 'SWITCH', 'FIRMWARE': '1.0'}
+        channel = HMChannel(description, None)
+        self.assertFalse(hasattr(channel, '__dict__'))
+        self.assertEqual(channel._INDEX, 1)
+        self.assertEqual(channel._LINK_SOURCE_ROLES, 'SWITCH')
+        self.assertIsNone(channel._TEAM_TAG)
+        self.assertEqual(channel.PARAMSETS, {})
+        self.assertEqual(channel.NAME, 'VCU0000001:1')
+        events = []
+        channel.setEventCallback(lambda *args: events.append(args))
+        channel.event('test', 'STATE', True)
+        self.assertEqual(events, [('VCU0000001:1', 'test', 'STATE', True)])
+        self.assertTrue(channel.getCachedOrUpdatedValue('STATE'))
+
+    def test_1_shared_metadata(self):
+        LOG.info("TestCompactDevices.test_1_shared_metadata")
+        with open(os.path.join(BASE_DIR, "pyhomematic/devicetypes/json/device_descriptions.json")) as fptr:
+            descriptions = [d for d in json.load(fptr) if not d.get('PARENT')]
+        for description in descriptions:
+            deviceclass = devicetypes.SUPPORTED.get(description['TYPE'], devicetypes.UNSUPPORTED)
+            reference = deviceclass(description, None)
+            first = deviceclass.fromDescription(description, None)
+            second = deviceclass.fromDescription(description, None)
+            self.assertEqual(type(second), deviceclass)
+            for node in ('SENSORNODE', 'BINARYNODE', 'ATTRIBUTENODE', 'WRITENODE', 'EVENTNODE', 'ACTIONNODE'):
+                expected = {name: list(channels) for name, channels in getattr(reference, node).items()}
+                self.assertEqual({name: list(channels) for name, channels in getattr(second, node).items()},
+                                 expected, "%s %s" % (description['TYPE'], node))
+                self.assertIs(getattr(first, node), getattr(second, node))
+            self.assertEqual(second.ELEMENT, reference.ELEMENT)
+
+
+def _legacyRemoteElement(devicetype):
+    if "RC-2" in devicetype or "PB-2" in devicetype or "WRC2" in devicetype or "BRC2" in devicetype or "WRCC2" in devicetype:
+        return [1, 2]
+    if "HM-Dis-WM55" in devicetype or "HM-Dis-EP-WM55" in devicetype:
+        return [1, 2]
+    if "HM-RC-Dis-H-x-EU" in devicetype:
+        return list(range(1, 21))
+    if "Sec3" in devicetype or "Key3" in devicetype:
+        return [1, 2, 3]
+    if "RC-4" in devicetype or "PB-4" in devicetype:
+        return [1, 2, 3, 4]
+    if "HM-PBI-4-FM" in devicetype or "ZEL STG RM FST UP4" in devicetype or "263 145" in devicetype or "HM-PBI-X" in devicetype:
+        return [1, 2, 3, 4]
+    if "Sec4" in devicetype or "Key4" in devicetype or "KRCA" in devicetype or "KRC4" in devicetype:
+        return [1, 2, 3, 4]
+    if "PB-6" in devicetype or "WRC6" in devicetype:
+        return [1, 2, 3, 4, 5, 6]
+    if "RC-8" in devicetype or "HM-MOD-EM-8" in devicetype:
+        return [1, 2, 3, 4, 5, 6, 7, 8]
+    if "RC-12" in devicetype:
+        return list(range(1, 13))
+    if "HM-OU-LED16" in devicetype:
+        return list(range(1, 16))
+    if "RC-19" in devicetype or "HM-PB-4Dis-WM" in devicetype:
+        return list(range(1, 20))
+    if "HMW-IO-4-FM" in devicetype:
+        return [1, 2, 3, 4]
+    if "HmIP-RC8" in devicetype or "HmIP-MOD-RC8" in devicetype:
+        return [1, 2, 3, 4, 5, 6, 7, 8]
+    if "HmIP-WRCD" in devicetype or "HmIP-WRCR" in devicetype:
+        return [1, 2, 3]
+    return [1]
+
+
+def _legacyPowermeterChannel(devicetype):
+    if "HmIP-FSM" in devicetype or "HmIP-FSM16" in devicetype:
+        return 5
+    if "HMIP-PSM" in devicetype or "HmIP-PSM" in devicetype or "HmIP-PSM-2" in devicetype or "HmIP-USBSM" in devicetype or "HmIP-PSM-CH" in devicetype:
+        return 6
+    if "HmIP-BSM" in devicetype:
+        return 7
+    return None
+
+
+class Test_23_ChannelTables(unittest.TestCase):
+    def test_0_legacy_equivalence(self):
+        LOG.info("TestChannelTables.test_0_legacy_equivalence")
+        tables = (
+            (devicetypes.misc.Remote.ELEMENT, _legacyRemoteElement),
+            (devicetypes.actors.Dimmer.ELEMENT,
+             lambda t: [1, 2] if "Dim2L" in t or "Dim2T" in t or t == "HM-DW-WM" else [1]),
+            (devicetypes.actors.IPKeyDimmer.ELEMENT,
+             lambda t: [5, 9, 13] if "HMIP-DRDI3" in t.upper() else [4]),
+            (devicetypes.actors.IPKeyDimmer._KEY_CHANNELS,
+             lambda t: [1, 2, 3] if "HMIP-DRDI3" in t.upper() else [1, 2]),
+            (devicetypes.actors.IPSwitchPowermeter._SENSOR_CHANNEL, _legacyPowermeterChannel),
+        )
+        for devicetype in devicetypes.SUPPORTED:
+            for table, legacy in tables:
+                self.assertEqual(table.resolve(devicetype), legacy(devicetype), devicetype)
+
+    def test_1_cached(self):
+        LOG.info("TestChannelTables.test_1_cached")
+        first = devicetypes.SUPPORTED['HM-RC-4-2'](
+            {'ADDRESS': 'VCU0000001', 'TYPE': 'HM-RC-4-2', 'CHILDREN': []}, None)
+        second = devicetypes.SUPPORTED['HM-RC-4-2'](
+            {'ADDRESS': 'VCU0000002', 'TYPE': 'HM-RC-4-2', 'CHILDREN': []}, None)
+        self.assertEqual(first.ELEMENT, [1, 2, 3, 4])
+        self.assertIs(first.ELEMENT, second.ELEMENT)
+        powermeter = devicetypes.SUPPORTED['HmIP-PSM'](
+            {'ADDRESS': 'VCU0000003', 'TYPE': 'HmIP-PSM', 'CHILDREN': []}, None)
+        self.assertEqual(powermeter.SENSORNODE['POWER'], [6])
+
+
+class Test_24_ReadPolicy(unittest.TestCase):
+    class CountingProxy():
+        def __init__(self):
+            self.calls = 0
+
+        def getValue(self, address, key):
+            self.calls += 1
+            return 21.5
+
+    def setUp(self):
+        self.proxy = self.CountingProxy()
+        self.device = generic.HMDevice({'ADDRESS': 'VCU0000001', 'TYPE': 'TEST', 'CHILDREN': []}, self.proxy)
+        self.device._SENSORNODE = {'TEMPERATURE': [1]}
+        self.device.CHANNELS[1] = HMChannel({'ADDRESS': 'VCU0000001:1', 'PARENT': 'VCU0000001'}, self.proxy)
+
+    def test_0_remote(self):
+        LOG.info("TestReadPolicy.test_0_remote")
+        self.device.CHANNELS[1].event('test', 'TEMPERATURE', 20.0)
+        self.assertEqual(self.device.getSensorData('TEMPERATURE'), 21.5)
+        self.assertEqual(self.device.getSensorData('TEMPERATURE'), 21.5)
+        self.assertEqual(self.proxy.calls, 2)
+
+    def test_1_cache(self):
+        LOG.info("TestReadPolicy.test_1_cache")
+        self.device.setReadPolicy(generic.READ_CACHE)
+        # Miss: fetched once, then served from the cache
+        self.assertEqual(self.device.getSensorData('TEMPERATURE'), 21.5)
+        self.assertEqual(self.device.getSensorData('TEMPERATURE'), 21.5)
+        self.assertEqual(self.proxy.calls, 1)
+        self.device.CHANNELS[1].event('test', 'TEMPERATURE', 20.0)
+        self.assertEqual(self.device.getSensorData('TEMPERATURE'), 20.0)
+        self.assertEqual(asyncio.run(self.device.asyncGetSensorData('TEMPERATURE')), 20.0)
+        self.assertEqual(self.proxy.calls, 1)
+        self.assertRaises(ValueError, self.device.setReadPolicy, 'sometimes')
+
+    def test_2_maxage(self):
+        LOG.info("TestReadPolicy.test_2_maxage")
+        self.device.setReadPolicy(generic.READ_CACHE_MAXAGE, 60)
+        channel = self.device.CHANNELS[1]
+        channel.event('test', 'TEMPERATURE', 20.0)
+        self.assertEqual(self.device.getSensorData('TEMPERATURE'), 20.0)
+        self.assertEqual(self.proxy.calls, 0)
+        self.assertLess(channel.valueAge('TEMPERATURE'), 60)
+        channel._VALUES.updated['TEMPERATURE'] -= 120
+        self.assertEqual(self.device.getSensorData('TEMPERATURE'), 21.5)
+        self.assertEqual(self.proxy.calls, 1)
+        self.assertEqual(self.device.getSensorData('TEMPERATURE'), 21.5)
+        self.assertEqual(self.proxy.calls, 1)
+
+    def test_3_invalid_config(self):
+        LOG.info("TestReadPolicy.test_3_invalid_config")
+        for options in ({"readpolicy": "Cache"}, {"readpolicy": "cache-maxage", "readmaxage": "60"}):
+            remote = {"ip": DEFAULT_IP, "port": 2001, "connect": False}
+            remote.update(options)
+            with self.assertRaises(ValueError):
+                _hm.ServerThread(local=DEFAULT_IP, localport=0, remotes={DEFAULT_REMOTE: remote})
+
+
+class Test_25_ValueStore(unittest.TestCase):
+    def test_0_store(self):
+        LOG.info("TestValueStore.test_0_store")
+        values = generic.ValueStore()
+        values['UNREACH'] = None
+        values.set('STATE', True, generic.SOURCE_EVENT)
+        values.set('LEVEL', 0.5, generic.SOURCE_GETVALUE)
+        self.assertEqual(values, {'UNREACH': None, 'STATE': True, 'LEVEL': 0.5})
+        self.assertEqual(values.entry('UNREACH'), (None, None, None))
+        value, timestamp, source = values.entry('LEVEL')
+        self.assertEqual((value, source), (0.5, generic.SOURCE_GETVALUE))
+        self.assertEqual(values.source('STATE'), generic.SOURCE_EVENT)
+        self.assertEqual(values.age('LEVEL', now=timestamp + 10), 10)
+        self.assertIsNone(values.age('UNREACH'))
+        self.assertEqual(values.olderThan(5, now=timestamp + 10), ['STATE', 'LEVEL'])
+        self.assertEqual(values.olderThan(5), [])
+
+    def test_1_channel(self):
+        LOG.info("TestValueStore.test_1_channel")
+        channel = HMChannel({'ADDRESS': 'VCU0000001:1', 'PARENT': 'VCU0000001'}, None)
+        self.assertEqual(channel.staleValues(0), [])
+        channel.event('test', 'STATE', True)
+        self.assertEqual(channel.valueSource('STATE'), generic.SOURCE_EVENT)
+        self.assertIsNotNone(channel.valueAge('STATE'))
+        self.assertIsNone(channel.valueAge('LEVEL'))
+        self.assertEqual(channel.staleValues(-1), ['STATE'])
+
+
 if __name__ == '__main__':
     unittest.main()